@@ -31,6 +31,7 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import copy
 import os
 import tkinter
 import tkinter.filedialog
@@ -38,7 +39,7 @@ import tkinter.messagebox
 import tkinter.ttk
 
 from Globiconfig import CheckBoxCombo, CheckBoxText, FilterText
-from GlobifestLib import Builder, DefTree, Log, ManifestParser, Util
+from GlobifestLib import Builder, DefTree, Log, ManifestParser, Settings, Snapshot, Util
 
 ACCEL = Util.create_enum(
     "CONTROL"
@@ -179,6 +180,7 @@ class App(object):
         self.param_tbl = Util.Container()
         self.settings_view_tbl = Util.Container()
         self.settings_cache = Util.Container()
+        self.effective_settings = Settings.LayeredSettings()
         self.cur_tree_item = None
         self._modified = False
         self._opendir = "."
@@ -576,7 +578,12 @@ class App(object):
             return
 
         # Update settings table
-        self.settings_view_tbl[self.cur_layer.get()] = variant
+        layer = self.cur_layer.get()
+        self.settings_view_tbl[layer] = variant
+        self.effective_settings.set_layer(
+            self.project.get_layer_names().index(layer),
+            self.settings_cache[layer][variant].config.get_settings()
+            )
 
         # Rebuild layer list options to reflect change
         layer_names = self.project.get_layer_names()
@@ -766,6 +773,7 @@ class App(object):
         self._clear_gui()
         self.project = None
         self.settings_cache.clear()
+        self.effective_settings = Settings.LayeredSettings()
         self.app_root.title(self.APP_TITLE)
         self.project_file = ""
         self._set_modified(False)
@@ -789,15 +797,17 @@ class App(object):
             # room for the new control
             self.value_stub.grid_remove()
 
-    def _open_project(self):
-        try:
-            project, prj_dir, out_dir = Builder.read_project(self.project_file, self.out_dir)
-        except Log.GlobifestException as e:
-            tkinter.messagebox.showerror(self.APP_TITLE, str(e))
-            return
+    def _build_forest(self, project, prj_dir, out_dir, snapshot):
+        """
+            Aggregate the definitions used by a project into a DefForest
 
+            Definitions are reused from the snapshot, and the result is added to it.
+
+            @return the DefForest, or None on error
+        """
+        forest_files = list(Builder.file_cache.get_files("project", self.project_file) or [])
+        def_cache = Builder.DefinitionCache(snapshot=snapshot)
         def_trees = list()
-        self._opendir = os.path.dirname(self.project_file)
 
         for pkg in project.get_packages():
             pkg_file = Builder.get_pkg_file(project, pkg, prj_dir, out_dir)
@@ -806,14 +816,14 @@ class App(object):
                     self.APP_TITLE,
                     "Unknown file root {}".format(str(pkg.file_root))
                     )
-                return
+                return None
             pkg_root = Builder.get_pkg_root(project, pkg, pkg_file, out_dir)
             if pkg_root is None:
                 tkinter.messagebox.showerror(
                     self.APP_TITLE,
                     "Unknown package root {}".format(str(pkg.file_root))
                     )
-                return
+                return None
 
             try:
                 manifest = Builder.build_manifest(
@@ -824,18 +834,43 @@ class App(object):
                     )
             except Log.GlobifestException as e:
                 tkinter.messagebox.showerror(self.APP_TITLE, str(e))
-                return
+                return None
+            forest_files.append(pkg_file)
 
             pkg_dir = os.path.dirname(pkg_file)
             for cfg in manifest.get_configs():
                 cfg.definition = Util.get_abs_path(cfg.definition, pkg_dir)
-                def_tree = Builder.build_definition(cfg.definition)
-                def_trees.append(def_tree)
+                def_trees.append(def_cache(cfg.definition))
 
         # Aggregate DefTrees into a single list
         forest = DefTree.DefForest()
-        for tree in def_trees:
-            tree.walk(forest)
+        try:
+            for tree in def_trees:
+                def_cache.add_to_forest(forest, tree)
+        except Log.GlobifestException as e:
+            tkinter.messagebox.showerror(self.APP_TITLE, str(e))
+            return None
+
+        snapshot.set_forest(forest, forest_files)
+        return forest
+
+    def _open_project(self):
+        try:
+            project, prj_dir, out_dir = Builder.read_project(self.project_file, self.out_dir)
+        except Log.GlobifestException as e:
+            tkinter.messagebox.showerror(self.APP_TITLE, str(e))
+            return
+
+        self._opendir = os.path.dirname(self.project_file)
+
+        # Reuse the definitions and configs which have not changed since the last time
+        snapshot_file = Snapshot.get_snapshot_file(out_dir)
+        snapshot = Snapshot.load(snapshot_file)
+        forest = snapshot.get_forest()
+        if forest is None:
+            forest = self._build_forest(project, prj_dir, out_dir, snapshot)
+            if forest is None:
+                return
 
         self.project = project
 
@@ -855,6 +890,7 @@ class App(object):
         # Set up layer/variant boxes
         self.settings_view_tbl.clear()
         self.settings_cache.clear()
+        self.effective_settings = Settings.LayeredSettings()
         layer_names = project.get_layer_names()
         if layer_names:
             for layer in layer_names:
@@ -867,10 +903,24 @@ class App(object):
                 for variant in variant_names:
                     variant_cache = Util.Container()
                     layer_cache[variant] = variant_cache
-                    variant_target = self.project.get_target(layer, variant)
+                    # Update the filename of a copy, since the project is shared
+                    variant_target = copy.copy(self.project.get_target(layer, variant))
                     variant_target.filename = Util.get_abs_path(variant_target.filename, prj_dir)
                     variant_cache["target"] = variant_target
-                    variant_cache["config"] = Builder.build_config(variant_target.filename)
+                    config = snapshot.get_config(variant_target.filename)
+                    if config is None:
+                        config = Builder.build_config(variant_target.filename, cached=False)
+                        snapshot.add_config(variant_target.filename, config)
+                    # Configs are edited in place, so they must not be shared
+                    variant_cache["config"] = copy.deepcopy(config)
+
+                # The first variant is shown initially
+                if variant_names:
+                    self.effective_settings.add_layer(
+                        layer_cache[variant_names[0]].config.get_settings()
+                        )
+                else:
+                    self.effective_settings.add_layer(Settings.new())
 
             value_list = []
             for layer in layer_names:
@@ -880,6 +930,13 @@ class App(object):
             self.cur_layer.set(layer_names[0])
             # Variant will propagate via layer change
 
+        if snapshot.is_modified():
+            try:
+                os.makedirs(out_dir, exist_ok=True)
+                Snapshot.save(snapshot, snapshot_file)
+            except OSError as e:
+                Log.W("Cannot save snapshot {}: {}".format(snapshot_file, str(e)))
+
         self.file_menu.entryconfig("Close", state="normal")
 
         if not self.settings_cache:
@@ -936,28 +993,24 @@ class App(object):
         out = []
         out.append(item.def_file)
         # Iterate through each layer and the currently selected variant
-        effective_setting = -1
-        values = []
-        for layer in self.project.get_layer_names():
-            l_cache = self.settings_cache[layer]
-            variant = self.settings_view_tbl[layer]
-            v_cache = l_cache[self.settings_view_tbl[layer]]
-            settings = v_cache.config.get_settings()
-            # Catching KeyError here to distinguish value being present with "None" value
-            try:
-                value = settings.get_value(pid)
-                entry_text = "[{}][{}] = {}".format(layer, variant, str(value))
-                values.append(entry_text)
-                effective_setting += 1
-            except KeyError:
-                pass
-
-        if values:
-            for e in enumerate(values):
-                prefix = "*" if (e[0] == effective_setting) else " "
-                out.append(prefix + e[1])
-        else:
+        effective_layer = self.effective_settings.get_layer_index(pid)
+        if effective_layer < 0:
             out.append("<<UNDEFINED>>")
+        else:
+            for layer_idx, layer in enumerate(self.project.get_layer_names()):
+                settings = self.effective_settings.get_layer(layer_idx)
+                # Catching KeyError here to distinguish value being present with "None" value
+                try:
+                    value = settings.get_value(pid)
+                except KeyError:
+                    continue
+                prefix = "*" if (layer_idx == effective_layer) else " "
+                out.append("{}[{}][{}] = {}".format(
+                    prefix,
+                    layer,
+                    self.settings_view_tbl[layer],
+                    str(value)
+                    ))
 
         self.set_source(os.linesep.join(out))
 
@@ -0,0 +1,612 @@
+#/usr/bin/env python
+"""
+    globifest/Analyzer.py - globifest static analysis of projects
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import operator
+import re
+
+from GlobifestLib import \
+    Bdd, \
+    BoundedStatefulParser, \
+    Builder, \
+    LineReader, \
+    Log, \
+    Manifest, \
+    ManifestParser, \
+    Matcher, \
+    Settings, \
+    StatefulParser, \
+    Util
+
+# Tokens of an expression, in the order Settings.evaluate() matches them
+EXPR_STRING_RE = re.compile("\"[^\"]*\"|'[^']*'")
+EXPR_TOKEN_RE = re.compile(r"([0-9\-]+)|([a-zA-Z_0-9]+)")
+
+ENTRY_STATUS = Util.create_enum(
+    "DEAD",
+    "ALWAYS",
+    "CONDITIONAL"
+    )
+
+# Operators of an expression, as evaluated by Settings.evaluate()
+BINARY_OPS = Util.Container({
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge
+    })
+LOGICAL_OPS = ["&&", "||"]
+STRING_OPS = ["==", "=", "!="]
+
+def get_identifiers(expr):
+    """
+        Get the identifiers referenced by an expression
+
+        @param expr Expression text, as passed to Settings.evaluate()
+        @return set of identifiers
+    """
+    identifiers = set()
+    for m in EXPR_TOKEN_RE.finditer(EXPR_STRING_RE.sub(" ", expr)):
+        ident = m.group(2)
+        if ident and (ident not in Settings.RESERVED_IDENT_MAP):
+            identifiers.add(ident)
+    return identifiers
+
+class IdentifierCollector(ManifestParser.ConfigsOnly):
+    """
+        Settings stand-in which records the identifiers referenced by manifest conditions
+
+        Every condition evaluates to True, so that all blocks are parsed.
+    """
+
+    def __init__(self):
+        ManifestParser.ConfigsOnly.__init__(self)
+        self.identifiers = set()
+
+    def evaluate(self, expr):
+        """Record the identifiers in the expression; returns True"""
+        self.identifiers.update(get_identifiers(expr))
+        return True
+
+    def get_identifiers(self):
+        """Returns the set of identifiers referenced by all evaluated expressions"""
+        return self.identifiers
+
+def get_referenced_identifiers(project, prj_dir, out_dir):
+    """
+        Get the identifiers which can affect the output of a project
+
+        These are identifiers referenced by manifest conditions, and parameters of the
+        definitions used by each manifest.  Dependencies must already be set up.
+
+        @param project A Project object
+        @param prj_dir The top-level project directory
+        @param out_dir The top-level output directory
+        @return set of identifiers
+    """
+    collector = IdentifierCollector()
+    identifiers = set()
+    for pkg in project.get_packages():
+        pkg_file = Builder.get_pkg_file(project, pkg, prj_dir, out_dir)
+        if pkg_file is None:
+            Log.E("Unknown file root {}".format(str(pkg.file_root)))
+        pkg_root = Builder.get_pkg_root(project, pkg, pkg_file, out_dir)
+        if pkg_root is None:
+            Log.E("Unknown package root {}".format(str(pkg.module_root)))
+        manifest = Builder.build_manifest(pkg_file, collector, pkg_root)
+        for cfg in manifest.get_configs():
+            identifiers.update(cfg.def_tree.get_param_ids())
+
+    identifiers.update(collector.get_identifiers())
+    return identifiers
+
+def get_signature(settings, identifiers):
+    """
+        Get the values of identifiers in the settings, for comparison
+
+        Values which refer to other identifiers are followed, since conditions resolve them.
+
+        @param settings A Settings object
+        @param identifiers The identifiers to include
+        @return tuple of (identifier, value) pairs, sorted by identifier; value is None if undefined
+    """
+    values = Util.Container()
+    pending = list(identifiers)
+    while pending:
+        ident = pending.pop()
+        if ident in values:
+            continue
+        value = settings.get_value(ident) if settings.has_value(ident) else None
+        values[ident] = value
+        if (value is None) or (value in Settings.RESERVED_IDENT_MAP) or value.isnumeric():
+            continue
+        if Settings.IDENT_RE.fullmatch(value):
+            pending.append(value)
+
+    return tuple(sorted(values.items()))
+
+def partition_variants(in_fname, out_dir, variant_list):
+    """
+        Partition configurations of a project into classes which produce the same output
+
+        Configurations in the same class have the same values for every identifier referenced by
+        the project's manifest conditions and definitions, so building one configuration of each
+        class is sufficient.
+
+        @param in_fname The project file
+        @param out_dir The top-level output directory
+        @param variant_list List of configurations, each a list of layer=variant strings
+        @return list of classes in order of first appearance, each a list of indices into
+            variant_list
+    """
+    project, prj_dir, out_dir = Builder.read_project(in_fname, out_dir)
+    Builder.setup_dependencies(project, out_dir)
+
+    identifiers = get_referenced_identifiers(project, prj_dir, out_dir)
+    Log.D("Referenced identifiers: {}".format(" ".join(sorted(identifiers))))
+
+    classes = dict()
+    for i, variant_settings in enumerate(variant_list):
+        layer_variants = Builder.get_layer_variants(project, prj_dir, variant_settings)
+        settings = Builder.build_layered_settings(project, layer_variants)
+        signature = get_signature(settings, identifiers)
+        classes.setdefault(signature, []).append(i)
+
+    return list(classes.values())
+
+class SymbolicSettings(Settings.Settings):
+    """
+        Settings stand-in which converts conditions into BDDs over every layer combination
+
+        Each variant of each layer is a BDD variable; exactly one variant per layer is valid.
+        The value of an identifier is symbolic: a list of (guard, value) pairs, where guard is
+        the BDD for the combinations which produce that value.
+    """
+
+    def __init__(self, layers):
+        """
+            @param layers List of (layer name, list of (variant name, Settings)) in layer order
+        """
+        Settings.Settings.__init__(self)
+        self.bdd = Bdd.new()
+        self.layers = []
+        self.valid = Bdd.TRUE
+        self.value_cache = dict()
+        self.conditions = []
+
+        for layer_name, variants in layers:
+            layer_vars = []
+            for variant_name, variant_settings in variants:
+                node = self.bdd.add_var("{}={}".format(layer_name, variant_name))
+                layer_vars.append((node, variant_settings, variant_name))
+            self.layers.append((layer_name, layer_vars))
+            self.valid = self.bdd.apply_and(self.valid, self._exactly_one([v[0] for v in layer_vars]))
+
+    def add_implicit_configs(self, new_configs):
+        """Add implicit configuration settings"""
+        Settings.Settings.add_implicit_configs(self, new_configs)
+        self.value_cache.clear()
+
+    def evaluate(self, expr):
+        """
+            Convert the expression into a BDD, and record it in the list of conditions
+
+            @return True, so that all blocks are parsed
+        """
+        self.conditions.append(self.get_condition(expr))
+        return True
+
+    def get_bdd(self):
+        """Returns the BDD manager"""
+        return self.bdd
+
+    def get_condition(self, expr):
+        """Returns the BDD for combinations where the expression is True"""
+        return self._to_bool(self._eval_expr(expr), truthy_ints=True)
+
+    def get_predicate_text(self, node):
+        """
+            Returns a description of the valid layer combinations for which node is True
+
+            Alternatives are joined by ||; layers which are not constrained are omitted.
+        """
+        # Convert each path into the set of allowed variants for each layer
+        alternatives = []
+        for cube in self.bdd.iter_cubes(self.bdd.apply_and(node, self.valid)):
+            alternative = []
+            var = 0
+            for _layer_name, layer_vars in self.layers:
+                allowed = set()
+                for i in range(len(layer_vars)):
+                    if cube.get(var + i) is True:
+                        allowed = {i}
+                        break
+                    elif cube.get(var + i) is None:
+                        allowed.add(i)
+                alternative.append(frozenset(allowed))
+                var += len(layer_vars)
+            alternatives.append(alternative)
+
+        # Merge alternatives which differ in only one layer
+        merged = True
+        while merged:
+            merged = False
+            for i, j in [(i, j) for i in range(len(alternatives)) for j in range(i)]:
+                diff = [k for k in range(len(self.layers)) if alternatives[i][k] != alternatives[j][k]]
+                if len(diff) <= 1:
+                    for k in diff:
+                        alternatives[j][k] = alternatives[j][k] | alternatives[i][k]
+                    alternatives.pop(i)
+                    merged = True
+                    break
+
+        texts = []
+        for alternative in alternatives:
+            terms = []
+            for (layer_name, layer_vars), allowed in zip(self.layers, alternative):
+                if len(allowed) == len(layer_vars):
+                    continue
+                names = [layer_vars[i][2] for i in sorted(allowed)]
+                if len(names) == 1:
+                    terms.append("{}={}".format(layer_name, names[0]))
+                else:
+                    terms.append("{} in {{{}}}".format(layer_name, ",".join(names)))
+            texts.append(" && ".join(terms) if terms else "TRUE")
+
+        if not texts:
+            return "FALSE"
+        return " || ".join(texts)
+
+    def get_valid(self):
+        """Returns the BDD for valid layer combinations"""
+        return self.valid
+
+    def pop_conditions(self):
+        """Returns and clears the list of conditions evaluated"""
+        conditions = self.conditions
+        self.conditions = []
+        return conditions
+
+    def _apply_op(self, op_text, args):
+        """Apply an operator to symbolic values, returning a symbolic bool"""
+        bdd = self.bdd
+        if op_text == "!":
+            result = bdd.apply_not(self._to_bool(args[0]))
+        elif op_text in LOGICAL_OPS:
+            arg1 = self._to_bool(args[0])
+            arg2 = self._to_bool(args[1])
+            if op_text == "&&":
+                result = bdd.apply_and(arg1, arg2)
+            else:
+                result = bdd.apply_or(arg1, arg2)
+        else:
+            # Combinations with mismatched types would fail to evaluate, so they are excluded
+            compare = BINARY_OPS[op_text]
+            result = Bdd.FALSE
+            for guard1, value1 in args[0]:
+                for guard2, value2 in args[1]:
+                    if type(value1) != type(value2):
+                        continue
+                    if isinstance(value1, str) and op_text not in STRING_OPS:
+                        continue
+                    if compare(value1, value2):
+                        result = bdd.apply_or(result, bdd.apply_and(guard1, guard2))
+        return self._from_bool(result)
+
+    def _eval_expr(self, expr):
+        """
+            Evaluate the expression symbolically, returning a symbolic value
+
+            This follows the same (left-to-right) grammar as Settings.evaluate()
+        """
+        op_text = None
+        op_args = []
+        tok = None
+        while True:
+            # Fill up the operation
+            if op_text:
+                if tok is not None:
+                    op_args.append(tok)
+                    tok = None
+                num_args = 1 if (op_text == "!") else 2
+                if len(op_args) == num_args:
+                    tok = self._apply_op(op_text, op_args)
+                    op_text = None
+                    op_args = []
+                    continue
+            if expr == "":
+                if op_text:
+                    Log.E("Operator '{}' missing argument".format(op_text))
+                break
+
+            # Identify the next token
+            m = Matcher.new(expr)
+
+            if m.is_fullmatch(Settings.WHITESPACE_TOKEN_RE):
+                expr = m[1]
+            elif m.is_fullmatch(Settings.INT_TOKEN_RE):
+                if tok is not None:
+                    Log.E("Unexpected integer '{}'".format(m[1]))
+                tok = [(Bdd.TRUE, Settings.IntToken(m[1]).get_value())]
+                expr = m[2]
+            elif m.is_fullmatch(Settings.IDENT_TOKEN_RE):
+                if tok is not None:
+                    Log.E("Unexpected identifier '{}'".format(m[1]))
+                if m[1] in Settings.RESERVED_IDENT_MAP:
+                    tok = [(Bdd.TRUE, Settings.RESERVED_IDENT_MAP[m[1]][Settings.RESERVED_IDENT.VALUE])]
+                else:
+                    tok = self._get_symbolic_value(m[1])
+                expr = m[2]
+            elif m.is_fullmatch(Settings.OP_TOKEN_RE):
+                if op_text is not None:
+                    Log.E("Spurious operator '{}' after operator '{}'".format(m[1], op_text))
+                if m[1] == "!":
+                    if tok is not None:
+                        Log.E("Unexpected operator '{}'".format(m[1]))
+                elif tok is None:
+                    Log.E("Operator '{}' missing value".format(m[1]))
+                op_text = m[1]
+                expr = m[2]
+            elif expr[0] in "(\"'":
+                if expr[0] == "(":
+                    sub_parser = BoundedStatefulParser.new(
+                        expr,
+                        "(", ")",
+                        StatefulParser.FLAGS.MULTI_LEVEL
+                        )
+                else:
+                    sub_parser = BoundedStatefulParser.new(expr, expr[0])
+                if StatefulParser.PARSE_STATUS.FINISHED != sub_parser.get_status():
+                    Log.E("Malformed expression: " + expr)
+                if expr[0] == "(":
+                    tok = self._eval_expr(sub_parser.get_parsed_text())
+                    tok = self._from_bool(self._to_bool(tok, truthy_ints=True))
+                else:
+                    tok = [(Bdd.TRUE, sub_parser.get_parsed_text())]
+                expr = sub_parser.get_remaining_text()
+            else:
+                Log.E("Bad expression: " + expr)
+
+        if tok is None:
+            Log.E("Cannot evaluate expression")
+        return tok
+
+    def _exactly_one(self, nodes):
+        """Returns the BDD which is TRUE when exactly one of the nodes is TRUE"""
+        bdd = self.bdd
+        none_set = Bdd.TRUE
+        one_set = Bdd.FALSE
+        for node in nodes:
+            one_set = bdd.ite(node, none_set, one_set)
+            none_set = bdd.apply_and(none_set, bdd.apply_not(node))
+        return one_set
+
+    def _from_bool(self, node):
+        """Returns a symbolic bool from a BDD"""
+        return [(node, True), (self.bdd.apply_not(node), False)]
+
+    def _get_symbolic_value(self, ident, visiting=None):
+        """Returns the symbolic value of an identifier over all layer combinations"""
+        result = self.value_cache.get(ident)
+        if result is not None:
+            return result
+
+        visiting = visiting or set()
+        if ident in visiting:
+            Log.E("Circular reference to {}".format(ident))
+        visiting.add(ident)
+
+        bdd = self.bdd
+        result = []
+        covered = Bdd.FALSE
+        for _layer_name, layer_vars in reversed(self.layers):
+            layer_covered = Bdd.FALSE
+            for node, variant_settings, _variant_name in layer_vars:
+                if not variant_settings.has_value(ident):
+                    continue
+                guard = bdd.apply_and(node, bdd.apply_not(covered))
+                result += self._resolve_value(variant_settings.get_value(ident), guard, visiting)
+                layer_covered = bdd.apply_or(layer_covered, node)
+            covered = bdd.apply_or(covered, layer_covered)
+
+        if ident in self.implicit_configs:
+            guard = bdd.apply_not(covered)
+            result += self._resolve_value(self.implicit_configs[ident], guard, visiting)
+
+        visiting.discard(ident)
+        self.value_cache[ident] = result
+        return result
+
+    def _resolve_value(self, value, guard, visiting):
+        """Returns the symbolic value of a config value, as in IdentToken"""
+        if (value is None) or (guard == Bdd.FALSE):
+            return []
+        m = Matcher.new(value)
+        if value in Settings.RESERVED_IDENT_MAP:
+            return [(guard, Settings.RESERVED_IDENT_MAP[value][Settings.RESERVED_IDENT.VALUE])]
+        elif m.is_fullmatch(Settings.STRING_CONFIG_RE):
+            return [(guard, m[1])]
+        elif value.isnumeric():
+            return [(guard, int(value))]
+        elif m.is_fullmatch(Settings.IDENT_RE):
+            result = []
+            for sub_guard, sub_value in self._get_symbolic_value(value, visiting):
+                sub_guard = self.bdd.apply_and(guard, sub_guard)
+                if sub_guard != Bdd.FALSE:
+                    result.append((sub_guard, sub_value))
+            return result
+
+        # Malformed values fail to evaluate
+        return []
+
+    def _to_bool(self, tok, truthy_ints=False):
+        """Returns the BDD for a symbolic value being True"""
+        result = Bdd.FALSE
+        for guard, value in tok:
+            if isinstance(value, bool):
+                is_true = value
+            elif truthy_ints and isinstance(value, int):
+                is_true = (value != 0)
+            else:
+                is_true = False
+            if is_true:
+                result = self.bdd.apply_or(result, guard)
+        return result
+
+class SymbolicManifestParser(ManifestParser.ManifestParser):
+    """
+        Manifest parser which records the condition (as a BDD) under which each entry is included
+
+        Entries are not added to the manifest; see get_entries().
+    """
+
+    def __init__(self, manifest, settings, def_parser=None):
+        ManifestParser.ManifestParser.__init__(
+            self,
+            manifest,
+            settings,
+            validate_files=True,
+            def_parser=def_parser
+            )
+        self.bdd = settings.get_bdd()
+        self.entries = []
+
+        # One frame per open condition block: (conditions of prior blocks, condition of this block)
+        self.frames = []
+
+    def get_entries(self):
+        """Returns a list of Container(line_info, label, entry, condition) for each entry"""
+        return self.entries
+
+    def parse(self, line_info):
+        """Parse a line, applying any conditions which were completely parsed"""
+        ManifestParser.ManifestParser.parse(self, line_info)
+
+        for condition in self.settings.pop_conditions():
+            frame = self.frames[-1]
+            frame.cur = self.bdd.apply_and(condition, self.bdd.apply_not(frame.prior))
+            frame.prior = self.bdd.apply_or(frame.prior, condition)
+
+    def _condition_end(self):
+        """End a conditional statement"""
+        ManifestParser.ManifestParser._condition_end(self)
+        self.frames.pop(-1)
+
+    def _condition_start_else(self):
+        """Start an else block in a conditional statement"""
+        ManifestParser.ManifestParser._condition_start_else(self)
+        frame = self.frames[-1]
+        frame.cur = self.bdd.apply_not(frame.prior)
+        frame.prior = Bdd.TRUE
+
+    def _condition_start_if(self, text):
+        """Start a conditional statement"""
+        self.frames.append(Util.Container(prior=Bdd.FALSE, cur=Bdd.FALSE))
+        ManifestParser.ManifestParser._condition_start_if(self, text)
+
+    def _parse_entry(self, entry):
+        """Record the entry with the condition under which it is included"""
+        cur_context = self.context_stack[-1]
+        if not cur_context.label:
+            self.log_error("Missing label for entry {}".format(entry))
+
+        condition = Bdd.TRUE
+        for frame in self.frames:
+            condition = self.bdd.apply_and(condition, frame.cur)
+
+        self.entries.append(Util.Container(
+            line_info=self.line_info,
+            label=cur_context.label,
+            entry=Util.get_abs_path(entry, self.pkg_root),
+            condition=condition
+            ))
+
+def analyze_conditions(in_fname, out_dir):
+    """
+        Find the layer combinations under which each manifest entry is included
+
+        @param in_fname The project file
+        @param out_dir The top-level output directory
+        @return list of Container(line_info, label, entry, status, predicate), where status is an
+            ENTRY_STATUS value and predicate describes the combinations which include the entry
+    """
+    project, prj_dir, out_dir = Builder.read_project(in_fname, out_dir)
+    Builder.setup_dependencies(project, out_dir)
+
+    layers = []
+    for layer_name in project.get_layer_names():
+        variants = []
+        for variant_name in project.get_variant_names(layer_name):
+            variant = project.get_target(layer_name, variant_name)
+            config = Builder.build_config(Util.get_abs_path(variant.filename, prj_dir))
+            variants.append((variant_name, config.get_settings()))
+        layers.append((layer_name, variants))
+
+    settings = SymbolicSettings(layers)
+    bdd = settings.get_bdd()
+    valid = settings.get_valid()
+
+    results = []
+    for pkg in project.get_packages():
+        pkg_file = Builder.get_pkg_file(project, pkg, prj_dir, out_dir)
+        if pkg_file is None:
+            Log.E("Unknown file root {}".format(str(pkg.file_root)))
+        pkg_root = Builder.get_pkg_root(project, pkg, pkg_file, out_dir)
+        if pkg_root is None:
+            Log.E("Unknown package root {}".format(str(pkg.module_root)))
+        parser = SymbolicManifestParser(
+            Manifest.new(pkg_file, pkg_root),
+            settings,
+            def_parser=Builder.build_definition
+            )
+        LineReader.new(parser).read_file_by_name(pkg_file)
+
+        for e in parser.get_entries():
+            if bdd.apply_and(e.condition, valid) == Bdd.FALSE:
+                status = ENTRY_STATUS.DEAD
+            elif bdd.apply_and(bdd.apply_not(e.condition), valid) == Bdd.FALSE:
+                status = ENTRY_STATUS.ALWAYS
+            else:
+                status = ENTRY_STATUS.CONDITIONAL
+            results.append(Util.Container(
+                line_info=e.line_info,
+                label=e.label,
+                entry=e.entry,
+                status=status,
+                predicate=settings.get_predicate_text(e.condition)
+                ))
+
+    Log.D("BDD nodes: {}".format(bdd.get_node_count()))
+    return results
@@ -0,0 +1,165 @@
+#/usr/bin/env python
+"""
+    globifest/Bdd.py - globifest binary decision diagrams
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from GlobifestLib import Log
+
+# Terminal nodes
+FALSE = 0
+TRUE = 1
+
+class Bdd(object):
+    """
+        Reduced, ordered binary decision diagram manager
+
+        Nodes are integers which index into the node table; FALSE and TRUE are the terminals.
+        Variables are ordered by the order in which they are added.  Every node is unique
+        (via the unique table), so two functions are equivalent if and only if their nodes are
+        equal.  Results of operations are memoized in the operation cache.
+    """
+
+    def __init__(self):
+        # Each node is (var, low, high); terminals sort after all variables
+        self.nodes = [(None, None, None), (None, None, None)]
+        self.unique = dict()
+        self.cache = dict()
+        self.var_names = []
+
+    def add_var(self, name):
+        """
+            Add a variable, ordered after all existing variables
+
+            @return the node which is TRUE when the variable is TRUE
+        """
+        self.var_names.append(name)
+        return self._mk(len(self.var_names) - 1, FALSE, TRUE)
+
+    def apply_and(self, node1, node2):
+        """Returns the node for (node1 AND node2)"""
+        return self.ite(node1, node2, FALSE)
+
+    def apply_not(self, node):
+        """Returns the node for (NOT node)"""
+        return self.ite(node, FALSE, TRUE)
+
+    def apply_or(self, node1, node2):
+        """Returns the node for (node1 OR node2)"""
+        return self.ite(node1, TRUE, node2)
+
+    def get_var_name(self, var):
+        """Returns the name of a variable"""
+        return self.var_names[var]
+
+    def get_node_count(self):
+        """Returns the number of nodes, including terminals"""
+        return len(self.nodes)
+
+    def ite(self, f, g, h):
+        """Returns the node for (IF f THEN g ELSE h)"""
+        # Terminal cases
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if (g == TRUE) and (h == FALSE):
+            return f
+
+        key = (f, g, h)
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+
+        # Split on the top-most variable
+        var = min(self._get_var(f), self._get_var(g), self._get_var(h))
+        f0, f1 = self._cofactors(f, var)
+        g0, g1 = self._cofactors(g, var)
+        h0, h1 = self._cofactors(h, var)
+        result = self._mk(var, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+
+        self.cache[key] = result
+        return result
+
+    def iter_cubes(self, node):
+        """
+            Iterate over the paths to TRUE
+
+            Each path is yielded as a dict of {var: bool}; variables not in the dict may have
+            any value.
+        """
+        if node == FALSE:
+            return
+        stack = [(node, dict())]
+        while stack:
+            node, cube = stack.pop()
+            if node == TRUE:
+                yield cube
+                continue
+            var, low, high = self.nodes[node]
+            if high != FALSE:
+                high_cube = dict(cube)
+                high_cube[var] = True
+                stack.append((high, high_cube))
+            if low != FALSE:
+                low_cube = cube
+                low_cube[var] = False
+                stack.append((low, low_cube))
+
+    def _cofactors(self, node, var):
+        """Returns (low, high) of node with respect to var"""
+        node_var, low, high = self.nodes[node]
+        if node_var != var:
+            return (node, node)
+        return (low, high)
+
+    def _get_var(self, node):
+        """Returns the variable of a node, or the number of variables for terminals"""
+        if node <= TRUE:
+            return len(self.var_names)
+        return self.nodes[node][0]
+
+    def _mk(self, var, low, high):
+        """Returns the unique node for (var, low, high)"""
+        if low == high:
+            return low
+        key = (var, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            if var >= len(self.var_names):
+                Log.E("Internal error: BDD variable {} out of range".format(var))
+            node = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = node
+        return node
+
+new = Bdd
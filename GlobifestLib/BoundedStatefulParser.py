@@ -31,6 +31,8 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import re
+
 from GlobifestLib import StatefulParser, Util
 
 BOUNDED_STATE = Util.create_enum(
@@ -58,15 +60,17 @@ class BoundedStatefulParser(StatefulParser.Base):
         self.string_is_bound = lbound in string_delims
         self.string_delims = string_delims
         self.string_escape = string_escape
+        self.bounds = self.lbound + self.rbound
+        interesting = sorted(set(self.bounds + string_delims))
+        self.scan_re = re.compile("|".join(re.escape(c) for c in interesting))
 
         # Set state parameters
         self.set_state(BOUNDED_STATE.LBOUND)
         self.stack_level = 0
         self.string_char = None
-        self.new_state = self.get_state()
 
-        self.debug("L=\"{}\" R=\"{}\"".format(self.lbound, self.rbound))
-        self.debug("STRD={} STRE={}".format(self.string_delims, self.string_escape))
+        self.debug("L=\"{}\" R=\"{}\"", self.lbound, self.rbound)
+        self.debug("STRD={} STRE={}", self.string_delims, self.string_escape)
 
         if text:
             self.parse()
@@ -85,149 +89,132 @@ class BoundedStatefulParser(StatefulParser.Base):
             # Stop if done
             self._complete_parse()
             return
-        if self.text == "":
+        if self.pos >= len(self.text):
             # Nothing to parse
             return
 
-        # TODO: Optimize loop to find in one pass?
-        lpos = self.text.find(self.lbound)
-        rpos = self.text.find(self.rbound)
-        if self.string_char is None:
-            # If no string is started, look for the earliest delimeter
-            strd_pos = -1
-            for delim in self.string_delims:
-                dpos = self.text.find(delim)
-                if strd_pos == -1:
-                    strd_pos = dpos
-                elif (dpos >= 0) and (dpos < strd_pos):
-                    strd_pos = dpos
-        else:
-            # Use the previous delimeter if a string is started
-            strd_pos = self.text.find(self.string_char)
-        stre_pos = self.text.find(self.string_escape)
-        self.debug("lpos={} rpos={} sdpos={} sepos={}".format(lpos, rpos, strd_pos, stre_pos))
-
         # Check string logic first, since it overrides boundary logic
         if self.string_char is not None:
             # String has been started; end string before returning to boundary logic
-            if strd_pos >= 0:
-                # String delimiter is found
-                self.debug("Append string")
-                if (stre_pos >= 0) and ((stre_pos + 1) == strd_pos):
-                    # Escaped delimiter, skip
-                    self._append_parsed_text(self.text[:strd_pos + 1])
-                    self.text = self.text[strd_pos + 1:]
-                    return
-                else:
-                    self.debug("End string")
-                    self.string_char = None
-                    if not self.string_is_bound:
-                        # If the string is not the boundary, consider it parsed here
-                        self._append_parsed_text(self.text[:strd_pos + 1])
-                        self.text = self.text[strd_pos + 1:]
-                        return
-            else:
+            strd_pos = self._find_string_end()
+            self.debug("sdpos={}", strd_pos)
+            if strd_pos < 0:
                 # No need to check string_is_bound, since no boundary to process either way.
                 self.debug("Append whole string")
-                self._append_parsed_text(self.text)
-                self.text = ""
+                self._advance(len(self.text))
                 return
 
-        elif strd_pos >= 0:
-            if (lpos >= 0) and (strd_pos > lpos):
-                # String begins after the left boundary
-                pass
-            elif (rpos >= 0) and (strd_pos > rpos):
-                # String begins after the right boundary
-                pass
-            else:
-                # Not in a string; but one is being started
-                self.string_char = self.text[strd_pos]
-                self.debug("Enter string: {}".format(self.string_char))
-                if not self.string_is_bound:
-                    # If the string is not the boundary, consider it parsed here
-                    self._append_parsed_text(self.text[:strd_pos + 1])
-                    self.text = self.text[strd_pos + 1:]
-                    return
+            self.debug("End string")
+            self.string_char = None
+            if (not self.string_is_bound) or (self.text[strd_pos] not in self.bounds):
+                # If the string is not the boundary, consider it parsed here
+                self._advance(strd_pos + 1)
+                return
 
-        # Check boundary logic
-        if (lpos < 0) and (rpos < 0):
-            # Neither boundary is present
-            if (self.parsed_text == "") and (self.get_state() == BOUNDED_STATE.LBOUND):
-                # A boundary should be the first thing we find
-                self.error("Unexpected text '{}'".format(self.text))
+            self._on_boundary(self.text[strd_pos], strd_pos)
             return
 
-        if self.get_state() == BOUNDED_STATE.LBOUND:
-            if (rpos >= 0) and (rpos < lpos):
-                # Exiting an inner level
-                self.pop_stack(rpos, self.rbound, True)
-                return
-            elif lpos >= 0:
-                # Entering new level, include boundary only for inner levels
-                self.push_stack(lpos, self.lbound)
-                self.set_state(BOUNDED_STATE.RBOUND)
-                return
-            else:
-                # Input prior to the boundary is illegal
-                self.error("Expected '{}'".format(self.lbound))
-        elif self.get_state() == BOUNDED_STATE.RBOUND:
-            if (lpos >= 0) and (lpos < rpos):
-                # Entering an inner level
-                self.push_stack(lpos, self.lbound)
-                return
-            elif rpos >= 0:
-                # Exiting level, include boundary only for inner levels
-                self.pop_stack(rpos, self.rbound, (self.stack_level > 1))
-                if self.stack_level == 0:
-                    self.set_state(BOUNDED_STATE.DONE)
+        # Find the earliest character of interest in a single scan
+        match = self.scan_re.search(self.text, self.pos)
+        if match is None:
+            self._on_no_boundary()
+            return
+
+        found_pos = match.start()
+        found = self.text[found_pos]
+        self.debug("pos={} found={}", found_pos, found)
+
+        if found in self.string_delims:
+            # Not in a string; but one is being started
+            self.string_char = found
+            self.debug("Enter string: {}", self.string_char)
+            if not self.string_is_bound:
+                # If the string is not the boundary, consider it parsed here
+                self._advance(found_pos + 1)
                 return
-        else:
-            # This should never happen
-            self.error("Unexpected state {}".format(self.get_state()))
+            if found not in self.bounds:
+                # Fall back to the first boundary after a foreign delimiter
+                found_pos = self.text.find(self.lbound, found_pos)
+                if found_pos < 0:
+                    self._on_no_boundary()
+                    return
+                found = self.lbound
+
+        self._on_boundary(found, found_pos)
 
     def pop_stack(self, boundary_pos, boundary, include_boundary):
         """Reduce the number of nesting levels by one by exiting a boundary"""
         if self.stack_level <= 0:
             self.error("Unexpected {}".format(boundary))
         else:
-            # Extract left side up to boundary into parsed_text
-            pos = boundary_pos
+            # Extract left side up to boundary into parsed text, and move the cursor past it
             if include_boundary:
-                pos += 1
-            if pos >= 0:
-                self._append_parsed_text(self.text[:pos])
+                self._advance(boundary_pos + 1)
             else:
-                self.error("Internal error: p={} b=\"{}\"".format(pos, boundary))
-
-            # Move start pointer up to just past boundary
-            self.text = self.text[boundary_pos + 1:]
+                self._advance(boundary_pos + 1, boundary_pos)
             self.stack_level -= 1
-        if self.stack_level == 0:
-            self.new_state = BOUNDED_STATE.DONE
-        self.debug("pop L={}".format(self.stack_level))
+        self.debug("pop L={}", self.stack_level)
 
     def push_stack(self, boundary_pos, boundary):
         """Increase the number of nesting levels by one by entering a boundary"""
         if self.stack_level == 0:
-            if boundary_pos == 0:
+            if boundary_pos == self.pos:
                 # Entering outer level, just cut off the boundary
-                self.text = self.text[boundary_pos + 1:]
+                self.pos = boundary_pos + 1
                 self.stack_level += 1
             else:
                 self.error("Unexpected text before {}".format(boundary))
-        elif (not self.is_multi_level()) or (self.stack_level <= 0):
+        elif not self.is_multi_level():
             self.error("Unexpected {}".format(boundary))
         else:
-            # Extract left side up to (and including) boundary into parsed_text
-            if boundary_pos >= 0:
-                self._append_parsed_text(self.text[:boundary_pos+1])
+            # Extract left side up to (and including) boundary into parsed text
+            self._advance(boundary_pos + 1)
+            self.stack_level += 1
+        self.debug("push L={}", self.stack_level)
+
+    def _find_string_end(self):
+        """Returns the position of the unescaped delimiter which ends the current string, or -1"""
+        pos = self.text.find(self.string_char, self.pos)
+        while (pos >= 0) and self.string_escape:
+            # A delimiter preceded by an odd number of escapes is part of the string
+            esc_count = 0
+            while ((pos - esc_count) > self.pos) and (self.text[pos - esc_count - 1] == self.string_escape):
+                esc_count += 1
+            if (esc_count % 2) == 0:
+                break
+            pos = self.text.find(self.string_char, pos + 1)
+        return pos
+
+    def _on_boundary(self, boundary, boundary_pos):
+        """Handle the first boundary found at boundary_pos"""
+        if self.get_state() == BOUNDED_STATE.LBOUND:
+            if boundary == self.lbound:
+                # Entering new level, include boundary only for inner levels
+                self.push_stack(boundary_pos, self.lbound)
+                self.set_state(BOUNDED_STATE.RBOUND)
+            elif self.text.find(self.lbound, boundary_pos) >= 0:
+                # Exiting an inner level
+                self.pop_stack(boundary_pos, self.rbound, True)
             else:
-                self.error("Internal error: p={} b=\"{}\"".format(boundary_pos, boundary))
+                # Input prior to the boundary is illegal
+                self.error("Expected '{}'".format(self.lbound))
+        elif self.get_state() == BOUNDED_STATE.RBOUND:
+            if boundary != self.rbound:
+                # Entering an inner level
+                self.push_stack(boundary_pos, self.lbound)
+            else:
+                # Exiting level, include boundary only for inner levels
+                self.pop_stack(boundary_pos, self.rbound, (self.stack_level > 1))
+                if self.stack_level == 0:
+                    self.set_state(BOUNDED_STATE.DONE)
+        else:
+            # This should never happen
+            self.error("Unexpected state {}".format(self.get_state()))
 
-            # Move start pointer up to just past boundary
-            self.text = self.text[boundary_pos+1:]
-            self.stack_level += 1
-        self.debug("push L={}".format(self.stack_level))
+    def _on_no_boundary(self):
+        """Handle remaining text which has no boundary"""
+        if (not self.parsed) and (self.get_state() == BOUNDED_STATE.LBOUND):
+            # A boundary should be the first thing we find
+            self.error("Unexpected text '{}'".format(self.get_remaining_text()))
 
 new = BoundedStatefulParser
@@ -31,6 +31,7 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import copy
 import os
 import re
 
@@ -39,57 +40,146 @@ from GlobifestLib import \
     ConfigParser, \
     DefTree, \
     DefinitionParser, \
+    FileCache, \
+    FormatterPool, \
     LineReader, \
     Log, \
     Manifest, \
     ManifestParser, \
     Matcher, \
+    OutputCache, \
     Project, \
     ProjectParser, \
+    Scheduler, \
     Settings, \
+    Snapshot, \
     Util
 
-def build_config(in_fname):
+# Build configuration setting, of the form layer=variant
+SETTING_RE = re.compile("([^=]+)=(.+)")
+
+# Number of external dependencies to set up at once
+DEPENDENCY_JOBS = 8
+
+# Parsed configs, definitions and projects shared by all builds in this process
+file_cache = FileCache.new()
+
+class DefinitionCache(object):
     """
-      Build a config
+        Definitions used during a single build, keyed by absolute path
+
+        An instance can be passed to build_manifest() as def_parser, so that each definition is
+        read once per build and shared read-only by all of the config blocks which use it.
+        Definitions are also taken from, and added to, the Snapshot if one is given.
     """
-    config = Config.new(in_fname)
-    parser = ConfigParser.new(config)
-    reader = LineReader.new(parser)
 
-    reader.read_file_by_name(in_fname)
-    return config
+    def __init__(self, cached=True, snapshot=None):
+        self.cached = cached
+        self.def_trees = dict()
+        self.outputs = dict()
+        self.forest_trees = set()
+        self.snapshot = snapshot
+
+    def __call__(self, in_fname):
+        """Return the DefTree for in_fname, building it on first use"""
+        key = os.path.normcase(os.path.normpath(in_fname))
+        def_tree = self.def_trees.get(key, None)
+        if def_tree is None:
+            def_tree = self._build_definition(in_fname)
+            self.def_trees[key] = def_tree
+        return def_tree
+
+    def add_output(self, gen_file, def_tree, generator):
+        """
+            Record a file generated from def_tree by the generator
+
+            Warn if the file is already generated from a different definition or by a
+            different kind of generator, since only the last output would be kept.
+        """
+        key = os.path.normcase(os.path.normpath(gen_file))
+        new_output = (def_tree.get_filename(), type(generator), generator.get_formatter())
+        old_output = self.outputs.setdefault(key, new_output)
+        if old_output != new_output:
+            Log.W("Conflicting outputs for {} from {} and {}".format(
+                gen_file,
+                old_output[0],
+                new_output[0]
+                ))
+
+    def add_to_forest(self, def_forest, def_tree):
+        """
+            Aggregate def_tree into def_forest, unless it was already added
+
+            Config blocks which use the same definition share its DefTree, so it is only walked
+            the first time.
+        """
+        key = os.path.normcase(os.path.normpath(def_tree.get_filename()))
+        if key not in self.forest_trees:
+            self.forest_trees.add(key)
+            def_forest.add_tree(def_tree)
+
+    def _build_definition(self, in_fname):
+        """Build a definition, using the snapshot if possible"""
+        if self.snapshot is None:
+            return build_definition(in_fname, cached=self.cached)
+
+        def_tree = self.snapshot.get_definition(in_fname)
+        if def_tree is None:
+            if self.cached:
+                def_tree = build_definition(in_fname)
+                files = file_cache.get_files("definition", in_fname)
+            else:
+                def_tree, files = _parse_definition(in_fname)
+                files = [in_fname] + files
+            if files is not None:
+                self.snapshot.add_definition(in_fname, def_tree, files)
+        return def_tree
 
-def build_definition(in_fname):
+def build_config(in_fname, cached=True):
     """
-      Build a definition
+      Build a config
+
+      @param cached Whether to return a shared, read-only config from the file cache
     """
-    def_tree = DefTree.new(in_fname)
-    parser = DefinitionParser.new(def_tree)
-    reader = LineReader.new(parser)
+    if cached:
+        return file_cache.get("config", in_fname, _parse_config)
+    return _parse_config(in_fname)[0]
 
-    reader.read_file_by_name(in_fname)
-    return def_tree
+def build_definition(in_fname, cached=True):
+    """
+      Build a definition
+
+      @param cached Whether to return a shared, read-only definition from the file cache
+    """
+    if cached:
+        return file_cache.get("definition", in_fname, _parse_definition)
+    return _parse_definition(in_fname)[0]
 
-def build_manifest(in_fname, settings, pkg_root, validate_files=True):
+def build_manifest(in_fname, settings, pkg_root, validate_files=True, def_parser=build_definition):
     """
       Build a manifest with the given settings
+
+      @param def_parser Function to build the definition of each config block
     """
     manifest = Manifest.new(in_fname, pkg_root)
     parser = ManifestParser.new(
         manifest,
         settings,
         validate_files=validate_files,
-        def_parser=build_definition
+        def_parser=def_parser
         )
     reader = LineReader.new(parser)
 
     reader.read_file_by_name(in_fname)
     return manifest
 
-def build_project(in_fname, out_dir, settings, callbacks=Util.Container()):
+def build_project(in_fname, out_dir, settings, callbacks=Util.Container(), jobs=1, formatter_workers=0):
     """
       Build a project with the given settings
+
+      @param jobs Number of generators to run at once
+      @param formatter_workers Number of worker processes for custom formatters; or 0 to run
+        them in this process
     """
     project, prj_dir, out_dir = read_project(in_fname, out_dir)
     Log.I("Project: {}".format(project.get_name()))
@@ -98,114 +188,116 @@ def build_project(in_fname, out_dir, settings, callbacks=Util.Container()):
 
     os.makedirs(out_dir, exist_ok=True)
 
-    # Check external project dependencies
-    for dep_name, dependency in project.get_dependencies():
-        Log.I("Checking dependency {}...".format(dep_name))
-        dep_out_dir = os.path.join(out_dir, dep_name)
-        os.makedirs(dep_out_dir, exist_ok=True)
-        dependency.setup(dep_out_dir)
-
-    # Set up build configuration
-    Log.I("Build configuration:")
-    setting_re = re.compile("([^=]+)=(.+)")
-    cfg_container = Util.Container() # Unordered, for tracking purposes
-    for cfg_entry in settings:
-        m = Matcher.new(cfg_entry)
-        if not m.is_fullmatch(setting_re):
-            Log.E("Malformed setting: {}".format(cfg_entry))
-        if cfg_container.get(m[1]):
-            Log.E("Conflicting/Duplicate setting: {}".format(cfg_entry))
-        Log.I("  {}: {}".format(m[1], m[2]))
-        variant = project.get_target(m[1], m[2])
-        # Update the filename with the absolute path
-        variant.filename = Util.get_abs_path(variant.filename, prj_dir)
-        cfg_container[m[1]] = variant
+    # External dependencies are set up in the background while the build is configured, and
+    # packages which do not come from a dependency are processed
+    dep_scheduler = start_dependencies(project, out_dir)
+    try:
+        # Reuse the definitions and configs which have not changed since the last build
+        snapshot_file = Snapshot.get_snapshot_file(out_dir)
+        snapshot = Snapshot.load(snapshot_file)
+
+        # Set up build configuration
+        layer_variants = get_layer_variants(project, prj_dir, settings)
+        effective_settings = build_layered_settings(project, layer_variants, snapshot)
+
+        # Generate a metadata object to communicate information back to the caller
+        metadata = Util.Container(
+            prj_dir=prj_dir,
+            out_dir=out_dir,
+            settings=effective_settings
+        )
 
-    # Validate that all layers are specified
-    for layer in project.get_layer_names():
-        variant = cfg_container.get(layer)
-        if variant is None:
-            variant_names = project.get_variant_names(layer)
-            if len(variant_names) == 1:
-                # None specified, but there is only one
-                variant = project.get_target(layer, variant_names[0])
-                Log.D("  **Default selected for layer {}**".format(layer))
-                Log.I("  {}: {}".format(layer, variant.name))
-                variant.filename = Util.get_abs_path(variant.filename, prj_dir)
-                cfg_container[layer] = variant
-            else:
-                Log.E("Must specify variant for layer {}".format(layer))
+        #### PREBUILD CALLBACK ####
+        if callbacks.get("prebuild"):
+            callbacks.prebuild(callbacks.get("arg"), metadata)
 
-    Log.I("Generating settings in layer order:")
-    effective_settings = Settings.new()
-    for layer in project.get_layer_names():
-        variant = cfg_container.get(layer)
-        Log.I("  {}: {}".format(layer, variant.filename))
-        layer_config = build_config(variant.filename)
-        effective_settings.extend(layer_config.get_settings())
-
-    # Generate a metadata object to communicate information back to the caller
-    metadata = Util.Container(
-        prj_dir=prj_dir,
-        out_dir=out_dir,
-        settings=effective_settings
-    )
-
-    #### PREBUILD CALLBACK ####
-    if callbacks.get("prebuild"):
-        callbacks.prebuild(callbacks.get("arg"), metadata)
-
-    # Prepare storage for package processing
-    for pub_key in ManifestParser.PUBLIC_LABELS:
-        metadata[pub_key] = []
-    all_manifests = []
-
-    Log.I("Processing packages...")
-    for pkg in project.get_packages():
-        pkg_file = get_pkg_file(project, pkg, prj_dir, out_dir)
-        if pkg_file is None:
-            Log.I("Unknown file root {}".format(str(pkg.file_root)))
-        pkg_root = get_pkg_root(project, pkg, pkg_file, out_dir)
-        if pkg_root is None:
-            Log.I("Unknown package root {}".format(str(pkg.file_root)))
-        Log.I("  {}".format(pkg_file))
-        manifest = build_manifest(pkg_file, effective_settings, pkg_root)
-        all_manifests.append(manifest)
-        pkg_dir = os.path.dirname(pkg_file)
-        manifest_out = manifest.get_output()
-        # Replace all file paths with absolute paths
-        for k in ManifestParser.FILE_LABELS:
-            manifest_out[k] = [Util.get_abs_path(x, pkg_dir) for x in manifest_out[k]]
-        # Aggregate all public labels
+        # Prepare storage for package processing
         for pub_key in ManifestParser.PUBLIC_LABELS:
-            metadata[pub_key] += manifest_out[pub_key]
-        # Dump all the files on extreme mode
-        if Log.Logger.has_level(Log.LEVEL.EXTREME):
-            for k, v in manifest_out:
-                Log.X("    {}:".format(k))
-                for f in v:
-                    Log.X("      {}".format(f))
-        for cfg in manifest.get_configs():
-            Log.I("    Post-processing {}".format(cfg.definition_abs))
-            defs = cfg.def_tree.get_relevant_params(effective_settings)
-            for gen in cfg.generators:
-                gen_file = Util.get_abs_path(gen.get_filename(), pkg_dir)
-                gen_file = os.path.relpath(gen_file, start=pkg_dir)
-                gen_file = os.path.normpath(gen_file)
-                gen_file = os.path.join(out_dir, gen_file)
-                # Update the filename in the generator
-                gen.filename = gen_file
-                Log.I("      Generating {}".format(gen_file))
-                if gen.get_formatter():
-                    formatter_filename = Util.get_abs_path(gen.get_formatter(), pkg_dir)
-                    Log.I("      Executing {}".format(formatter_filename))
-                #### GENERATOR CALLBACK ####
-                if callbacks.get("generator"):
-                    # Let the build script intercept the generator without any filesystem changes
-                    callbacks.generator(callbacks.get("arg", None), metadata, defs, gen)
-                else:
-                    os.makedirs(os.path.dirname(gen_file), exist_ok=True)
-                    gen.generate(defs, out_dir)
+            metadata[pub_key] = []
+        all_manifests = []
+        # Aggregate all definitions to detect duplicate parameters between them
+        def_forest = DefTree.DefForest()
+        def_cache = DefinitionCache(snapshot=snapshot)
+        # Generated files are only tracked when they are generated here
+        output_cache = None
+        if not callbacks.get("generator"):
+            output_cache = OutputCache.new(out_dir)
+        scheduler = Scheduler.new(jobs)
+
+        Log.I("Processing packages...")
+        for pkg in project.get_packages():
+            pkg_file = get_pkg_file(project, pkg, prj_dir, out_dir)
+            if pkg_file is None:
+                Log.I("Unknown file root {}".format(str(pkg.file_root)))
+            pkg_root = get_pkg_root(project, pkg, pkg_file, out_dir)
+            if pkg_root is None:
+                Log.I("Unknown package root {}".format(str(pkg.file_root)))
+            if project.ROOT.DEPENDENCY in [pkg.file_root, pkg.module_root]:
+                # Wait for the dependency which provides the package
+                dep_scheduler.wait(pkg.module_id)
+            Log.I("  {}".format(pkg_file))
+            manifest = build_manifest(pkg_file, effective_settings, pkg_root, def_parser=def_cache)
+            all_manifests.append(manifest)
+            pkg_dir = os.path.dirname(pkg_file)
+            manifest_out = manifest.get_output()
+            # Replace all file paths with absolute paths
+            for k in ManifestParser.FILE_LABELS:
+                manifest_out[k] = [Util.get_abs_path(x, pkg_dir) for x in manifest_out[k]]
+            # Aggregate all public labels
+            for pub_key in ManifestParser.PUBLIC_LABELS:
+                metadata[pub_key] += manifest_out[pub_key]
+            # Dump all the files on extreme mode
+            if Log.Logger.has_level(Log.LEVEL.EXTREME):
+                for k, v in manifest_out:
+                    Log.X("    {}:".format(k))
+                    for f in v:
+                        Log.X("      {}".format(f))
+            for cfg in manifest.get_configs():
+                Log.I("    Post-processing {}".format(cfg.definition_abs))
+                def_cache.add_to_forest(def_forest, cfg.def_tree)
+                for gen in cfg.generators:
+                    defs = gen.get_definitions(cfg.def_tree, effective_settings)
+                    gen_file = Util.get_abs_path(gen.get_filename(), pkg_dir)
+                    gen_file = os.path.relpath(gen_file, start=pkg_dir)
+                    gen_file = os.path.normpath(gen_file)
+                    gen_file = os.path.join(out_dir, gen_file)
+                    # Update the filename in the generator
+                    gen.filename = gen_file
+                    def_cache.add_output(gen_file, cfg.def_tree, gen)
+                    Log.I("      Generating {}".format(gen_file))
+                    #### GENERATOR CALLBACK ####
+                    if callbacks.get("generator"):
+                        if gen.get_formatter():
+                            Log.I("      Executing {}".format(gen.get_formatter()))
+                        # Let the build script intercept the generator without any filesystem changes
+                        callbacks.generator(callbacks.get("arg", None), metadata, defs, gen)
+                    else:
+                        gen_key = gen.get_key(defs, out_dir)
+                        if output_cache.is_current(gen.get_output_file(), gen_key):
+                            Log.I("      Up to date")
+                        else:
+                            scheduler.add_job(pkg_file, gen, defs, out_dir)
+                        output_cache.add_output(gen.get_output_file(), gen_key)
+        dep_scheduler.wait_all()
+    finally:
+        dep_scheduler.shutdown()
+
+    # Run the generators once all packages are processed
+    if scheduler.get_jobs() and (formatter_workers > 0):
+        scheduler.formatter_pool = FormatterPool.new(formatter_workers)
+    try:
+        scheduler.run()
+    finally:
+        if scheduler.formatter_pool:
+            scheduler.formatter_pool.shutdown()
+
+    if snapshot.is_modified():
+        Snapshot.save(snapshot, snapshot_file)
+
+    if output_cache:
+        for stale_file in output_cache.remove_stale():
+            Log.I("Removed stale output {}".format(stale_file))
+        output_cache.save()
 
     #### POSTPROCESS CALLBACK ####
     if callbacks.get("postprocess"):
@@ -230,6 +322,71 @@ def build_project(in_fname, out_dir, settings, callbacks=Util.Container()):
     if callbacks.get("postbuild"):
         callbacks.postbuild(callbacks.get("arg", None), metadata)
 
+def build_layered_settings(project, layer_variants, snapshot=None):
+    """
+        Build the effective settings of a project
+
+        @param project A Project object
+        @param layer_variants The variant for each layer, as from get_layer_variants()
+        @param snapshot Snapshot to take configs from, and add configs to
+        @return LayeredSettings object with each layer's config
+    """
+    Log.I("Generating settings in layer order:")
+    effective_settings = Settings.LayeredSettings()
+    for layer, variant in zip(project.get_layer_names(), layer_variants):
+        Log.I("  {}: {}".format(layer, variant.filename))
+        layer_config = None
+        if snapshot is not None:
+            layer_config = snapshot.get_config(variant.filename)
+        if layer_config is None:
+            layer_config = build_config(variant.filename)
+            if snapshot is not None:
+                snapshot.add_config(variant.filename, layer_config)
+        effective_settings.add_layer(layer_config.get_settings())
+
+    return effective_settings
+
+def get_layer_variants(project, prj_dir, settings):
+    """
+        Get the variant to use for each layer of a project
+
+        @param project A Project object
+        @param prj_dir The top-level project directory
+        @param settings List of layer=variant strings
+        @return list of variants, in layer order, with absolute filenames
+    """
+    Log.I("Build configuration:")
+    cfg_container = Util.Container() # Unordered, for tracking purposes
+    for cfg_entry in settings:
+        m = Matcher.new(cfg_entry)
+        if not m.is_fullmatch(SETTING_RE):
+            Log.E("Malformed setting: {}".format(cfg_entry))
+        if cfg_container.get(m[1]):
+            Log.E("Conflicting/Duplicate setting: {}".format(cfg_entry))
+        Log.I("  {}: {}".format(m[1], m[2]))
+        # Update the filename of a copy with the absolute path, since the project may be shared
+        variant = copy.copy(project.get_target(m[1], m[2]))
+        variant.filename = Util.get_abs_path(variant.filename, prj_dir)
+        cfg_container[m[1]] = variant
+
+    # Validate that all layers are specified
+    layer_variants = []
+    for layer in project.get_layer_names():
+        variant = cfg_container.get(layer)
+        if variant is None:
+            variant_names = project.get_variant_names(layer)
+            if len(variant_names) == 1:
+                # None specified, but there is only one
+                variant = copy.copy(project.get_target(layer, variant_names[0]))
+                Log.D("  **Default selected for layer {}**".format(layer))
+                Log.I("  {}: {}".format(layer, variant.name))
+                variant.filename = Util.get_abs_path(variant.filename, prj_dir)
+            else:
+                Log.E("Must specify variant for layer {}".format(layer))
+        layer_variants.append(variant)
+
+    return layer_variants
+
 def get_pkg_file(project, pkg, prj_dir, out_dir):
     """
         Get package file
@@ -275,20 +432,74 @@ def get_pkg_root(project, pkg, pkg_file, out_dir):
         pkg_root = None
     return pkg_root
 
-def read_project(in_fname, out_dir):
+def read_project(in_fname, out_dir, cached=True):
     """
         Read project
 
+        @param cached Whether to return a shared, read-only project from the file cache
         @return Tuple containing (Project object with parsed result,
             Project directory, output directory)
     """
-    project = Project.new(in_fname, err_fatal=True)
-    parser = ProjectParser.new(project)
-    reader = LineReader.new(parser)
-
-    reader.read_file_by_name(in_fname)
+    if cached:
+        project = file_cache.get("project", in_fname, _parse_project)
+    else:
+        project = _parse_project(in_fname)[0]
     cwd = os.getcwd()
     prj_dir = Util.get_abs_path(os.path.dirname(project.get_filename()), cwd)
     out_dir = Util.get_abs_path(out_dir, cwd)
 
     return (project, prj_dir, out_dir)
+
+def setup_dependencies(project, out_dir):
+    """
+        Set up the external dependencies of a project
+
+        @param project A Project object
+        @param out_dir The top-level output directory
+    """
+    dep_scheduler = start_dependencies(project, out_dir)
+    try:
+        dep_scheduler.wait_all()
+    finally:
+        dep_scheduler.shutdown()
+
+def start_dependencies(project, out_dir):
+    """
+        Start setting up the external dependencies of a project, in the background
+
+        @param project A Project object
+        @param out_dir The top-level output directory
+        @return a Scheduler.DependencyScheduler to wait for the dependencies
+    """
+    dep_scheduler = Scheduler.DependencyScheduler(DEPENDENCY_JOBS)
+    for dep_name, dependency in project.get_dependencies():
+        dep_scheduler.add_dependency(dependency, os.path.join(out_dir, dep_name))
+    dep_scheduler.start()
+    return dep_scheduler
+
+def _parse_config(in_fname):
+    """Parse a config, returning a tuple of (Config, included files)"""
+    config = Config.new(in_fname)
+    parser = ConfigParser.new(config)
+    reader = LineReader.new(parser)
+
+    reader.read_file_by_name(in_fname)
+    return (config, [])
+
+def _parse_definition(in_fname):
+    """Parse a definition, returning a tuple of (DefTree, included files)"""
+    def_tree = DefTree.new(in_fname)
+    parser = DefinitionParser.new(def_tree)
+    reader = LineReader.new(parser)
+
+    reader.read_file_by_name(in_fname)
+    return (def_tree, parser.get_included_files())
+
+def _parse_project(in_fname):
+    """Parse a project, returning a tuple of (Project, included files)"""
+    project = Project.new(in_fname, err_fatal=True)
+    parser = ProjectParser.new(project)
+    reader = LineReader.new(parser)
+
+    reader.read_file_by_name(in_fname)
+    return (project, parser.get_included_files())
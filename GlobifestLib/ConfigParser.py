@@ -39,6 +39,13 @@ from GlobifestLib import \
 
 IDENTIFIER_NAME = "[a-zA-Z0-9_]+"
 
+# Line regexes, in order of matching
+COMMENT_RE = re.compile("[;#][ \t]*(.*)")
+SETTING_RE = re.compile("(" + IDENTIFIER_NAME + ")[ \t]*=[ \t]*(.+)")
+
+# Regexes used in formatting of comments
+BULLETED_LIST_RE = re.compile("[*\\-+#][ \t](.+)")
+
 class ConfigParser(Log.Debuggable):
     """
         Encapsulates logic to parse a configuration file
@@ -51,20 +58,6 @@ class ConfigParser(Log.Debuggable):
         self.line_info = None
         self.comment_block = []
 
-        regex_flags = 0
-        if Log.Logger.has_level(Log.LEVEL.EXTREME):
-            regex_flags = re.DEBUG
-
-        # line regexes, in order of matching
-        with Log.CaptureStdout(self, "COMMENT_RE:"):
-            self.comment_re = re.compile("[;#][ \t]*(.*)", regex_flags)
-        with Log.CaptureStdout(self, "SETTING_RE:"):
-            self.setting_re = re.compile("(" + IDENTIFIER_NAME + ")[ \t]*=[ \t]*(.+)", regex_flags)
-
-        # Regexes used in formatting of comments
-        with Log.CaptureStdout(self, "BULLETED_LIST:"):
-            self.bulleted_list_re = re.compile("[*\\-+#][ \t](.+)", regex_flags)
-
     def format_comments(self):
         """Format the comment block into something pretty"""
         ret = ""
@@ -77,7 +70,7 @@ class ConfigParser(Log.Debuggable):
             if not ret:
                 verb = "first"
                 sep = "" # First line, no separator
-            elif m_last.is_fullmatch(self.bulleted_list_re):
+            elif m_last.is_fullmatch(BULLETED_LIST_RE):
                 verb = "list"
                 sep = "\n" # new line in between list items
             elif (not last) != (not s):
@@ -90,7 +83,7 @@ class ConfigParser(Log.Debuggable):
                 # Concatenate paragraph text
                 verb = "concatenate"
                 sep = " "
-            self.debug("  {} '{}'".format(verb, s))
+            self.debug("  {} '{}'", verb, s)
             last = s
             ret += sep + s
 
@@ -114,7 +107,7 @@ class ConfigParser(Log.Debuggable):
         """
         self.line_info = line_info
         line = line_info.get_text()
-        self.debug("PARSE: {}".format(line))
+        self.debug("PARSE: {}", line)
 
         m = Matcher.new(line)
         if (not line) or (line == ""):
@@ -122,13 +115,13 @@ class ConfigParser(Log.Debuggable):
             if self.comment_block:
                 self.debug("COMMENT_CLEAR")
                 self.comment_block.clear()
-        elif m.is_fullmatch(self.comment_re):
+        elif m.is_fullmatch(COMMENT_RE):
             content = m[1].rstrip()
             # Concatenate contiguous comments into a list
             self.comment_block.append(content)
-            self.debug("COMMENT += '{}'".format(content))
-        elif m.is_fullmatch(self.setting_re):
-            self.debug("ADD {} = {}".format(m[1], m[2]))
+            self.debug("COMMENT += '{}'", content)
+        elif m.is_fullmatch(SETTING_RE):
+            self.debug("ADD {} = {}", m[1], m[2])
             self.config.add_value(line_info, m[1], m[2].rstrip())
             if self.comment_block:
                 self.config.set_comment(line_info, m[1], self.format_comments())
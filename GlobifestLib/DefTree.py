@@ -31,7 +31,7 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-import re
+import weakref
 
 from GlobifestLib import Log, Util
 
@@ -43,7 +43,12 @@ PARAM_TYPE = Util.create_enum(
     "ENUM"
     )
 
-SCOPE_TRIM_RE = re.compile("^/|/$")
+NODE_TYPE = Util.create_enum(
+    "DEF_BEGIN",
+    "SCOPE_BEGIN",
+    "PARAM",
+    "SCOPE_END"
+    )
 
 
 def no_sort(items):
@@ -51,6 +56,19 @@ def no_sort(items):
     return items
 
 
+def visit_node(observer, node):
+    """Dispatch a (NODE_TYPE, object) pair from iter_nodes() to the observer"""
+    node_type, obj = node
+    if node_type == NODE_TYPE.PARAM:
+        observer.on_param(obj)
+    elif node_type == NODE_TYPE.SCOPE_BEGIN:
+        observer.on_scope_begin(obj.scope_name, obj.description)
+    elif node_type == NODE_TYPE.SCOPE_END:
+        observer.on_scope_end()
+    elif node_type == NODE_TYPE.DEF_BEGIN:
+        observer.on_def_begin(obj.filename)
+
+
 def validate_type(ptype):
     """Returns the ptype validated as a PARAM_TYPE value, or None if invalid"""
     if not isinstance(ptype, str):
@@ -93,6 +111,30 @@ def validate_value(ptype, value):
     return ret
 
 
+class EnumChoice(Util.Record):
+    """One choice of an ENUM parameter; text is the quoted display text"""
+
+    __slots__ = ("id", "text")
+
+
+class EnumMetadata(Util.Record):
+    """Metadata of an ENUM parameter: the ID of its count identifier, and a list of EnumChoice"""
+
+    __slots__ = ("count", "vlist")
+
+
+class ForestEntry(Util.Record):
+    """A parameter in a DefForest, along with the definition file where it is defined"""
+
+    __slots__ = ("def_file", "param")
+
+
+class ParamValue(Util.Record):
+    """A parameter along with its value in the effective settings"""
+
+    __slots__ = ("param", "value")
+
+
 class Parameter(object):
     """
         Encapsulates a parameter definition
@@ -107,6 +149,8 @@ class Parameter(object):
         self.pdesc = pdesc
         self.pdefault = pdefault
         self.metadata = metadata
+        self.choice_index = None
+        self.implicit_values = None
 
         if (self.ptype == PARAM_TYPE.ENUM) and (not self.metadata):
             Log.E("ENUM must have metadata")
@@ -147,7 +191,18 @@ class Parameter(object):
         return self.pid
 
     def get_implicit_values(self):
-        """Gets values implicitly defined by the parameter"""
+        """
+            Gets values implicitly defined by the parameter
+
+            The list is generated on first use and shared by later calls, so it must not be
+            modified.
+        """
+        if self.implicit_values is None:
+            self.implicit_values = self._enumerate_implicit_values()
+        return self.implicit_values
+
+    def _enumerate_implicit_values(self):
+        """Returns a list of (identifier, value) tuples implicitly defined by the parameter"""
         out = []
         if self.ptype == PARAM_TYPE.ENUM:
             # Enumerate choices
@@ -165,13 +220,14 @@ class Parameter(object):
 
     def get_implicit_value_by_id(self, pid):
         """Returns an implicit value entry by identifier"""
-        if self.ptype == PARAM_TYPE.ENUM:
-            for choice in self.metadata.vlist:
-                if choice.id == pid:
-                    return choice
+        if self.ptype != PARAM_TYPE.ENUM:
+            return None
 
-        return None
+        # Index the choices on first use
+        if self.choice_index is None:
+            self.choice_index = dict((choice.id, choice) for choice in self.metadata.vlist)
 
+        return self.choice_index.get(pid, None)
 
     def get_title(self):
         """Returns the title of the parameter"""
@@ -208,6 +264,36 @@ class BaseObserver(object):
         """Handle the end of a scope"""
         pass
 
+class MultiObserver(BaseObserver):
+    """This class can be used to share one walk() between several observers"""
+
+    def __init__(self, *observers):
+        self.observers = list(observers)
+
+    def add_observer(self, observer):
+        """Add an observer to receive events"""
+        self.observers.append(observer)
+
+    def on_def_begin(self, filename):
+        """Handler for the beginning of a DefTree"""
+        for observer in self.observers:
+            observer.on_def_begin(filename)
+
+    def on_param(self, param):
+        """Handle a parameter"""
+        for observer in self.observers:
+            observer.on_param(param)
+
+    def on_scope_begin(self, title, description):
+        """Handle the beginning of a scope"""
+        for observer in self.observers:
+            observer.on_scope_begin(title, description)
+
+    def on_scope_end(self):
+        """Handle the end of a scope"""
+        for observer in self.observers:
+            observer.on_scope_end()
+
 class ImplicitValuesObserver(BaseObserver):
     """This class can be used to get implicit settings from the tree"""
 
@@ -272,7 +358,7 @@ class RelevantParamMatcher(BaseObserver):
             value = self.settings.get_value(param.get_identifier())
         except KeyError:
             Log.E("Undefined value {}".format(param))
-        self.out.append(Util.Container(
+        self.out.append(ParamValue(
             param=param,
             value=value
             ))
@@ -301,6 +387,21 @@ class Scope(object):
         self.parent = parent_scope
         self.scope_name = scope_name
 
+        # Parameters and scopes of the whole tree are indexed in the root scope
+        if parent_scope is None:
+            self.path = ""
+            self.root = self
+            self.param_index = dict()
+            self.scope_index = {"": self}
+            self.version = 0
+        else:
+            if parent_scope.path:
+                self.path = parent_scope.path + "/" + scope_name
+            else:
+                self.path = scope_name
+            self.root = parent_scope.root
+            self.root.scope_index[self.path] = self
+
     def add_child_scope(self, scope_name):
         """
             Add a child scope with scope_name, if it does not already exist
@@ -321,7 +422,9 @@ class Scope(object):
 
             Return a reference to the Parameter (for call chaining)
         """
+        self.root.index_param(new_param)
         self.params.append(new_param)
+        self.root.version += 1
         return new_param
 
     def get_children(self):
@@ -336,10 +439,65 @@ class Scope(object):
         """Returns the name of the scope"""
         return self.scope_name
 
+    def get_path(self):
+        """Returns the path of the scope from the root, without leading or trailing slashes"""
+        return self.path
+
+    def get_param(self, pid):
+        """Return the parameter with identifier pid anywhere in the tree, or None if not found"""
+        return self.root.param_index.get(pid, None)
+
+    def get_param_ids(self):
+        """Return an iterable of the identifiers of all parameters in the tree"""
+        return self.root.param_index.keys()
+
+    def get_scope(self, scope_path):
+        """
+            Get a scope by path, relative to this scope
+
+            Path nodes are created if they do not exist.  Scopes are looked up in the index of
+            the tree, so only missing nodes are visited.
+
+            Returns the scope pertaining to scope_path
+        """
+        # Strip out leading and trailing slashes, as they are optional
+        if scope_path.startswith("/"):
+            scope_path = scope_path[1:]
+        if scope_path.endswith("/"):
+            scope_path = scope_path[:-1]
+        if self.path and scope_path:
+            scope_path = self.path + "/" + scope_path
+        elif self.path:
+            scope_path = self.path
+
+        scope = self.root.scope_index.get(scope_path, None)
+        if scope is None:
+            # Create all missing nodes along the path
+            scope = self.root
+            for node_name in scope_path.split("/"):
+                scope = scope.add_child_scope(node_name)
+        return scope
+
+    def get_version(self):
+        """Return a number which changes whenever a parameter is added to the tree"""
+        return self.root.version
+
     def get_params(self):
         """Return a list of parameters in this Scope"""
         return self.params
 
+    def index_param(self, param):
+        """
+            Add a parameter to the index of this (root) Scope
+
+            A parameter may be added to more than one scope, but a different parameter with the
+            same identifier is an error.
+        """
+        pid = param.get_identifier()
+        old_param = self.param_index.setdefault(pid, param)
+        if old_param is not param:
+            Log.E("Duplicate parameter {}".format(pid))
+
     def set_description(self, text):
         """Set or append to the description for this Scope"""
         if self.description is None:
@@ -347,17 +505,40 @@ class Scope(object):
         else:
             self.description += "\n\n" + text
 
-    def walk(self, observer, child_sorter=no_sort, param_sorter=no_sort):
+    def iter_nodes(self, child_sorter=no_sort, param_sorter=no_sort):
         # pylint: disable=W0612
-        """Walk the tree and visit each node with the given observer"""
-        observer.on_scope_begin(self.scope_name, self.description)
-        for name, obj in child_sorter(self.children):
-            obj.walk(observer, child_sorter=child_sorter, param_sorter=param_sorter)
+        """
+            Generate (NODE_TYPE, object) pairs for each node of the tree
 
-        for p in param_sorter(self.params):
-            observer.on_param(p)
+            Each scope generates SCOPE_BEGIN, the nodes of its child scopes, PARAM for each of
+            its parameters, then SCOPE_END.  An explicit stack is used instead of recursion, so
+            the depth of the tree is not limited, and the generator may be stopped at any time.
+        """
+        stack = [(NODE_TYPE.SCOPE_BEGIN, self)]
+        while stack:
+            node = stack.pop()
+            yield node
+            node_type, scope = node
+            if node_type != NODE_TYPE.SCOPE_BEGIN:
+                continue
+
+            # Push in reverse, so that nodes are popped in order
+            stack.append((NODE_TYPE.SCOPE_END, scope))
+            for p in reversed(list(param_sorter(scope.params))):
+                stack.append((NODE_TYPE.PARAM, p))
+            for name, obj in reversed(list(child_sorter(scope.children))):
+                stack.append((NODE_TYPE.SCOPE_BEGIN, obj))
+
+    def iter_params(self, child_sorter=no_sort, param_sorter=no_sort):
+        """Generate each parameter of the tree, in the same order as iter_nodes()"""
+        for node_type, obj in self.iter_nodes(child_sorter=child_sorter, param_sorter=param_sorter):
+            if node_type == NODE_TYPE.PARAM:
+                yield obj
 
-        observer.on_scope_end()
+    def walk(self, observer, child_sorter=no_sort, param_sorter=no_sort):
+        """Walk the tree and visit each node with the given observer"""
+        for node in self.iter_nodes(child_sorter=child_sorter, param_sorter=param_sorter):
+            visit_node(observer, node)
 
 class DefTree(Scope):
     """Encapsulates a nested tree of Parameters"""
@@ -366,6 +547,23 @@ class DefTree(Scope):
         Scope.__init__(self, scope_name="/", parent_scope=None)
         self.filename = filename
 
+        # Cached results, which are valid until the tree (or settings) version changes
+        self.implicit_values = None
+        self.implicit_values_version = None
+        self.relevant_params = weakref.WeakKeyDictionary()
+
+    def __getstate__(self):
+        # Cached results are not pickled
+        state = self.__dict__.copy()
+        state["implicit_values"] = None
+        state["implicit_values_version"] = None
+        del state["relevant_params"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.relevant_params = weakref.WeakKeyDictionary()
+
     def get_filename(self):
         """Returns the filename of the definition"""
         return self.filename
@@ -374,46 +572,39 @@ class DefTree(Scope):
         """
             Returns values which implicitly defined by parameters in this tree.
 
-            The output is a container of identifier/value pairs
+            The output is a container of identifier/value pairs, which is shared between calls
+            until the tree changes; so it must not be modified.
         """
-        observer = ImplicitValuesObserver()
-        self.walk(observer)
-        return observer.get_values()
+        if self.implicit_values_version != self.version:
+            out = Util.Container()
+            for param in self.iter_params():
+                out.update(param.get_implicit_values())
+            self.implicit_values = out
+            self.implicit_values_version = self.version
+        return self.implicit_values
 
     def get_relevant_params(self, settings):
         """
             Returns the definitions in this tree which are applicable to settings
 
-            The output is a container with param=Parameter and value=<from settings>
+            The output is a list of ParamValue, which is shared between calls until the tree
+            or settings change; so it must not be modified.
         """
+        version = (self.version, settings.get_version())
+        cached = self.relevant_params.get(settings, None)
+        if cached and (cached[0] == version):
+            return cached[1]
+
         observer = RelevantParamMatcher(settings)
-        self.walk(observer)
+        for param in self.iter_params():
+            observer.on_param(param)
+        self.relevant_params[settings] = (version, observer.get_params())
         return observer.get_params()
 
-    def get_scope(self, scope_path):
-        """
-            Get the scope by path
-
-            Path nodes are created if they do not exist.
-
-            Returns the scope pertaining to scope_path, or None on invalid path or error.
-        """
-        # Strip out leading and trailing slashes, as they are optional
-        path = SCOPE_TRIM_RE.sub("", scope_path)
-        if path:
-            nodes = path.split("/")
-        else:
-            nodes = []
-
-        scope = self
-        for node_name in nodes:
-            scope = scope.add_child_scope(node_name)
-        return scope
-
-    def walk(self, observer, child_sorter=no_sort, param_sorter=no_sort):
-        """Walk the tree and visit each node with the given observer"""
-        observer.on_def_begin(self.filename)
-        Scope.walk(self, observer, child_sorter=child_sorter, param_sorter=param_sorter)
+    def iter_nodes(self, child_sorter=no_sort, param_sorter=no_sort):
+        """Generate DEF_BEGIN for the tree, followed by the nodes of the top-level Scope"""
+        yield (NODE_TYPE.DEF_BEGIN, self)
+        yield from Scope.iter_nodes(self, child_sorter=child_sorter, param_sorter=param_sorter)
 
 class DefForest(Scope):
     """
@@ -436,9 +627,29 @@ class DefForest(Scope):
         """Save the filename associated with the DefTree"""
         self.cur_filename = filename
 
+    def add_tree(self, tree):
+        """Aggregate the parameters of tree into the forest"""
+        tree.walk(self)
+
+    def index_param(self, entry):
+        """
+            Add a ForestEntry to the index of the forest
+
+            The same definition file may be aggregated more than once, but a parameter with the
+            same identifier in a different definition file is an error.
+        """
+        pid = entry.param.get_identifier()
+        old_entry = self.param_index.setdefault(pid, entry)
+        if old_entry.def_file != entry.def_file:
+            Log.E("Duplicate parameter {} in {} and {}".format(
+                pid,
+                old_entry.def_file,
+                entry.def_file
+                ))
+
     def on_param(self, param):
         """Save all the relevant information about a parameter"""
-        self.scope_stack[-1].add_param(Util.Container(
+        self.scope_stack[-1].add_param(ForestEntry(
             def_file=self.cur_filename,
             param=param
             ))
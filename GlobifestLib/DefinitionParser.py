@@ -42,6 +42,21 @@ from GlobifestLib import \
     Util
 
 # Map of DefTree element strings to Context.ctx member names in no particular order
+IDENTIFIER_NAME = "[a-zA-Z0-9_]*"
+
+# Line regexes, in order of matching
+COMMENT_RE = re.compile("[;#].*")
+DIRECTIVE_RE = re.compile(":.*")
+
+# Directive regexes (preceding colon and whitespace stripped off), in order of matching
+BLOCK_END_RE = re.compile("end$")
+CONFIG_RE = re.compile("config(_[bsif])?[ \t]+(" + IDENTIFIER_NAME + ")$")
+MENU_RE = re.compile("menu[ \t]+([a-zA-Z 0-9_-]{1,20})$")
+INCLUDE_RE = re.compile("include[ ]+(.*)")
+
+# Block entry regexes, in order of matching
+PARAM_RE = re.compile("(" + IDENTIFIER_NAME + ")[ \t]+(.+)")
+
 CONFIG_ELEMENTS = Util.Container(
     default="default",
     description="desc",
@@ -55,6 +70,32 @@ MENU_ELEMENTS = Util.Container(
     description="mdesc"
     )
 
+class TopCtx(Util.Record):
+    """Context values for the top (file-scope) nesting level"""
+
+    __slots__ = ("ctype",)
+
+class ConfigCtx(Util.Record):
+    """Context values for a config block"""
+
+    __slots__ = (
+        "ctype",
+        "id",
+        "title",
+        "scope_path",
+        "desc",
+        "ptype",
+        "default",
+        "cnt_id",
+        "vlist",
+        "metadata"
+        )
+
+class MenuCtx(Util.Record):
+    """Context values for a menu block"""
+
+    __slots__ = ("ctype", "mdesc")
+
 class Context(object):
     """
         Encapsulates contextual information for a nesting level
@@ -82,9 +123,10 @@ class Context(object):
 
         # Link to the previous context
         self.prev_context = prev_context
+        self.full_scope_path = None
 
         # Set up context-specific values
-        self.ctx = ctx or Util.Container(ctype=None)
+        self.ctx = ctx or TopCtx(ctype=None)
         assert hasattr(self.ctx, "ctype")
 
     def get_ctype(self):
@@ -92,17 +134,20 @@ class Context(object):
         return self.ctx.ctype
 
     def get_scope_path(self):
-        """Return the path of this scope"""
-        if self.scope_path is None:
-            # No scope specified, use parent path
-            return self.prev_context.get_scope_path()
-
-        if self.scope_path[0] == "/":
-            # Absolute path
-            return self.scope_path
+        """Return the path of this scope, which is fixed once the scope_path is set"""
+        if self.full_scope_path is None:
+            if self.scope_path is None:
+                # No scope specified, use parent path
+                return self.prev_context.get_scope_path()
+
+            if self.scope_path[0] == "/":
+                # Absolute path
+                self.full_scope_path = self.scope_path
+            else:
+                # Relative path
+                self.full_scope_path = self.prev_context.get_scope_path() + self.scope_path + "/"
 
-        # Relative path
-        return self.prev_context.get_scope_path() + self.scope_path + "/"
+        return self.full_scope_path
 
     def is_complete(self):
         """Return whether context has all required information"""
@@ -151,7 +196,7 @@ class Context(object):
                 v_text = ventry[1]
             except IndexError:
                 v_text = "\"{}\"".format(v_id)
-            self.ctx.vlist.append(Util.Container(
+            self.ctx.vlist.append(DefTree.EnumChoice(
                 id=v_id,
                 text=v_text
                 ))
@@ -171,7 +216,7 @@ class Context(object):
                 # No additional validation required for other elements
                 self.ctx[CONFIG_ELEMENTS[name]] = value
         else:
-            self.def_parser.debug("not found: {}".format(name))
+            self.def_parser.debug("not found: {}", name)
 
     def process_param_menu(self, name, value):
         """Process a menu parameter"""
@@ -182,7 +227,7 @@ class Context(object):
             # No additional validation required for elements
             self.ctx[MENU_ELEMENTS[name]] = value
         else:
-            self.def_parser.debug("not found: {}".format(name))
+            self.def_parser.debug("not found: {}", name)
 
     def validate_config(self):
         """Validate the final state of a config context"""
@@ -204,7 +249,7 @@ class Context(object):
                 self.def_parser.log_error("Missing choices for enum {}".format(self.ctx.id))
             if not self.ctx.default:
                 self.ctx.default = self.ctx.vlist[0].id
-            self.ctx.metadata = Util.Container(
+            self.ctx.metadata = DefTree.EnumMetadata(
                 count=self.ctx.cnt_id,
                 vlist=self.ctx.vlist
                 )
@@ -220,42 +265,15 @@ class DefinitionParser(Log.Debuggable):
         self.deftree = deftree
         self.line_info = None
         self.def_root = os.path.dirname(deftree.get_filename())
+        self.included_files = []
 
         # Always has a context
         top_context = Context(def_parser=self)
         self.context_stack = [top_context]
 
-        regex_flags = 0
-        if Log.Logger.has_level(Log.LEVEL.EXTREME):
-            regex_flags = re.DEBUG
-
-        identifier_name = "[a-zA-Z0-9_]*"
-
-        # line regexes, in order of matching
-        with Log.CaptureStdout(self, "COMMENT_RE:"):
-            self.comment_re = re.compile("[;#].*", regex_flags)
-        with Log.CaptureStdout(self, "DIRECTIVE_RE:"):
-            self.directive_re = re.compile(":.*", regex_flags)
-
-        # directive regexes (preceding colon and whitespace stripped off), in order of matching
-        with Log.CaptureStdout(self, "BLOCK_END_RE:"):
-            self.block_end_re = re.compile("end$", regex_flags)
-        with Log.CaptureStdout(self, "CONFIG_RE:"):
-            self.config_re = re.compile(
-                "config(_[bsif])?[ \t]+(" + identifier_name + ")$",
-                regex_flags
-                )
-        with Log.CaptureStdout(self, "MENU_RE:"):
-            self.menu_re = re.compile(
-                "menu[ \t]+([a-zA-Z 0-9_-]{1,20})$",
-                regex_flags
-                )
-        with Log.CaptureStdout(self, "INCLUDE_RE:"):
-            self.include_re = re.compile("include[ ]+(.*)", regex_flags)
-
-        # Block entry regexes, in order of matching
-        with Log.CaptureStdout(self, "BLOCK_PARAM_RE::"):
-            self.param_re = re.compile("(" + identifier_name + ")[ \t]+(.+)", regex_flags)
+    def get_included_files(self):
+        """Returns a list of the absolute paths of files included while parsing"""
+        return self.included_files
 
     def get_target(self):
         """Returns the target DefTree which is being parsed"""
@@ -275,7 +293,7 @@ class DefinitionParser(Log.Debuggable):
         """
         self.line_info = line_info
         line = line_info.get_text()
-        self.debug("PARSE: {}".format(line))
+        self.debug("PARSE: {}", line)
 
         cur_context = self.context_stack[-1]
 
@@ -283,13 +301,13 @@ class DefinitionParser(Log.Debuggable):
         if (not line) or (line == ""):
             # empty
             pass
-        elif m.is_fullmatch(self.comment_re):
+        elif m.is_fullmatch(COMMENT_RE):
             # Skip comments
             pass
-        elif m.is_fullmatch(self.directive_re):
+        elif m.is_fullmatch(DIRECTIVE_RE):
             # Directive: strip off colon to parse
             self._parse_directive(line[1:])
-        elif m.is_fullmatch(self.param_re):
+        elif m.is_fullmatch(PARAM_RE):
             cur_context.process_param(m[1], m[2].rstrip())
         else:
             self.log_error("Bad grammar: cannot parse {}".format(line_info))
@@ -333,7 +351,7 @@ class DefinitionParser(Log.Debuggable):
             Add the config to the def
         """
         scope_path = context.get_scope_path()
-        self.debug("  {} @ {}".format(context.ctx.id, scope_path))
+        self.debug("  {} @ {}", context.ctx.id, scope_path)
         scope = self.deftree.get_scope(scope_path)
 
         scope.add_param(DefTree.Parameter(
@@ -373,7 +391,7 @@ class DefinitionParser(Log.Debuggable):
             def_parser=self,
             prev_context=cur_context,
             line_info=self.line_info,
-            ctx=Util.Container(
+            ctx=ConfigCtx(
                 ctype=Context.CTYPE.CONFIG,
                 id=text,
                 title=None,
@@ -397,6 +415,7 @@ class DefinitionParser(Log.Debuggable):
             Include the contents of another file as if it was directly placed in this file
         """
         abs_filename = Util.get_abs_path(filename, self.def_root)
+        self.included_files.append(abs_filename)
 
         # Save the definition root so that files paths can be relative to the included file
         old_def_root = self.def_root
@@ -435,14 +454,14 @@ class DefinitionParser(Log.Debuggable):
             def_parser=self,
             prev_context=cur_context,
             line_info=self.line_info,
-            ctx=Util.Container(
+            ctx=MenuCtx(
                 ctype=Context.CTYPE.MENU,
                 mdesc=None
                 )
             )
         # The name is a relative path
         new_context.scope_path = name
-        self.debug("  {}".format(new_context.get_scope_path()))
+        self.debug("  {}", new_context.get_scope_path())
         self.context_stack.append(new_context)
 
     def _parse_directive(self, text):
@@ -451,19 +470,19 @@ class DefinitionParser(Log.Debuggable):
         """
         m = Matcher.new(text)
 
-        if m.is_fullmatch(self.config_re):
+        if m.is_fullmatch(CONFIG_RE):
             qtype = ""
             if m[1] is not None:
                 qtype = m[1][1]
-            self.debug("CONFIG({}): {}".format(qtype, m[2]))
+            self.debug("CONFIG({}): {}", qtype, m[2])
             self._config_start(qtype, m[2].lstrip())
-        elif m.is_fullmatch(self.menu_re):
-            self.debug("MENU: {}".format(m[1]))
+        elif m.is_fullmatch(MENU_RE):
+            self.debug("MENU: {}", m[1])
             self._menu_start(m[1])
-        elif m.is_fullmatch(self.block_end_re):
+        elif m.is_fullmatch(BLOCK_END_RE):
             self.debug("END")
             self._block_end()
-        elif m.is_fullmatch(self.include_re):
+        elif m.is_fullmatch(INCLUDE_RE):
             self.debug("INCLUDE")
             self._include_file(m[1])
         elif not m.found:
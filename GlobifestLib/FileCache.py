@@ -0,0 +1,128 @@
+#/usr/bin/env python
+"""
+    globifest/FileCache.py - globifest cache of parsed files
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import collections
+import os
+
+from GlobifestLib import Util
+
+# Default maximum number of parsed files kept in a cache
+DEFAULT_SIZE = 256
+
+def get_stamp(fname):
+    """Returns a value which changes when the file is modified, or None if it does not exist"""
+    try:
+        st = os.stat(fname)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class FileCache(object):
+    """
+        Memoizes objects parsed from files, such as configs and definitions
+
+        Each entry records the size and modification time of the file it was parsed from, and of
+        any files it included; it is reused only while none of them have changed.  The least
+        recently used entries are discarded when the cache is full.
+
+        @note Cached objects are shared by all callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, max_size=DEFAULT_SIZE):
+        self.max_size = max_size
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Remove all entries and reset statistics"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, fname, parse_fn):
+        """
+            Return the parsed object for a file, parsing it if it is not cached
+
+            @param kind Type of object, to distinguish different parses of the same file
+            @param fname Name of the file to parse
+            @param parse_fn Callable taking fname, which returns a tuple of (parsed object, list of
+                other files read while parsing)
+        """
+        key = (kind, os.path.normcase(os.path.abspath(fname)))
+        entry = self.entries.get(key)
+        if entry is not None:
+            if all(get_stamp(f) == stamp for f, stamp in entry.stamps):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            del self.entries[key]
+
+        self.misses += 1
+        # Stamp the file before parsing, so a concurrent change will be seen on the next lookup
+        stamps = [(fname, get_stamp(fname))]
+        value, included_files = parse_fn(fname)
+        stamps.extend((f, get_stamp(f)) for f in included_files)
+
+        self.entries[key] = Util.Container(value=value, stamps=stamps)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+        return value
+
+    def get_files(self, kind, fname):
+        """
+            Return the list of files which a cached object was parsed from
+
+            This is fname followed by any files it included, or None if it is not cached.
+        """
+        entry = self.entries.get((kind, os.path.normcase(os.path.abspath(fname))))
+        if entry is None:
+            return None
+        return [f for f, stamp in entry.stamps]
+
+    def get_stats(self):
+        """Return a Container with the number of hits, misses and entries"""
+        return Util.Container(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self.entries)
+            )
+
+    def set_max_size(self, max_size):
+        """Set the maximum number of entries, discarding the least recently used as needed"""
+        self.max_size = max_size
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+new = FileCache
@@ -0,0 +1,160 @@
+#/usr/bin/env python
+"""
+    globifest/FixDep.py - globifest dependency file post-processor
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import os
+import re
+
+from GlobifestLib import Log
+
+# Name of the record of stamped values within a stamp directory
+STAMP_RECORD_FILE = "auto.conf"
+
+# Value recorded for identifiers which are not currently defined
+UNDEFINED_VALUE = ""
+
+CONTINUATION_RE = re.compile(r"\\\r?\n")
+IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+RULE_RE = re.compile(r"^(.*?):(?:\s+|$)(.*)$")
+WORD_RE = re.compile(r"(?:\\ |\S)+")
+ESCAPE_RE = re.compile(r"\\([ #])")
+
+def read_record(fname):
+    """
+        Returns a dict of identifier to value from a stamp record
+
+        A missing or unreadable record is treated as empty, so every stamp is touched.
+    """
+    values = dict()
+    try:
+        with open(fname, "rt") as f:
+            for line in f:
+                token = line.rstrip("\n").split("=", 1)
+                if len(token) == 2:
+                    values[token[0]] = token[1]
+    except OSError:
+        pass
+    return values
+
+def parse_depfile(text):
+    """
+        Returns a list of (targets, prerequisites) from the text of a make-style depfile
+
+        Each is a list of filenames, with escaped spaces unescaped.  Other backslashes are kept,
+        as in Windows paths.
+    """
+    rules = []
+    for line in CONTINUATION_RE.sub(" ", text).splitlines():
+        if not line.strip():
+            continue
+        m = RULE_RE.match(line)
+        if not m:
+            Log.E("Malformed dependency: {}".format(line))
+        rules.append((_split_words(m.group(1)), _split_words(m.group(2))))
+    return rules
+
+def _split_words(text):
+    """Returns the filenames in a depfile list, unescaped"""
+    return [ESCAPE_RE.sub(r"\1", word) for word in WORD_RE.findall(text)]
+
+def _escape(fname):
+    """Returns a filename escaped for a depfile"""
+    return fname.replace(" ", "\\ ").replace("#", "\\#")
+
+def get_identifiers(fname, identifiers):
+    """
+        Returns the set of identifiers referenced by a file
+
+        Like the kernel's fixdep, references are found by scanning for tokens; so identifiers in
+        comments and inactive preprocessor branches count too, which is safe.
+    """
+    try:
+        with open(fname, "rt", errors="replace") as f:
+            tokens = set(IDENT_RE.findall(f.read()))
+    except OSError:
+        # The compiler will report a missing file on the next build
+        return set()
+    return tokens.intersection(identifiers)
+
+def fix_depfile(depfile, stamp_dir, drop_files=None):
+    """
+        Rewrite a depfile, so each target depends on the stamps of the settings it references
+
+        @param depfile Depfile produced by the compiler (ex: gcc -MD)
+        @param stamp_dir Directory maintained by a "stamps" generator
+        @param drop_files Generated config headers to remove from the prerequisites, since
+            their dependents now depend on the stamps instead
+        @return list of stamps added
+    """
+    identifiers = set(read_record(os.path.join(stamp_dir, STAMP_RECORD_FILE)))
+    drop_set = set(os.path.normcase(os.path.abspath(f)) for f in (drop_files or []))
+
+    try:
+        with open(depfile, "rt") as f:
+            rules = parse_depfile(f.read())
+    except OSError as e:
+        Log.E("Could not read {}: {}".format(depfile, e.strerror))
+
+    used = set()
+    scanned = dict()
+    sources = set()
+    out = []
+    for targets, prereqs in rules:
+        if not prereqs:
+            # Phony targets are written again below
+            continue
+        sources.add(prereqs[0])
+        prereqs = [p for p in prereqs if os.path.normcase(os.path.abspath(p)) not in drop_set]
+
+        rule_used = set()
+        for prereq in prereqs:
+            if prereq not in scanned:
+                scanned[prereq] = get_identifiers(prereq, identifiers)
+            rule_used.update(scanned[prereq])
+        used.update(rule_used)
+
+        rule = [" ".join(_escape(target) for target in targets) + ":"]
+        for prereq in prereqs + [os.path.join(stamp_dir, pid) for pid in sorted(rule_used)]:
+            rule.append("  " + _escape(prereq))
+        out.append(" \\\n".join(rule))
+
+    # Phony targets, so removing a header or stamp does not break the build (like gcc -MP)
+    stamps = [os.path.join(stamp_dir, pid) for pid in sorted(used)]
+    for prereq in sorted(set(scanned).difference(sources)) + stamps:
+        out.append("")
+        out.append("{}:".format(_escape(prereq)))
+
+    tmp_fname = "{}.tmp".format(depfile)
+    with open(tmp_fname, "wt") as f:
+        f.write("\n".join(out) + "\n")
+    os.replace(tmp_fname, depfile)
+    return stamps
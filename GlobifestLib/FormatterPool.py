@@ -0,0 +1,94 @@
+#/usr/bin/env python
+"""
+    globifest/FormatterPool.py - globifest out-of-process formatter workers
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+
+from GlobifestLib import DefTree, Generators, Log
+
+class FormatterPool(object):
+    """
+        Runs custom formatters on a pool of persistent worker processes
+
+        A slow formatter then does not block the build process, and several can use other
+        cores at once.  Workers are reused for every job, so each one compiles a formatter
+        script once (see Generators.FormatterCache).  Definitions are sent as (Parameter, value)
+        tuples, and errors are sent back as (ERROR type, message) to be raised in this process.
+    """
+
+    def __init__(self, workers):
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(Log.Logger.verbosity_level,)
+            )
+
+    def accepts(self, generator):
+        """Returns whether the generator can be run by the pool"""
+        return isinstance(generator, Generators.CustomGenerator)
+
+    def shutdown(self):
+        """Stop the workers, once their jobs are done"""
+        self.executor.shutdown(wait=True)
+
+    def submit(self, generator, definitions, out_dir):
+        """Start generating a file, and return a Future for get_error()"""
+        compact_defs = [(d.param, d.value) for d in definitions]
+        return self.executor.submit(_run_generator, generator, compact_defs, out_dir)
+
+def get_error(future):
+    """Wait for a job from FormatterPool.submit(), and return the exception it raised or None"""
+    try:
+        err = future.result()
+    except Exception as e: # pylint: disable=W0703
+        # The job could not be sent, or the worker died
+        return e
+    if err is None:
+        return None
+    return Log.GlobifestException(err[0], err[1])
+
+def _init_worker(verbosity_level):
+    """Set up a worker process"""
+    Log.Logger.set_level(verbosity_level)
+
+def _run_generator(generator, compact_defs, out_dir):
+    """Generate a file in a worker, and return (ERROR type, message) on failure or None"""
+    definitions = [DefTree.ParamValue(param=param, value=value) for param, value in compact_defs]
+    try:
+        generator.generate(definitions, out_dir)
+    except Log.GlobifestException as e:
+        return (e.err_type, e.msg)
+    except Exception as e: # pylint: disable=W0703
+        return (Log.ERROR.BUILD, str(e))
+    return None
+
+new = FormatterPool
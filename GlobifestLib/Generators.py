@@ -31,14 +31,91 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import builtins
+import hashlib
+import json
 import os
 import re
-import runpy
+import struct
+import threading
 
-from GlobifestLib import DefTree, LineReader, Log, Util
+from GlobifestLib import DefTree, FileCache, FixDep, LineReader, Log, Template, Util
 
 generators = Util.Container()
 
+STRING_VALUE_RE = re.compile("^\"(.*)\"$")
+
+# Name which a formatter script assigns at the top level to be loaded as a module
+FORMATTER_MODULE_FLAG = "GLOBIFEST_MODULE"
+
+class Formatter(Util.Record):
+    """
+        A compiled formatter script
+
+        For module-style formatters, module is the namespace of the script after it was run once;
+        otherwise it is None.
+    """
+
+    __slots__ = ("fname", "stamp", "code", "module")
+
+class FormatterCache(object):
+    """
+        Compiled formatter scripts, which are reused until the file is modified
+
+        A script is compiled once per (path, modification time).  A script which assigns
+        GLOBIFEST_MODULE at the top level is also run once, as a module, and its generate()
+        function is called for each output instead of running the whole script.
+    """
+
+    def __init__(self):
+        self.formatters = dict()
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """Remove all formatters"""
+        with self.lock:
+            self.formatters.clear()
+
+    def get(self, fname):
+        """Return the Formatter for a script, compiling and loading it if needed"""
+        key = os.path.normcase(os.path.abspath(fname))
+        stamp = FileCache.get_stamp(fname)
+        with self.lock:
+            formatter = self.formatters.get(key, None)
+            if (formatter is None) or (formatter.stamp != stamp):
+                formatter = self._load(fname, stamp)
+                self.formatters[key] = formatter
+        return formatter
+
+    def _load(self, fname, stamp):
+        """Compile a script, and run it as a module if it is module-style"""
+        with open(fname, "rb") as f:
+            code = compile(f.read(), fname, "exec")
+
+        module = None
+        if FORMATTER_MODULE_FLAG in code.co_names:
+            module = _new_namespace(fname, "<globifest_module>")
+            exec(code, module) # pylint: disable=W0122
+            if not callable(module.get("generate", None)):
+                Log.E("Formatter module {} does not define generate()".format(fname))
+
+        return Formatter(fname=fname, stamp=stamp, code=code, module=module)
+
+formatter_cache = FormatterCache()
+
+def _new_namespace(fname, name):
+    """Return globals for running a script, as runpy.run_path() would set them up"""
+    return dict(
+        __name__=name,
+        __file__=fname,
+        __cached__=None,
+        __doc__=None,
+        __loader__=None,
+        __package__=None,
+        __spec__=None,
+        __builtins__=builtins
+        )
+
 def register_generator(gen_class):
     """
         Register a generator class
@@ -51,22 +128,146 @@ def register_generator(gen_class):
 class GeneratorBase(object):
     """Base class for generators"""
 
+    # Incremented whenever the output of a generator changes for the same definitions
+    VERSION = 1
+
     def __init__(self, filename, formatter):
         self.formatter = formatter
         self.filename = filename
 
-    def generate(self, _definitions, _out_dir):
-        """Generate a settings file"""
-        Log.E("Error generating {}: algorithm undefined", self.filename)
+    def generate(self, definitions, out_dir):
+        """Generate a settings file from the output of render(), in a single write"""
+        contents = self.render(definitions, out_dir)
+        out_file = self.get_output_file()
+        mode = "b" if isinstance(contents, bytes) else "t"
+
+        # Leave the file untouched if it is already up to date
+        try:
+            with open(out_file, "r" + mode) as f:
+                if f.read() == contents:
+                    return
+        except EnvironmentError:
+            pass
+
+        with LineReader.OpenFileCM(out_file, "w" + mode) as out_cm:
+            if not out_cm:
+                Log.E("Could not open {}: {}".format(self.filename, out_cm.get_err_msg()))
+            out_cm.get_file().write(contents)
+
+    def get_definitions(self, def_tree, settings):
+        """Return the list of DefTree.ParamValue to generate from def_tree with settings"""
+        return def_tree.get_relevant_params(settings)
 
     def get_filename(self):
         """Return the filename"""
         return self.filename
 
+    def get_key(self, definitions, out_dir):
+        """
+            Return a hex digest which identifies the output of generate()
+
+            The digest covers the generator type and version, the output location, and every
+            parameter with its value; so generation can be skipped while it is unchanged.
+        """
+        key = hashlib.sha256()
+        key.update("{}.{}\0{}\0{}\0{}\0{}\0".format(
+            type(self).__module__,
+            type(self).__name__,
+            self.VERSION,
+            out_dir,
+            self.filename,
+            self.get_output_file()
+            ).encode())
+        for d in definitions:
+            key.update("{}\0{}\0".format(d.param, d.value).encode())
+        self._update_key(key)
+        return key.hexdigest()
+
+    def get_output_file(self):
+        """Return the name of the file written by generate()"""
+        return self.filename
+
     def get_formatter(self):
         """Returns None (most classes do not use a formatter)"""
         return None
 
+    def render(self, _definitions, _out_dir):
+        """Return the contents of the settings file as a string (or bytes, for binary files)"""
+        Log.E("Error generating {}: algorithm undefined".format(self.filename))
+
+    def _update_key(self, key):
+        """Add any other inputs of generate() to the hashlib object for get_key()"""
+        pass
+
+class BinaryGenerator(GeneratorBase):
+    """
+        Generates compact binary settings, which can be read in place without parsing
+
+        All fields are little-endian.  The file is a header, followed by an array of fixed-size
+        entries, followed by a table of NUL-terminated UTF-8 strings.  Each distinct string is
+        stored once, and referenced by its offset within the table.
+    """
+
+    FORMAT_TYPE = "binary"
+
+    # Incremented whenever the layout changes
+    FORMAT_VERSION = 1
+    MAGIC = b"GFST"
+
+    # magic, format version, entry size, entry count, string table offset, string table size
+    HEADER = struct.Struct("<4sHHIII4x")
+
+    # identifier offset, PARAM_TYPE, then the value as int64/double/string offset
+    ENTRY_INT = struct.Struct("<IB3xq")
+    ENTRY_FLOAT = struct.Struct("<IB3xd")
+    ENTRY_STRING = struct.Struct("<IB3xI4x")
+
+    def render(self, definitions, _out_dir):
+        """Return the contents of the settings file as bytes"""
+        strings = StringTable()
+        entries = []
+        append = entries.append
+
+        for d in definitions:
+            ptype = d.param.get_type()
+            value = _get_typed_value(d)
+
+            # Write implicit values first, as INT entries
+            for implicit_value in d.param.get_implicit_values():
+                append(self._pack_int(
+                    strings.add(implicit_value[0]), DefTree.PARAM_TYPE.INT, int(implicit_value[1])
+                    ))
+
+            # Write the parameter; BOOL and ENUM are stored as integers
+            id_offset = strings.add(d.param.get_identifier())
+            if ptype == DefTree.PARAM_TYPE.FLOAT:
+                append(self.ENTRY_FLOAT.pack(id_offset, ptype, value))
+            elif ptype == DefTree.PARAM_TYPE.STRING:
+                append(self.ENTRY_STRING.pack(id_offset, ptype, strings.add(value)))
+            else:
+                append(self._pack_int(id_offset, ptype, int(value)))
+
+        string_table = strings.get_bytes()
+        strings_offset = self.HEADER.size + (len(entries) * self.ENTRY_INT.size)
+        header = self.HEADER.pack(
+            self.MAGIC,
+            self.FORMAT_VERSION,
+            self.ENTRY_INT.size,
+            len(entries),
+            strings_offset,
+            len(string_table)
+            )
+        return b"".join([header] + entries + [string_table])
+
+    def _pack_int(self, id_offset, ptype, value):
+        """Return an entry with an integer value"""
+        try:
+            return self.ENTRY_INT.pack(id_offset, ptype, value)
+        except struct.error:
+            Log.E("Value {} is out of range for {}".format(value, self.filename))
+
+register_generator(BinaryGenerator)
+
 class CGenerator(GeneratorBase):
     """Generates C headers"""
 
@@ -74,74 +275,198 @@ class CGenerator(GeneratorBase):
 
     INCLUDE_GUARD_REPLACE = re.compile("([^a-zA-Z0-9_])")
 
-    def generate(self, definitions, out_dir):
-        """Generate a settings file"""
+    def render(self, definitions, out_dir):
+        """Return the contents of the settings file"""
         include_guard = os.path.relpath(self.filename, start=out_dir)
         include_guard = "_{}".format(CGenerator.INCLUDE_GUARD_REPLACE.sub("_", include_guard))
         include_guard = include_guard.upper()
-        with LineReader.OpenFileCM(self.filename, "wt") as hdr_cm:
-            if not hdr_cm:
-                Log.E("Could not open {}: {}".format(self.filename, hdr_cm.get_err_msg()))
-
-            hdr_file = hdr_cm.get_file()
-
-            # File header
-            hdr_file.write("\n".join([
-                "/* GENERATED BY GLOBIFEST -- DO NOT EDIT */",
-                "",
-                "#ifndef {}".format(include_guard),
-                "#define {}".format(include_guard),
-                "\n"
-            ]))
-
-            # Add values; preprocessor directives are used for maximum type flexibility
-            for d in definitions:
-                ptype = d.param.get_type()
-                pid = d.param.get_identifier()
-                value = d.value
-
-                # Write implicit values first
-                implicit_id = None
-                for implicit_value in d.param.get_implicit_values():
-                    hdr_file.write("#define {} ({})\n".format(
-                        implicit_value[0],
-                        implicit_value[1]
-                        ))
-                    if value == implicit_value[1]:
-                        implicit_id = implicit_value[0]
-
-                # Write the parameter
-                if ptype in [DefTree.PARAM_TYPE.INT, DefTree.PARAM_TYPE.FLOAT]:
-                    # Parentheses prevent conflicts with surrounding code
-                    # Default type of INT is int (i.e., signed  literal)
-                    # Default type of FLOAT is double precision
-                    hdr_file.write("#define {} ({})\n".format(pid, value))
-                elif ptype == DefTree.PARAM_TYPE.STRING:
-                    # Strings are not surrounded to allow compile-time concatenation
-                    hdr_file.write("#define {} {}\n".format(pid, value))
-                elif ptype == DefTree.PARAM_TYPE.BOOL:
-                    # Define as 1/0, since C89 did not define TRUE and FALSE values
-                    if value == "FALSE":
-                        value = 0
-                    else:
-                        value = 1
-                    hdr_file.write("#define {} ({})\n".format(pid, value))
-                elif ptype == DefTree.PARAM_TYPE.ENUM:
-                    if implicit_id:
-                        hdr_file.write("#define {} {}\n".format(pid, implicit_id))
-                    else:
-                        hdr_file.write("#define {} ({})\n".format(pid, value))
-                else:
-                    # TODO: Handle more complex literal types:
-                    # - Integral types U/L/UL/LL/ULL
-                    # - Float suffixes F/L for floats
-                    Log.E("Unhandled value of type {}".format(str(d.param.ptype)))
 
-            # File footer
-            hdr_file.write("\n#endif /* {} */\n".format(include_guard))
+        # File header
+        out = [
+            "/* GENERATED BY GLOBIFEST -- DO NOT EDIT */\n",
+            "\n",
+            "#ifndef {}\n".format(include_guard),
+            "#define {}\n".format(include_guard),
+            "\n"
+            ]
+        self._render_body(definitions, include_guard, out.append)
+
+        # File footer
+        out.append("\n#endif /* {} */\n".format(include_guard))
+        return "".join(out)
+
+    def _render_body(self, definitions, _include_guard, append):
+        """Write the settings via append()"""
+        # Add values; preprocessor directives are used for maximum type flexibility
+        for d in definitions:
+            ptype = d.param.get_type()
+            pid = d.param.get_identifier()
+            value = d.value
+
+            # Write implicit values first
+            implicit_id = None
+            for implicit_value in d.param.get_implicit_values():
+                append("#define " + implicit_value[0] + " (" + implicit_value[1] + ")\n")
+                if value == implicit_value[1]:
+                    implicit_id = implicit_value[0]
+
+            # Write the parameter
+            if ptype in [DefTree.PARAM_TYPE.INT, DefTree.PARAM_TYPE.FLOAT]:
+                # Parentheses prevent conflicts with surrounding code
+                # Default type of INT is int (i.e., signed  literal)
+                # Default type of FLOAT is double precision
+                append("#define {} ({})\n".format(pid, value))
+            elif ptype == DefTree.PARAM_TYPE.STRING:
+                # Strings are not surrounded to allow compile-time concatenation
+                append("#define {} {}\n".format(pid, value))
+            elif ptype == DefTree.PARAM_TYPE.BOOL:
+                # Define as 1/0, since C89 did not define TRUE and FALSE values
+                if value == "FALSE":
+                    append("#define " + pid + " (0)\n")
+                else:
+                    append("#define " + pid + " (1)\n")
+            elif ptype == DefTree.PARAM_TYPE.ENUM:
+                if implicit_id:
+                    append("#define " + pid + " " + implicit_id + "\n")
+                else:
+                    append("#define {} ({})\n".format(pid, value))
+            else:
+                # TODO: Handle more complex literal types:
+                # - Integral types U/L/UL/LL/ULL
+                # - Float suffixes F/L for floats
+                Log.E("Unhandled value of type {}".format(str(d.param.ptype)))
 
 register_generator(CGenerator)
 
+class CLookupGenerator(CGenerator):
+    """
+        Generates C headers, along with a table for looking up settings by name at runtime
+
+        The table is sorted by identifier, so it can be searched in O(log n) comparisons.  Like
+        a single-header library, the table and accessor are only defined where the
+        <GUARD>_IMPLEMENTATION macro is defined before including the header.
+    """
+
+    FORMAT_TYPE = "c_lookup"
+
+    # Declarations shared by all lookup headers
+    TYPES = [
+        "#ifndef GLOBIFEST_LOOKUP_TYPES\n",
+        "#define GLOBIFEST_LOOKUP_TYPES\n",
+        "\n",
+        "typedef enum\n",
+        "{\n",
+        "    GLOBIFEST_TYPE_BOOL,\n",
+        "    GLOBIFEST_TYPE_STRING,\n",
+        "    GLOBIFEST_TYPE_INT,\n",
+        "    GLOBIFEST_TYPE_FLOAT,\n",
+        "    GLOBIFEST_TYPE_ENUM\n",
+        "} globifest_type_t;\n",
+        "\n",
+        "typedef struct\n",
+        "{\n",
+        "    const char *id;\n",
+        "    globifest_type_t type;\n",
+        "    long int_value;\n",
+        "    double float_value;\n",
+        "    const char *string_value;\n",
+        "} globifest_setting_t;\n",
+        "\n",
+        "#endif /* GLOBIFEST_LOOKUP_TYPES */\n"
+        ]
+
+    # The value field of each PARAM_TYPE in globifest_setting_t
+    VALUE_FORMATS = {
+        DefTree.PARAM_TYPE.BOOL: "{}, 0.0, 0",
+        DefTree.PARAM_TYPE.STRING: "0, 0.0, {}",
+        DefTree.PARAM_TYPE.INT: "{}, 0.0, 0",
+        DefTree.PARAM_TYPE.FLOAT: "0, {}, 0",
+        DefTree.PARAM_TYPE.ENUM: "{}, 0.0, 0"
+        }
+
+    def _render_body(self, definitions, include_guard, append):
+        """Write the settings via append(), followed by the lookup table"""
+        CGenerator._render_body(self, definitions, include_guard, append)
+
+        # Entries refer to the macros, so the values cannot diverge from the defines
+        entries = []
+        for d in definitions:
+            for implicit_value in d.param.get_implicit_values():
+                entries.append((implicit_value[0], DefTree.PARAM_TYPE.INT))
+            entries.append((d.param.get_identifier(), d.param.get_type()))
+        # Sort by byte value, as strcmp() compares
+        entries.sort(key=lambda entry: entry[0].encode())
+
+        prefix = include_guard.strip("_")
+        table = prefix.lower() + "_settings"
+        find = prefix.lower() + "_find_setting"
+
+        append("\n")
+        for line in self.TYPES:
+            append(line)
+        append("\n")
+        append("#define {}_SETTINGS_COUNT ({})\n".format(prefix, len(entries)))
+        append("\n")
+        append("/* Returns the setting with the given identifier, or 0 if not found */\n")
+        append("extern const globifest_setting_t *{}(const char *id);\n".format(find))
+        append("\n")
+        append("#ifdef {}_IMPLEMENTATION\n".format(prefix))
+        append("\n")
+        append("#include <string.h>\n")
+        append("\n")
+        if not entries:
+            # C89 does not allow an empty table
+            append("const globifest_setting_t *{}(const char *id)\n".format(find))
+            append("{\n")
+            append("    (void)id;\n")
+            append("    return 0;\n")
+            append("}\n")
+            append("\n")
+            append("#endif /* {}_IMPLEMENTATION */\n".format(prefix))
+            return
+
+        append("const globifest_setting_t {}[] =\n".format(table))
+        append("{\n")
+        for i, (pid, ptype) in enumerate(entries):
+            append("    {{ \"{}\", GLOBIFEST_TYPE_{}, {} }}{}\n".format(
+                pid,
+                DefTree.PARAM_TYPE.enum_id[ptype],
+                self.VALUE_FORMATS[ptype].format(pid),
+                "," if (i + 1) < len(entries) else ""
+                ))
+        append("};\n")
+        append("\n")
+        append("const globifest_setting_t *{}(const char *id)\n".format(find))
+        append("{\n")
+        append("    int lo = 0;\n")
+        append("    int hi = {}_SETTINGS_COUNT - 1;\n".format(prefix))
+        append("\n")
+        append("    while (lo <= hi)\n")
+        append("    {\n")
+        append("        int mid = lo + ((hi - lo) / 2);\n")
+        append("        int cmp = strcmp(id, {}[mid].id);\n".format(table))
+        append("\n")
+        append("        if (cmp == 0)\n")
+        append("        {\n")
+        append("            return &{}[mid];\n".format(table))
+        append("        }\n")
+        append("        if (cmp < 0)\n")
+        append("        {\n")
+        append("            hi = mid - 1;\n")
+        append("        }\n")
+        append("        else\n")
+        append("        {\n")
+        append("            lo = mid + 1;\n")
+        append("        }\n")
+        append("    }\n")
+        append("\n")
+        append("    return 0;\n")
+        append("}\n")
+        append("\n")
+        append("#endif /* {}_IMPLEMENTATION */\n".format(prefix))
+
+register_generator(CLookupGenerator)
+
 class CustomGenerator(GeneratorBase):
     """Generates files using a custom formatter"""
 
@@ -158,12 +483,22 @@ class CustomGenerator(GeneratorBase):
             g_debug=lambda msg: Log.D("        {}".format(str(msg))),
             g_err=lambda msg: Log.E(msg, stackframe=3)
             )
-        runpy.run_path(self.formatter, init_globals=args, run_name="<globifest>")
+        formatter = formatter_cache.get(self.formatter)
+        if formatter.module is not None:
+            formatter.module["generate"](**args)
+        else:
+            script_globals = _new_namespace(self.formatter, "<globifest>")
+            script_globals.update(args)
+            exec(formatter.code, script_globals) # pylint: disable=W0122
 
     def get_formatter(self):
         """Returns the formatter used"""
         return self.formatter
 
+    def _update_key(self, key):
+        """Add the contents of the formatter to the key"""
+        _update_key_file(key, self.formatter)
+
 register_generator(CustomGenerator)
 
 class JavaGenerator(GeneratorBase):
@@ -174,70 +509,248 @@ class JavaGenerator(GeneratorBase):
     CLASS_RE = re.compile(r".java$")
 
     def generate(self, definitions, out_dir):
-        """Generate a settings file"""
-        java_file = self.filename.lower()
-        package_dir = os.path.dirname(java_file)
+        """Generate a settings file, in its package directory"""
+        package_dir = os.path.dirname(self.get_output_file())
+        os.makedirs(Util.get_abs_path(package_dir, out_dir), exist_ok=True)
+        GeneratorBase.generate(self, definitions, out_dir)
+
+    def render(self, definitions, out_dir):
+        """Return the contents of the settings file"""
+        package_dir = os.path.dirname(self.get_output_file())
         package_name = os.path.relpath(package_dir, start=out_dir)
         package_name = self.PACKAGE_RE.sub(".", package_name)
         class_name = self.CLASS_RE.sub("", os.path.basename(self.filename))
-        os.makedirs(Util.get_abs_path(package_dir, out_dir), exist_ok=True)
-        with LineReader.OpenFileCM(java_file, "wt") as hdr_cm:
-            if not hdr_cm:
-                Log.E("Could not open {}: {}".format(self.filename, hdr_cm.get_err_msg()))
-
-            hdr_file = hdr_cm.get_file()
-
-            # File header
-            hdr_file.write("\n".join([
-                "/* GENERATED BY GLOBIFEST -- DO NOT EDIT */",
-                "",
-                "package {}".format(package_name),
-                "",
-                "public final class {}".format(class_name),
-                "{\n"
-            ]))
-
-            # Add values
-            template = "    public final static {} {} = {};\n"
-            for d in definitions:
-                ptype = d.param.get_type()
-                pid = d.param.get_identifier()
-                value = d.value
-
-                # Write implicit values first
-                implicit_id = None
-                for implicit_value in d.param.get_implicit_values():
-                    hdr_file.write(template.format(
-                        "int",
-                        implicit_value[0],
-                        implicit_value[1]
-                        ))
-                    if value == implicit_value[1]:
-                        implicit_id = implicit_value[0]
-
-                # Write the parameter
-                if ptype == DefTree.PARAM_TYPE.INT:
-                    hdr_file.write(template.format("int", pid, value))
-                elif ptype == DefTree.PARAM_TYPE.FLOAT:
-                    # Default type is double precision
-                    hdr_file.write(template.format("double", pid, value))
-                elif ptype == DefTree.PARAM_TYPE.STRING:
-                    hdr_file.write(template.format("String", pid, value))
-                elif ptype == DefTree.PARAM_TYPE.BOOL:
-                    hdr_file.write(template.format("boolean", pid, value.lower()))
-                elif ptype == DefTree.PARAM_TYPE.ENUM:
-                    if implicit_id:
-                        value = implicit_id
-                    hdr_file.write(template.format("int", pid, value))
-                else:
-                    # TODO: Handle more complex literal types
-                    Log.E("Unhandled value of type {}".format(str(d.param.ptype)))
 
-            # File footer
-            hdr_file.write("}\n")
+        # File header
+        out = [
+            "/* GENERATED BY GLOBIFEST -- DO NOT EDIT */\n",
+            "\n",
+            "package {}\n".format(package_name),
+            "\n",
+            "public final class {}\n".format(class_name),
+            "{\n"
+            ]
+        append = out.append
+
+        # Add values
+        template = "    public final static {} {} = {};\n"
+        for d in definitions:
+            ptype = d.param.get_type()
+            pid = d.param.get_identifier()
+            value = d.value
+
+            # Write implicit values first
+            implicit_id = None
+            for implicit_value in d.param.get_implicit_values():
+                append(
+                    "    public final static int " + implicit_value[0] + " = " + implicit_value[1] + ";\n"
+                    )
+                if value == implicit_value[1]:
+                    implicit_id = implicit_value[0]
+
+            # Write the parameter
+            if ptype == DefTree.PARAM_TYPE.INT:
+                append(template.format("int", pid, value))
+            elif ptype == DefTree.PARAM_TYPE.FLOAT:
+                # Default type is double precision
+                append(template.format("double", pid, value))
+            elif ptype == DefTree.PARAM_TYPE.STRING:
+                append(template.format("String", pid, value))
+            elif ptype == DefTree.PARAM_TYPE.BOOL:
+                append(template.format("boolean", pid, value.lower()))
+            elif ptype == DefTree.PARAM_TYPE.ENUM:
+                if implicit_id:
+                    value = implicit_id
+                append(template.format("int", pid, value))
+            else:
+                # TODO: Handle more complex literal types
+                Log.E("Unhandled value of type {}".format(str(d.param.ptype)))
+
+        # File footer
+        append("}\n")
+        return "".join(out)
+
+    def get_output_file(self):
+        """Java files are written in lowercase"""
+        return self.filename.lower()
 
 register_generator(JavaGenerator)
 
+class TemplateGenerator(GeneratorBase):
+    """Generates files from a template, which is the formatter"""
+
+    FORMAT_TYPE = "template"
+
+    def get_formatter(self):
+        """Returns the template used"""
+        return self.formatter
+
+    def render(self, definitions, out_dir):
+        """Return the contents of the settings file"""
+        template = Template.template_cache.get(self.formatter)
+        return template.render(
+            PARAMS=Template.get_params(definitions),
+            DEFINITIONS=definitions,
+            OUT_FILE=self.filename,
+            OUT_DIR=out_dir
+            )
+
+    def _update_key(self, key):
+        """Add the contents of the template to the key"""
+        _update_key_file(key, self.formatter)
+
+register_generator(TemplateGenerator)
+
+def _update_key_file(key, fname):
+    """Add the contents of a file used by a generator to the hashlib object"""
+    try:
+        with open(fname, "rb") as f:
+            key.update(f.read())
+    except OSError:
+        # The generator cannot run, so generate() will report the error
+        pass
+
+class JsonGenerator(GeneratorBase):
+    """Generates JSON files, with each value converted to its JSON type"""
+
+    FORMAT_TYPE = "json"
+
+    # Incremented whenever the layout changes
+    FORMAT_VERSION = 1
+
+    def render(self, definitions, _out_dir):
+        """Return the contents of the settings file"""
+        settings = dict()
+        constants = dict()
+        for d in definitions:
+            for implicit_value in d.param.get_implicit_values():
+                constants[implicit_value[0]] = int(implicit_value[1])
+            settings[d.param.get_identifier()] = _get_typed_value(d)
+
+        out = dict(version=self.FORMAT_VERSION, settings=settings, constants=constants)
+        return json.dumps(out, indent=4) + "\n"
+
+register_generator(JsonGenerator)
+
+class StampsGenerator(GeneratorBase):
+    """
+        Maintains a stamp file per identifier, which is only touched when its value changes
+
+        The filename is a directory, where each stamp is named after its identifier.  The values
+        are recorded in the directory (see FixDep.STAMP_RECORD_FILE), so the next build can tell
+        which ones changed.  FixDep rewrites compiler depfiles, so each object depends on the
+        stamps of the identifiers it references instead of the whole header.
+
+        Every identifier the definition can emit is recorded, including the implicit values of
+        each parameter; those which are not currently defined are recorded with
+        FixDep.UNDEFINED_VALUE.  So an object which tests whether an identifier is defined is
+        rebuilt when it becomes defined, and likewise when it is removed.
+    """
+
+    FORMAT_TYPE = "stamps"
+
+    def generate(self, definitions, out_dir):
+        """Touch the stamps of changed and removed identifiers, then write the record"""
+        os.makedirs(self.filename, exist_ok=True)
+        old_values = FixDep.read_record(self.get_output_file())
+        for identifier, value in self._get_record(definitions):
+            stamp = os.path.join(self.filename, identifier)
+            if (old_values.pop(identifier, None) != value) or (not os.path.isfile(stamp)):
+                self._touch(stamp)
+
+        # Anything left in the record is no longer in the definition
+        for identifier in old_values:
+            self._touch(os.path.join(self.filename, identifier))
+        GeneratorBase.generate(self, definitions, out_dir)
+
+    def get_definitions(self, def_tree, settings):
+        """Return every parameter in def_tree; those not in settings have FixDep.UNDEFINED_VALUE"""
+        definitions = []
+        for param in def_tree.iter_params():
+            pid = param.get_identifier()
+            if settings.has_value(pid):
+                value = settings.get_value(pid)
+            else:
+                value = FixDep.UNDEFINED_VALUE
+            definitions.append(DefTree.ParamValue(param=param, value=value))
+        return definitions
+
+    def get_output_file(self):
+        """The record is the output file, since the stamps depend on the parameters"""
+        return os.path.join(self.filename, FixDep.STAMP_RECORD_FILE)
+
+    def render(self, definitions, _out_dir):
+        """Return the contents of the record"""
+        return "".join("{}={}\n".format(*entry) for entry in self._get_record(definitions))
+
+    def _get_record(self, definitions):
+        """Generate (identifier, value) for each identifier which the definitions can emit"""
+        for d in definitions:
+            # Implicit values are only emitted along with their parameter
+            for implicit_value in d.param.get_implicit_values():
+                if d.value == FixDep.UNDEFINED_VALUE:
+                    yield (implicit_value[0], FixDep.UNDEFINED_VALUE)
+                else:
+                    yield implicit_value
+            yield (d.param.get_identifier(), d.value)
+
+    def _touch(self, stamp):
+        """Update the modification time of a stamp, creating it if needed"""
+        with LineReader.OpenFileCM(stamp, "wt") as stamp_cm:
+            if not stamp_cm:
+                Log.E("Could not open {}: {}".format(stamp, stamp_cm.get_err_msg()))
+
+register_generator(StampsGenerator)
+
+class StringTable(object):
+    """Table of NUL-terminated strings, where each distinct string is stored once"""
+
+    def __init__(self):
+        self.offsets = dict()
+        self.strings = []
+        self.size = 0
+
+    def add(self, text):
+        """Add a string if it is not already in the table, and return its offset"""
+        offset = self.offsets.get(text, None)
+        if offset is None:
+            data = text.encode("utf-8") + b"\0"
+            offset = self.size
+            self.offsets[text] = offset
+            self.strings.append(data)
+            self.size += len(data)
+        return offset
+
+    def get_bytes(self):
+        """Return the contents of the table"""
+        return b"".join(self.strings)
+
+def _get_typed_value(definition):
+    """
+        Return the value of a DefTree.ParamValue converted to a python type
+
+        BOOL is converted to bool, INT and ENUM to int, FLOAT to float, and STRING to str without
+        surrounding quotes.  An ENUM may have the identifier of a choice as its value.
+    """
+    param = definition.param
+    ptype = param.get_type()
+    value = definition.value
+    if ptype == DefTree.PARAM_TYPE.STRING:
+        m = STRING_VALUE_RE.match(value)
+        return m.group(1) if m else value
+    if ptype == DefTree.PARAM_TYPE.ENUM:
+        # The value may be the identifier of a choice
+        for implicit_value in param.get_implicit_values():
+            if value == implicit_value[0]:
+                value = implicit_value[1]
+                break
+        ptype = DefTree.PARAM_TYPE.INT
+
+    typed_value = DefTree.validate_value(ptype, value)
+    if typed_value is None:
+        Log.E("Invalid value {} for {}".format(value, param.get_identifier()))
+    return typed_value
+
 def factory(gen_format, filename, formatter=None):
     """Return a generator for the given format, or None if not registerd"""
     gen_class = generators.get(gen_format)
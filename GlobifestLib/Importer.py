@@ -388,8 +388,13 @@ class ExternalDependency(object):
         """Return the name/identifier of the dependency"""
         return self.name
 
-    def setup(self, out_dir):
-        """Run setup actions for the external dependency"""
+    def setup(self, out_dir, cancel_event=None):
+        """
+            Run setup actions for the external dependency
+
+            @param cancel_event If given, a threading.Event which stops the setup between
+                actions when set
+        """
         self.out_dir = out_dir
 
         # Build the contents of the cache file.  This must include enough information to verify
@@ -410,6 +415,8 @@ class ExternalDependency(object):
             Log.I("Setting up {}".format(self.name))
         inputs = []
         for a in self.actions:
+            if cancel_event and cancel_event.is_set():
+                Log.E("Setup of {} cancelled".format(self.name))
             inputs = a.run(self, inputs)
             Log.D("    => {}".format(inputs))
         _SetupCompleteAction(cache_file_contents).run(self)
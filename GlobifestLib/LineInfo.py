@@ -31,6 +31,11 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import array
+import re
+
+NEWLINE_RE = re.compile("\n")
+
 class LineInfo:
     """
         Encapsulates information about a line of text in a source file
@@ -60,4 +65,80 @@ class LineInfo:
         """Replace the cached content of the line"""
         self.text = text
 
+class LineTable(object):
+    """
+        Table of the lines in the whole contents of a source file
+
+        Only the offsets of each line are stored; the stripped text is extracted when requested.
+    """
+
+    def __init__(self, source, contents):
+        """
+            Initialize the table
+
+            @param source The object which the contents were read for (provides get_filename())
+            @param contents The file contents as a str
+        """
+        self.source = source
+        self.contents = contents
+
+        # Offset where each line starts, followed by one past the end of the last line
+        self.starts = array.array("q", [0])
+        self.starts.extend(m.end() for m in NEWLINE_RE.finditer(contents))
+        if self.starts[-1] == len(contents):
+            # Empty, or ends with a newline: the last start is the end of the last line
+            self.line_count = len(self.starts) - 1
+        else:
+            self.line_count = len(self.starts)
+            self.starts.append(len(contents) + 1)
+
+    def __getitem__(self, idx):
+        """Return a LineRef for the line at index idx"""
+        return LineRef(self, idx)
+
+    def __len__(self):
+        return self.line_count
+
+    def get_filename(self):
+        """Return the filename where the lines originated"""
+        return self.source.get_filename()
+
+    def get_line_info(self, idx):
+        """Return a standalone LineInfo for the line at index idx"""
+        return LineInfo(self.source, idx + 1, self.get_text(idx))
+
+    def get_text(self, idx):
+        """Return the text of the line at index idx, with surrounding whitespace removed"""
+        return self.contents[self.starts[idx]:self.starts[idx + 1] - 1].strip()
+
+class LineRef(object):
+    """
+        Lightweight reference to a line in a LineTable, with the same interface as LineInfo
+    """
+
+    __slots__ = ("table", "idx")
+
+    def __init__(self, table, idx):
+        self.table = table
+        self.idx = idx
+
+    def __str__(self):
+        return "{}:{}".format(self.table.get_filename(), self.idx + 1)
+
+    def get_filename(self):
+        """Return the filename where this line of text originated"""
+        return self.table.get_filename()
+
+    def get_line(self):
+        """Return the line number where this line of text originated"""
+        return self.idx + 1
+
+    def get_text(self):
+        """Return the text contents of this line"""
+        return self.table.get_text(self.idx)
+
+    def to_line_info(self):
+        """Return a standalone LineInfo with the contents of this line"""
+        return self.table.get_line_info(self.idx)
+
 new = LineInfo
@@ -31,7 +31,12 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-from GlobifestLib import LineInfo, Log
+from GlobifestLib import LineInfo, Log, Util
+
+READ_MODE = Util.create_enum(
+    "LINES",
+    "BULK"
+    )
 
 class OpenFileCM(object):
     """
@@ -122,12 +127,16 @@ class ReadLineInfoIter(object):
 class LineReader:
     """
         Reads lines of data from a file
+
+        READ_MODE.LINES reads and parses one line at a time.  READ_MODE.BULK reads the whole file,
+        and passes lightweight LineRefs from a LineTable to the parser.
     """
 
-    def __init__(self, parser, do_end=True):
+    def __init__(self, parser, do_end=True, read_mode=READ_MODE.BULK):
         self.parser = parser
         self.err_file_name = ""
         self.do_end = do_end
+        self.read_mode = read_mode
 
     def error(self, action, sys_msg):
         """Log an error"""
@@ -143,8 +152,25 @@ class LineReader:
             else:
                 self.error("open", file_mgr.get_err_msg())
 
+    def _parse_table(self, table):
+        """Parse all lines in a LineTable"""
+        parse = self.parser.parse
+        for idx in range(len(table)):
+            parse(LineInfo.LineRef(table, idx))
+
+        if self.do_end:
+            self.parser.parse_end()
+
     def _read_file_obj(self, file_obj):
         """Read from a file-like object"""
+        if self.read_mode != READ_MODE.LINES:
+            try:
+                contents = file_obj.read()
+            except EnvironmentError as e:
+                self.error("read from", e.strerror)
+            self._parse_table(LineInfo.LineTable(self.parser.get_target(), contents))
+            return
+
         reader = ReadLineInfoIter(file_obj, self.parser.get_target())
         for line_info in reader:
             self.parser.parse(line_info)
@@ -33,10 +33,11 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import collections
 import inspect
-import io
 import os
 import sys
+import threading
 
 from GlobifestLib import Util
 
@@ -59,6 +60,9 @@ ERROR = Util.create_enum(
     "COUNT"
     )
 
+# Maximum number of records kept in a debug log; older records are discarded
+DEBUG_LOG_SIZE = 16384
+
 class GlobifestException(Exception):
     """Exception class used for all exceptions generated by Globifest"""
 
@@ -84,14 +88,25 @@ class LoggerClass(object):
         self.out_pipe = sys.stdout
         self.err_pipe = sys.stderr
 
+        # Serializes output, so messages from different threads are not interleaved
+        self.lock = threading.Lock()
+
+        # Per-thread state, such as the prefix of each message
+        self.thread_state = threading.local()
+
     def has_level(self, level):
         """Static method"""
         return self.verbosity_level >= level
 
+    def get_prefix(self):
+        """Returns the prefix of messages from the current thread"""
+        return getattr(self.thread_state, "prefix", "")
+
     def log_msg(self, level, msg):
         """Prints the message if it is allowed by the verbosity level"""
         if self.has_level(level):
-            print(msg, file=self.out_pipe)
+            with self.lock:
+                print(self.get_prefix() + msg, file=self.out_pipe)
 
     def log_error(self, msg, err_type=ERROR.BUILD, is_fatal=True, frame=Util.get_stackframe(2)):
         """Prints and raises an error message"""
@@ -102,17 +117,27 @@ class LoggerClass(object):
             fname = os.path.basename(f_info.filename)
             debug_info = "[{}@{:d}] ".format(fname, f_info.lineno)
             local_variables = frame.f_locals
-        print("{}Error: {}\n".format(debug_info, msg), file=self.err_pipe)
-        if local_variables:
-            print("Locals:")
-            print(local_variables)
+        with self.lock:
+            print("{}{}Error: {}\n".format(self.get_prefix(), debug_info, msg), file=self.err_pipe)
+            if local_variables:
+                print("Locals:")
+                print(local_variables)
         if is_fatal:
             raise GlobifestException(err_type, msg)
 
+    def log_warning(self, msg):
+        """Prints a warning message, regardless of the verbosity level"""
+        with self.lock:
+            print("{}Warning: {}".format(self.get_prefix(), msg), file=self.err_pipe)
+
     def set_err_pipe(self, pipe):
         """Set the pipe for error messages"""
         self.err_pipe = pipe
 
+    def set_prefix(self, prefix):
+        """Set the prefix of messages from the current thread"""
+        self.thread_state.prefix = prefix
+
     def set_level(self, level):
         """Set the minimum verbosity level for log messages"""
         self.verbosity_level = level
@@ -133,6 +158,11 @@ def I(msg):
     Logger.log_msg(LEVEL.INFO, msg)
 
 
+def W(msg):
+    """Log a warning"""
+    Logger.log_warning(msg)
+
+
 def D(msg):
     """Log a debug message"""
     Logger.log_msg(LEVEL.DEBUG, msg)
@@ -141,47 +171,32 @@ def X(msg):
     """Log an extremely detailed message"""
     Logger.log_msg(LEVEL.EXTREME, msg)
 
-class CaptureStdout(object):
-    """
-        Context Manager class to capture stdout from python statements
-    """
-    def __init__(self, debuggable, header):
-        self.debuggable = debuggable
-        self.header = header
-        self.orig_stdout = sys.stdout
-        self.stream = io.StringIO()
-
-    def __enter__(self):
-        sys.stdout = self.stream
-        return self
-
-    def __exit__(self, var_type, var_value, traceback):
-        if self.stream.getvalue():
-            # Only print if something was captured
-            self.debuggable.debug(self.header)
-            for line in self.stream.getvalue().splitlines():
-                self.debuggable.debug(line)
-        del self.stream
-        sys.stdout = self.orig_stdout
-
 class Debuggable(object):
     """
         Implements shared logic for debugging in a specific context
+
+        Debug records are stored unformatted in a bounded ring buffer, and only formatted when the
+        log is read; so a disabled log costs a single flag check per call.
     """
 
-    def __init__(self, debug_mode=False):
+    def __init__(self, debug_mode=False, log_size=DEBUG_LOG_SIZE):
         """
             Initialize the class
         """
         self._debuggable = Util.Container(
             enabled=debug_mode,
-            text=""
+            records=collections.deque(maxlen=log_size)
             )
 
-    def debug(self, debug_text):
-        """Write text to the debug log"""
+    def debug(self, fmt, *args):
+        """
+            Write a record to the debug log
+
+            @param fmt Text of the record, or a str.format() string if args are given
+            @note args are formatted when the log is read, so they should not be mutated
+        """
         if self._debuggable.enabled:
-            self._debuggable.text += "\n  " + debug_text
+            self._debuggable.records.append((fmt, args))
 
     def link_debug_log(self, parent):
         """Link this object's debug log to the parent"""
@@ -194,4 +209,9 @@ class Debuggable(object):
 
     def get_debug_log(self):
         """Return the cached debug log from this object"""
-        return self._debuggable.text
+        text = []
+        for fmt, args in self._debuggable.records:
+            if args:
+                fmt = fmt.format(*args)
+            text.append("\n  " + fmt)
+        return "".join(text)
@@ -35,6 +35,15 @@ import os
 
 from GlobifestLib import Util
 
+class ConfigBlock(Util.Record):
+    """
+        A config block of a manifest
+
+        definition_abs and def_tree are only set when the manifest is parsed with definitions.
+    """
+
+    __slots__ = ("definition", "generators", "definition_abs", "def_tree")
+
 class Manifest:
     """
         Encapsulates all information about a manifest file
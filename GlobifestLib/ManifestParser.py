@@ -44,6 +44,7 @@ from GlobifestLib import \
     Generators, \
     LineReader, \
     Log, \
+    Manifest, \
     Matcher, \
     Settings, \
     StatefulParser, \
@@ -72,6 +73,20 @@ PUBLIC_LABELS = [
     "pub_defines"
     ]
 
+# Line regexes, in order of matching
+COMMENT_RE = re.compile("[;#].*")
+DIRECTIVE_RE = re.compile(":.*")
+PARAMETER_RE = re.compile("([a-z_]+)[ \t]+(.*)$")
+
+# Directive regexes (preceding colon and whitespace stripped off), in order of matching
+CONFIG_RE = re.compile("config")
+CONDITION_IF_RE = re.compile("if(.*)")
+CONDITION_ELIF_RE = re.compile("elif(.*)")
+CONDITION_ELSE_RE = re.compile("else$")
+BLOCK_END_RE = re.compile("end$")
+INCLUDE_RE = re.compile("include[ ]+(.*)")
+LABEL_RE = re.compile("([a-z_]+)")
+
 COND_STATE = Util.create_enum(
     "NOT_MET",
     "MET",
@@ -190,7 +205,7 @@ class ConditionContext(Context):
             self.cond_state.transition(COND_STATE.SATISFIED)
         if self.label != self.init_label:
             self.label = self.init_label
-            self.manifest_parser.debug("LABEL: {}".format(self.init_label))
+            self.manifest_parser.debug("LABEL: {}", self.init_label)
 
     def process_conditional_default(self):
         """
@@ -233,7 +248,7 @@ class ConditionContext(Context):
         except Log.GlobifestException:
             # Add line context to this error
             self.manifest_parser.log_error("Failed to evaluate expression")
-        self.manifest_parser.debug("COND EXPR: '{}' = {}".format(expr, result))
+        self.manifest_parser.debug("COND EXPR: '{}' = {}", expr, result)
 
         if self.context_parser.get_remaining_text():
             self.manifest_parser.log_error(
@@ -254,6 +269,11 @@ CONFIG_ELEMENTS = Util.Container(
     definition="definition"
     )
 
+class ConfigCtx(Util.Record):
+    """Context values for a config block"""
+
+    __slots__ = ("definition", "generators")
+
 class ParameterContext(Context):
     """
         Encapsulates contextual information for a parameterized section
@@ -262,7 +282,7 @@ class ParameterContext(Context):
     def __init__(self, manifest_parser, ctype, prev_context=None, line_info=None, ctx=None):
         """Initialize the context"""
         # Set up context-specific values
-        self.ctx = ctx or Util.Container(ctype=None)
+        self.ctx = ctx or ConfigCtx(definition=None, generators=[])
 
         Context.__init__(self, manifest_parser, prev_context, line_info, ctype)
 
@@ -308,9 +328,17 @@ class ParameterContext(Context):
             gen_format = token[0].lower()
             if gen_format in PROHIBITED_GENERATORS:
                 self.manifest_parser.log_error("Format {} is prohibited".format(token[0]))
+            formatter = None
+            if gen_format == Generators.TemplateGenerator.FORMAT_TYPE:
+                # The template precedes the output filename
+                token = token[1].split(" ", 1)
+                if len(token) != 2:
+                    self.manifest_parser.log_error("Incorrect values for parameter: generate")
+                formatter = Util.get_abs_path(token[0], self.manifest_parser.pkg_root)
             generator = Generators.factory(
                 gen_format=gen_format,
-                filename=token[1]
+                filename=token[1],
+                formatter=formatter
             )
 
             if generator is None:
@@ -333,7 +361,7 @@ class ParameterContext(Context):
             # No additional validation required for these elements
             self.ctx[CONFIG_ELEMENTS[name]] = value
         else:
-            self.manifest_parser.debug("not found: {}".format(name))
+            self.manifest_parser.debug("not found: {}", name)
 
     def validate_config(self):
         """Validate the final state of a config context"""
@@ -360,34 +388,6 @@ class ManifestParser(Log.Debuggable):
         top_context = ConditionContext(manifest_parser=self)
         self.context_stack = [top_context]
 
-        regex_flags = 0
-        if Log.Logger.has_level(Log.LEVEL.EXTREME):
-            regex_flags = re.DEBUG
-
-        # line regexes, in order of matching
-        with Log.CaptureStdout(self, "COMMENT_RE:"):
-            self.comment_re = re.compile("[;#].*", regex_flags)
-        with Log.CaptureStdout(self, "DIRECTIVE_RE:"):
-            self.directive_re = re.compile(":.*", regex_flags)
-        with Log.CaptureStdout(self, "PARAMETER_RE:"):
-            self.parameter_re = re.compile("([a-z_]+)[ \t]+(.*)$", regex_flags)
-
-        # directive regexes (preceding colon and whitespace stripped off), in order of matching
-        with Log.CaptureStdout(self, "CONFIG_RE:"):
-            self.config_re = re.compile("config", regex_flags)
-        with Log.CaptureStdout(self, "CONDITION_IF_RE:"):
-            self.condition_if_re = re.compile("if(.*)", regex_flags)
-        with Log.CaptureStdout(self, "CONDITION_ELIF_RE:"):
-            self.condition_elif_re = re.compile("elif(.*)", regex_flags)
-        with Log.CaptureStdout(self, "CONDITION_ELSE_RE:"):
-            self.condition_else_re = re.compile("else$", regex_flags)
-        with Log.CaptureStdout(self, "BLOCK_END_RE:"):
-            self.block_end_re = re.compile("end$", regex_flags)
-        with Log.CaptureStdout(self, "INCLUDE_RE:"):
-            self.include_re = re.compile("include[ ]+(.*)", regex_flags)
-        with Log.CaptureStdout(self, "LABEL_RE:"):
-            self.label_re = re.compile("([a-z_]+)", regex_flags)
-
         for label in self.get_labels():
             self.manifest.add_type(label)
 
@@ -415,7 +415,7 @@ class ManifestParser(Log.Debuggable):
         """
         self.line_info = line_info
         line = line_info.get_text()
-        self.debug("PARSE: {}".format(line))
+        self.debug("PARSE: {}", line)
 
         cur_context = self.context_stack[-1]
         if cur_context.process_line(line):
@@ -425,14 +425,14 @@ class ManifestParser(Log.Debuggable):
         if (not line) or (line == ""):
             # empty
             pass
-        elif m.is_fullmatch(self.comment_re):
+        elif m.is_fullmatch(COMMENT_RE):
             # Skip comments
             pass
-        elif m.is_fullmatch(self.directive_re):
+        elif m.is_fullmatch(DIRECTIVE_RE):
             # Directive: strip off colon to parse
             self._parse_directive(line[1:])
         elif cur_context.has_parameters():
-            if m.is_fullmatch(self.parameter_re):
+            if m.is_fullmatch(PARAMETER_RE):
                 #pylint: disable=E1101
                 cur_context.process_param(m[1], m[2])
             else:
@@ -528,7 +528,7 @@ class ManifestParser(Log.Debuggable):
             if not os.path.isfile(abs_def_file):
                 self.log_error("'{}' is not a file".format(abs_def_file))
 
-        cfg = Util.Container(
+        cfg = Manifest.ConfigBlock(
             definition=context.ctx.definition,
             generators=context.ctx.generators
             )
@@ -549,7 +549,7 @@ class ManifestParser(Log.Debuggable):
             ctype=Context.CTYPE.CONFIG,
             prev_context=parent,
             line_info=self.line_info,
-            ctx=Util.Container(
+            ctx=ConfigCtx(
                 definition=None,
                 generators=[]
             )
@@ -573,7 +573,7 @@ class ManifestParser(Log.Debuggable):
 
         if not self.validate_files:
             # For testing, just add the include file as a source
-            self.debug("ADD_AUX: {}".format(abs_filename))
+            self.debug("ADD_AUX: {}", abs_filename)
             self.manifest.add_entry("aux_files", abs_filename)
             return
 
@@ -614,26 +614,26 @@ class ManifestParser(Log.Debuggable):
             Returns whether the line was parsed successfully
         """
         m = matcher
-        if m.is_fullmatch(self.config_re):
+        if m.is_fullmatch(CONFIG_RE):
             self.debug("CONFIG")
             self._config_start()
-        elif m.is_fullmatch(self.condition_if_re):
-            self.debug("IF: {}".format(m[1]))
+        elif m.is_fullmatch(CONDITION_IF_RE):
+            self.debug("IF: {}", m[1])
             self._condition_start_if(m[1].lstrip())
-        elif m.is_fullmatch(self.condition_elif_re):
-            self.debug("ELIF: {}".format(m[1]))
+        elif m.is_fullmatch(CONDITION_ELIF_RE):
+            self.debug("ELIF: {}", m[1])
             self._condition_start_elif(m[1].lstrip())
-        elif m.is_fullmatch(self.condition_else_re):
+        elif m.is_fullmatch(CONDITION_ELSE_RE):
             self.debug("ELSE")
             self._condition_start_else()
-        elif m.is_fullmatch(self.block_end_re):
+        elif m.is_fullmatch(BLOCK_END_RE):
             self.debug("END")
             self._condition_end()
-        elif m.is_fullmatch(self.include_re):
-            self.debug("INCLUDE: {}".format(m[1]))
+        elif m.is_fullmatch(INCLUDE_RE):
+            self.debug("INCLUDE: {}", m[1])
             self._include_file(m[1])
-        elif m.is_fullmatch(self.label_re):
-            self.debug("LABEL: {}".format(m[1]))
+        elif m.is_fullmatch(LABEL_RE):
+            self.debug("LABEL: {}", m[1])
             # Label directive (:x)
             self._parse_directive_label(m[1])
         else:
@@ -648,7 +648,7 @@ class ManifestParser(Log.Debuggable):
             Returns whether the line was parsed successfully
         """
         m = matcher
-        if m.is_fullmatch(self.block_end_re):
+        if m.is_fullmatch(BLOCK_END_RE):
             self.debug("END")
             self._block_end()
         else:
@@ -692,15 +692,15 @@ class ManifestParser(Log.Debuggable):
 
         # If this is parsed in a condition context, skip over unmatching entries
         if not cur_context.is_condition_met():
-            self.debug("SKIP_ENTRY: {}".format(entry))
+            self.debug("SKIP_ENTRY: {}", entry)
             return
 
         if (cur_context.label in FILE_LABELS) and (self.validate_files):
             for f in glob.iglob(entry):
-                self.debug("ADD_FILE: {}".format(f))
+                self.debug("ADD_FILE: {}", f)
                 self.manifest.add_entry(cur_context.label, f)
         else:
-            self.debug("ADD_ENTRY: {}".format(entry))
+            self.debug("ADD_ENTRY: {}", entry)
             self.manifest.add_entry(cur_context.label, entry)
 
 
@@ -31,6 +31,28 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import contextlib
+import re
+import sys
+
+def dump_grammar(module, pipe=None):
+    """
+        Write the parse tree of each module-level *_RE regex in a module
+
+        This recompiles each regex with re.DEBUG, so it is only intended as a diagnostic.
+
+        @param module The module whose regexes are dumped
+        @param pipe Where to write the output (default stdout)
+    """
+    if pipe is None:
+        pipe = sys.stdout
+    for name, value in vars(module).items():
+        if (not name.endswith("_RE")) or (not isinstance(value, re.Pattern)):
+            continue
+        print("{}.{}:".format(module.__name__.split(".")[-1], name), file=pipe)
+        with contextlib.redirect_stdout(pipe):
+            re.compile(value.pattern, value.flags | re.DEBUG)
+
 class Matcher:
     """
         Helper class to test regex matches in an if/else ladder
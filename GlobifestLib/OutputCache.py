@@ -0,0 +1,103 @@
+#/usr/bin/env python
+"""
+    globifest/OutputCache.py - globifest record of generated files
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import json
+import os
+
+from GlobifestLib import Log
+
+# Name of the record of generated files within the output directory of a project
+OUTPUT_CACHE_FILE = "globifest.outputs"
+
+class OutputCache(object):
+    """
+        Records the files generated in an output directory, along with the key of each
+
+        A file whose key is unchanged since the last build does not need to be generated again,
+        which leaves its modification time untouched.  Files which were generated by the last
+        build, but not by this one, are stale and can be removed.
+    """
+
+    def __init__(self, out_dir):
+        self.out_dir = os.path.abspath(out_dir)
+        self.fname = os.path.join(out_dir, OUTPUT_CACHE_FILE)
+        self.old_outputs = dict()
+        self.outputs = dict()
+
+        try:
+            with open(self.fname, "rt") as f:
+                self.old_outputs = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            Log.I("Ignoring {}: {}".format(self.fname, str(e)))
+
+    def add_output(self, out_file, key):
+        """Record a file generated by this build"""
+        self.outputs[self._get_rel_path(out_file)] = key
+
+    def is_current(self, out_file, key):
+        """Returns whether out_file exists, and was generated with the same key"""
+        rel_path = self._get_rel_path(out_file)
+        return (self.old_outputs.get(rel_path, None) == key) and os.path.isfile(out_file)
+
+    def remove_stale(self):
+        """
+            Remove files generated by the last build which were not generated by this build
+
+            @return list of the files removed
+        """
+        removed = []
+        for rel_path in self.old_outputs:
+            if rel_path in self.outputs:
+                continue
+            out_file = os.path.join(self.out_dir, rel_path)
+            try:
+                os.remove(out_file)
+            except FileNotFoundError:
+                continue
+            removed.append(out_file)
+        return removed
+
+    def save(self):
+        """Save the files generated by this build, for the next build"""
+        tmp_fname = "{}.tmp".format(self.fname)
+        with open(tmp_fname, "wt") as f:
+            json.dump(self.outputs, f, indent=1, sort_keys=True)
+        os.replace(tmp_fname, self.fname)
+
+    def _get_rel_path(self, out_file):
+        """Returns the path of out_file relative to the output directory"""
+        return os.path.relpath(os.path.abspath(out_file), start=self.out_dir)
+
+new = OutputCache
@@ -38,6 +38,21 @@ ROOT = Util.create_enum(
     "SOURCE"
     )
 
+class LayerRef(Util.Record):
+    """A layer of a project, with its variants in the order they were added"""
+
+    __slots__ = ("name", "variants")
+
+class PackageRef(Util.Record):
+    """A package (manifest) of a project, and where its files are found"""
+
+    __slots__ = ("filename", "file_root", "module_root", "module_id")
+
+class VariantRef(Util.Record):
+    """A variant of a layer, and the config file which defines it"""
+
+    __slots__ = ("name", "filename", "config")
+
 class Project(object):
     """
         Encapsulates information necessary to build with various configurations.
@@ -69,7 +84,7 @@ class Project(object):
 
     def add_layer(self, layer_name):
         """Push a new layer onto the stack"""
-        layer_ref = Util.Container(
+        layer_ref = LayerRef(
             name=layer_name,
             variants=list()
             )
@@ -85,7 +100,7 @@ class Project(object):
                                 be found.
             @param module_id    Name (identifier) of the dependency for ROOT.DEPENDENCY values.
         """
-        self.packages.append(Util.Container(
+        self.packages.append(PackageRef(
             filename=filename,
             file_root=file_root,
             module_root=module_root,
@@ -96,7 +111,7 @@ class Project(object):
         """Add a new variant into the layer"""
         layer_ref = self._get_layer_ref(layer_name)
         if layer_ref is not None:
-            variant_ref = Util.Container(
+            variant_ref = VariantRef(
                 name=variant_name,
                 filename=filename,
                 config=Util.Container()
@@ -43,6 +43,26 @@ from GlobifestLib import \
 
 IDENTIFIER_NAME = "[a-zA-Z0-9_]+"
 
+# Line regexes, in order of matching
+COMMENT_RE = re.compile("[;#].*")
+DIRECTIVE_RE = re.compile(":.*")
+
+# Directive regexes (preceding colon and whitespace stripped off), in order of matching
+BLOCK_END_RE = re.compile("end$")
+PROJECT_RE = re.compile("project[ \t]+(" + IDENTIFIER_NAME + ")$")
+LAYER_RE = re.compile("layer[ \t]+(" + IDENTIFIER_NAME + ")$")
+DEPENDENCY_RE = re.compile("dependency[ \t]+(" + IDENTIFIER_NAME + ")$")
+PACKAGE_RE = re.compile("package[ \t]+(.+)$")
+EXT_PACKAGE_RE = re.compile("ext_package[ \t]+(" + IDENTIFIER_NAME + ")[ \t]+(.+)$")
+LCL_PACKAGE_RE = re.compile("lcl_package[ \t]+(" + IDENTIFIER_NAME + ")[ \t]+(.+)$")
+INCLUDE_RE = re.compile("include[ ]+(.*)")
+
+# Block parameter regex
+PARAM_RE = re.compile("(" + IDENTIFIER_NAME + ")[ \t]+(.+)")
+
+# Parameter value regexes
+IDENTIFIER_RE = re.compile(IDENTIFIER_NAME)
+
 # Map of unique Layer element strings to Context.ctx member names in no particular order
 LAYER_ELEMENTS = Util.Container(
     # "variant" is not unique, so not present in this list
@@ -50,6 +70,26 @@ LAYER_ELEMENTS = Util.Container(
     suffix="suffix"
     )
 
+class TopCtx(Util.Record):
+    """Context values for the top (file-scope) nesting level"""
+
+    __slots__ = ("ctype",)
+
+class DependencyCtx(Util.Record):
+    """Context values for a dependency block"""
+
+    __slots__ = ("ctype", "dependency_name", "actions")
+
+class LayerCtx(Util.Record):
+    """Context values for a layer block"""
+
+    __slots__ = ("ctype", "layer_name", "variants", "prefix", "suffix")
+
+class ProjectCtx(Util.Record):
+    """Context values for a project block"""
+
+    __slots__ = ("ctype", "prj_name")
+
 class Context(object):
     """
         Encapsulates contextual information for a nesting level
@@ -78,7 +118,7 @@ class Context(object):
         self.prev_context = prev_context
 
         # Set up context-specific values
-        self.ctx = ctx or Util.Container(ctype=None)
+        self.ctx = ctx or TopCtx(ctype=None)
         assert hasattr(self.ctx, "ctype")
 
     def get_ctype(self):
@@ -127,7 +167,7 @@ class Context(object):
         if action is not None:
             self.ctx.actions.append(action)
         else:
-            self.project_parser.debug("not found: {}".format(name))
+            self.project_parser.debug("not found: {}", name)
 
     def process_param_layer(self, name, value):
         """Process a layer parameter"""
@@ -135,7 +175,7 @@ class Context(object):
             self.project_parser.log_error("Bad parameter: {}".format(value))
 
         if name == "variant":
-            if re.fullmatch(IDENTIFIER_NAME, value):
+            if IDENTIFIER_RE.fullmatch(value):
                 self.ctx.variants.append(value)
             else:
                 self.project_parser.log_error("Invalid identifier: {}".format(value))
@@ -143,7 +183,7 @@ class Context(object):
             # No additional validation required for these elements
             self.ctx[LAYER_ELEMENTS[name]] = value
         else:
-            self.project_parser.debug("not found: {}".format(name))
+            self.project_parser.debug("not found: {}", name)
 
     def validate_dependency(self):
         """Validate the final state of a dependency context"""
@@ -186,59 +226,11 @@ class ProjectParser(Log.Debuggable):
         top_context = Context(project_parser=self)
         self.context_stack = [top_context]
         self.prj_root = os.path.dirname(project.get_filename())
+        self.included_files = []
 
-        regex_flags = 0
-        if Log.Logger.has_level(Log.LEVEL.EXTREME):
-            regex_flags = re.DEBUG
-
-        # line regexes, in order of matching
-        with Log.CaptureStdout(self, "COMMENT_RE:"):
-            self.comment_re = re.compile("[;#].*", regex_flags)
-        with Log.CaptureStdout(self, "DIRECTIVE_RE:"):
-            self.directive_re = re.compile(":.*", regex_flags)
-
-        # directive regexes (preceding colon and whitespace stripped off), in order of matching
-        with Log.CaptureStdout(self, "BLOCK_END_RE:"):
-            self.block_end_re = re.compile("end$", regex_flags)
-        with Log.CaptureStdout(self, "PROJECT_RE:"):
-            self.project_re = re.compile(
-                "project[ \t]+(" + IDENTIFIER_NAME + ")$",
-                regex_flags
-                )
-        with Log.CaptureStdout(self, "LAYER_RE:"):
-            self.layer_re = re.compile(
-                "layer[ \t]+(" + IDENTIFIER_NAME + ")$",
-                regex_flags
-                )
-        with Log.CaptureStdout(self, "DEPENDENCY_RE:"):
-            self.dependency_re = re.compile(
-                "dependency[ \t]+(" + IDENTIFIER_NAME + ")$",
-                regex_flags
-                )
-        with Log.CaptureStdout(self, "PACKAGE_RE:"):
-            self.package_re = re.compile(
-                "package[ \t]+(.+)$",
-                regex_flags
-                )
-
-        with Log.CaptureStdout(self, "EXT_PACKAGE_RE:"):
-            self.ext_package_re = re.compile(
-                "ext_package[ \t]+(" + IDENTIFIER_NAME + ")[ \t]+(.+)$",
-                regex_flags
-                )
-
-        with Log.CaptureStdout(self, "LCL_PACKAGE_RE:"):
-            self.lcl_package_re = re.compile(
-                "lcl_package[ \t]+(" + IDENTIFIER_NAME + ")[ \t]+(.+)$",
-                regex_flags
-                )
-
-        with Log.CaptureStdout(self, "INCLUDE_RE:"):
-            self.include_re = re.compile("include[ ]+(.*)", regex_flags)
-
-        # Block parameter regex
-        with Log.CaptureStdout(self, "BLOCK_PARAM_RE::"):
-            self.param_re = re.compile("(" + IDENTIFIER_NAME + ")[ \t]+(.+)", regex_flags)
+    def get_included_files(self):
+        """Returns a list of the absolute paths of files included while parsing"""
+        return self.included_files
 
     def get_target(self):
         """Returns the target Project which is being parsed"""
@@ -258,7 +250,7 @@ class ProjectParser(Log.Debuggable):
         """
         self.line_info = line_info
         line = line_info.get_text()
-        self.debug("PARSE: {}".format(line))
+        self.debug("PARSE: {}", line)
 
         cur_context = self.context_stack[-1]
 
@@ -266,13 +258,13 @@ class ProjectParser(Log.Debuggable):
         if (not line) or (line == ""):
             # empty
             pass
-        elif m.is_fullmatch(self.comment_re):
+        elif m.is_fullmatch(COMMENT_RE):
             # Skip comments
             pass
-        elif m.is_fullmatch(self.directive_re):
+        elif m.is_fullmatch(DIRECTIVE_RE):
             # Directive: strip off colon to parse
             self._parse_directive(line[1:])
-        elif m.is_fullmatch(self.param_re):
+        elif m.is_fullmatch(PARAM_RE):
             cur_context.process_param(m[1], m[2].rstrip())
         else:
             self.log_error("Bad grammar: cannot parse {}".format(line_info))
@@ -338,7 +330,7 @@ class ProjectParser(Log.Debuggable):
             project_parser=self,
             prev_context=cur_context,
             line_info=self.line_info,
-            ctx=Util.Container(
+            ctx=DependencyCtx(
                 ctype=Context.CTYPE.DEPENDENCY,
                 dependency_name=name,
                 actions=[]
@@ -351,6 +343,7 @@ class ProjectParser(Log.Debuggable):
             Include the contents of another file as if it was directly placed in this file
         """
         abs_filename = Util.get_abs_path(filename, self.prj_root)
+        self.included_files.append(abs_filename)
 
         # Save the project root so that files paths can be relative to the included file
         old_prj_root = self.prj_root
@@ -392,7 +385,7 @@ class ProjectParser(Log.Debuggable):
             project_parser=self,
             prev_context=cur_context,
             line_info=self.line_info,
-            ctx=Util.Container(
+            ctx=LayerCtx(
                 ctype=Context.CTYPE.LAYER,
                 layer_name=name,
                 variants=[], # Initially empty list
@@ -409,7 +402,7 @@ class ProjectParser(Log.Debuggable):
         if ctype not in [Context.CTYPE.PROJECT]:
             self.log_error("ext_package is not allowed in this scope")
 
-        self.debug("  {} @ DEP:{}".format(name, path))
+        self.debug("  {} @ DEP:{}", name, path)
         self.project.add_package(path, file_root=self.project.ROOT.DEPENDENCY, module_id=name)
 
     def _lcl_package(self, name, path):
@@ -419,7 +412,7 @@ class ProjectParser(Log.Debuggable):
         if ctype not in [Context.CTYPE.PROJECT]:
             self.log_error("lcl_package is not allowed in this scope")
 
-        self.debug("  {} @ SRC:{}".format(name, path))
+        self.debug("  {} @ SRC:{}", name, path)
         self.project.add_package(path, module_root=self.project.ROOT.DEPENDENCY, module_id=name)
 
     def _package(self, path):
@@ -429,7 +422,7 @@ class ProjectParser(Log.Debuggable):
         if ctype not in [Context.CTYPE.PROJECT]:
             self.log_error("package is not allowed in this scope")
 
-        self.debug("  {}".format(path))
+        self.debug("  {}", path)
         self.project.add_package(path)
 
     def _project_end(self, context):
@@ -463,12 +456,12 @@ class ProjectParser(Log.Debuggable):
             project_parser=self,
             prev_context=cur_context,
             line_info=self.line_info,
-            ctx=Util.Container(
+            ctx=ProjectCtx(
                 ctype=Context.CTYPE.PROJECT,
                 prj_name=name
                 )
             )
-        self.debug("  {}".format(name))
+        self.debug("  {}", name)
         self.context_stack.append(new_context)
 
     def _parse_directive(self, text):
@@ -477,28 +470,28 @@ class ProjectParser(Log.Debuggable):
         """
         m = Matcher.new(text)
 
-        if m.is_fullmatch(self.layer_re):
-            self.debug("LAYER: {}".format(m[1]))
+        if m.is_fullmatch(LAYER_RE):
+            self.debug("LAYER: {}", m[1])
             self._layer_start(m[1])
-        elif m.is_fullmatch(self.dependency_re):
-            self.debug("DEPENDENCY: {}".format(m[1]))
+        elif m.is_fullmatch(DEPENDENCY_RE):
+            self.debug("DEPENDENCY: {}", m[1])
             self._dependency_start(m[1])
-        elif m.is_fullmatch(self.project_re):
-            self.debug("PROJECT: {}".format(m[1]))
+        elif m.is_fullmatch(PROJECT_RE):
+            self.debug("PROJECT: {}", m[1])
             self._project_start(m[1])
-        elif m.is_fullmatch(self.package_re):
-            self.debug("PACKAGE: {}".format(m[1]))
+        elif m.is_fullmatch(PACKAGE_RE):
+            self.debug("PACKAGE: {}", m[1])
             self._package(m[1])
-        elif m.is_fullmatch(self.ext_package_re):
-            self.debug("EXTERNAL PACKAGE: {}".format(m[1]))
+        elif m.is_fullmatch(EXT_PACKAGE_RE):
+            self.debug("EXTERNAL PACKAGE: {}", m[1])
             self._ext_package(m[1], m[2])
-        elif m.is_fullmatch(self.lcl_package_re):
-            self.debug("LOCAL PACKAGE: {}".format(m[1]))
+        elif m.is_fullmatch(LCL_PACKAGE_RE):
+            self.debug("LOCAL PACKAGE: {}", m[1])
             self._lcl_package(m[1], m[2])
-        elif m.is_fullmatch(self.block_end_re):
+        elif m.is_fullmatch(BLOCK_END_RE):
             self.debug("END")
             self._block_end()
-        elif m.is_fullmatch(self.include_re):
+        elif m.is_fullmatch(INCLUDE_RE):
             self.debug("INCLUDE")
             self._include_file(m[1])
         elif not m.found:
@@ -0,0 +1,219 @@
+#/usr/bin/env python
+"""
+    globifest/Scheduler.py - globifest scheduler for generator jobs
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import concurrent.futures
+import os
+import threading
+
+from GlobifestLib import FormatterPool, Log, Util
+
+class DependencyScheduler(object):
+    """
+        Sets up external dependencies on a pool of threads, while the caller continues
+
+        Messages from each setup are prefixed with the name of its dependency.  The first failure
+        cancels the setups which have not finished, and is raised by wait() or wait_all().
+    """
+
+    def __init__(self, jobs=1):
+        self.jobs = max(1, jobs)
+        self.dependencies = []
+        self.futures = dict()
+        self.cancel_event = threading.Event()
+        self.error = None
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def add_dependency(self, dependency, out_dir):
+        """Add a dependency to set up in out_dir"""
+        self.dependencies.append((dependency, out_dir))
+
+    def cancel(self):
+        """Stop the setups which have not finished"""
+        self.cancel_event.set()
+        with self.lock:
+            for future in self.futures.values():
+                future.cancel()
+
+    def shutdown(self):
+        """Cancel the setups which have not finished, and wait for the others to stop"""
+        if self.pool:
+            self.cancel()
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def start(self):
+        """Start setting up all of the dependencies"""
+        if not self.dependencies:
+            return
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs)
+        with self.lock:
+            for dependency, out_dir in self.dependencies:
+                self.futures[dependency.get_name()] = self.pool.submit(
+                    self._setup, dependency, out_dir
+                    )
+
+    def wait(self, name):
+        """Wait for a dependency to be set up, and fail if any setup failed"""
+        future = self.futures.get(name, None)
+        if future:
+            concurrent.futures.wait([future])
+        self._check_error()
+
+    def wait_all(self):
+        """Wait for all of the dependencies to be set up, and fail if any setup failed"""
+        concurrent.futures.wait(list(self.futures.values()))
+        self._check_error()
+
+    def _check_error(self):
+        """Raise the first failure"""
+        if self.error is None:
+            return
+        name, err = self.error
+        if isinstance(err, Log.GlobifestException):
+            # Already logged
+            raise err
+        Log.E("{}: Error setting up dependency: {}".format(name, err))
+
+    def _setup(self, dependency, out_dir):
+        """Set up a dependency on a worker thread"""
+        name = dependency.get_name()
+        Log.Logger.set_prefix("[{}] ".format(name))
+        try:
+            Log.I("Checking dependency {}...".format(name))
+            os.makedirs(out_dir, exist_ok=True)
+            dependency.setup(out_dir, self.cancel_event)
+        except Exception as e: # pylint: disable=W0703
+            with self.lock:
+                if self.error is None:
+                    self.error = (name, e)
+            self.cancel()
+        finally:
+            Log.Logger.set_prefix("")
+
+class GeneratorJob(Util.Record):
+    """A generator to run with its definitions, and the package it belongs to"""
+
+    __slots__ = ("package", "generator", "definitions", "out_dir")
+
+class Scheduler(object):
+    """
+        Collects generator jobs while packages are processed, and runs them afterwards
+
+        With more than one job, the generators run on a pool of threads.  Generators accepted by
+        the formatter pool (if any) run in its worker processes instead, alongside the others.
+        Every job is run even if others fail, and each failure is reported with its package
+        before the build fails.
+    """
+
+    def __init__(self, jobs=1, formatter_pool=None):
+        self.jobs = max(1, jobs)
+        self.formatter_pool = formatter_pool
+        self.queue = []
+
+    def add_job(self, package, generator, definitions, out_dir):
+        """Add a generator to run"""
+        self.queue.append(GeneratorJob(
+            package=package,
+            generator=generator,
+            definitions=definitions,
+            out_dir=out_dir
+            ))
+
+    def get_jobs(self):
+        """Return the list of jobs which have not been run"""
+        return self.queue
+
+    def run(self):
+        """Run all of the jobs, and fail if any of them failed"""
+        queue = self.queue
+        self.queue = []
+        if not queue:
+            return
+
+        # Start the out-of-process jobs first, so they run while the others do
+        futures = [self._submit(job) for job in queue]
+        local_queue = [job for job, future in zip(queue, futures) if future is None]
+
+        if self.jobs == 1:
+            local_errors = [_get_error(job) for job in local_queue]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                local_errors = list(pool.map(_get_error, local_queue))
+
+        local_errors = iter(local_errors)
+        errors = [
+            next(local_errors) if future is None else FormatterPool.get_error(future)
+            for future in futures
+            ]
+
+        failures = 0
+        for job, err in zip(queue, errors):
+            if err is None:
+                continue
+            failures += 1
+            Log.E(
+                "{}: Error generating {}: {}".format(job.package, job.generator.get_filename(), err),
+                is_fatal=False
+                )
+        if failures:
+            Log.E("{} of {} generators failed".format(failures, len(queue)))
+
+    def _submit(self, job):
+        """Submit a job to the formatter pool, and return its Future; or None if not accepted"""
+        if (self.formatter_pool is None) or (not self.formatter_pool.accepts(job.generator)):
+            return None
+        _prepare_job(job)
+        return self.formatter_pool.submit(job.generator, job.definitions, job.out_dir)
+
+def _prepare_job(job):
+    """Log a generator job, and create its output directory"""
+    gen = job.generator
+    if gen.get_formatter():
+        Log.I("      Executing {}".format(gen.get_formatter()))
+    os.makedirs(os.path.dirname(gen.get_output_file()), exist_ok=True)
+
+def run_job(job):
+    """Run a generator job"""
+    _prepare_job(job)
+    job.generator.generate(job.definitions, job.out_dir)
+
+def _get_error(job):
+    """Run a generator job, and return the exception it raised or None"""
+    try:
+        run_job(job)
+    except Exception as e: # pylint: disable=W0703
+        return e
+    return None
+
+new = Scheduler
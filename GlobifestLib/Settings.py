@@ -32,9 +32,20 @@
 """
 
 import re
+import weakref
 
 from GlobifestLib import BoundedStatefulParser, Log, Matcher, StatefulParser, Util
 
+# Expression token regexes, matching a token at the start of the expression and the remainder
+IDENT_TOKEN_RE = re.compile(r"^([a-zA-Z_0-9]+)(.*)")
+INT_TOKEN_RE = re.compile(r"^([0-9\-]+)(.*)")
+OP_TOKEN_RE = re.compile(r"^(!=|==|=|!|<=|<|>=|>|&&|\|\|)(.*)")
+WHITESPACE_TOKEN_RE = re.compile(r"^\s+(.*)")
+
+# Config value regexes
+IDENT_RE = re.compile(r"[a-zA-Z_0-9]+")
+STRING_CONFIG_RE = re.compile("^\"(.*)\"$")
+
 class TokenBase(object):
     """
         Base class for all logical tokens to be evaluated
@@ -101,7 +112,6 @@ class IdentToken(TokenBase):
     """
 
     TOKEN_TYPE = "identifier"
-    STRING_CONFIG_RE = re.compile("^\"(.*)\"$")
 
     def __init__(self, ident, settings):
         self.ident = ident
@@ -136,13 +146,13 @@ class IdentToken(TokenBase):
                 mapped_ident = RESERVED_IDENT_MAP[lookup_val]
                 lookup_val = mapped_ident[RESERVED_IDENT.VALUE]
                 self.ident_class = mapped_ident[RESERVED_IDENT.CLASS]
-            elif m.is_fullmatch(self.STRING_CONFIG_RE):
+            elif m.is_fullmatch(STRING_CONFIG_RE):
                 lookup_val = m[1]
                 self.ident_class = StringToken
             elif lookup_val.isnumeric():
                 lookup_val = int(lookup_val)
                 self.ident_class = IntToken
-            elif m.is_fullmatch(settings.ident_re):
+            elif m.is_fullmatch(IDENT_RE):
                 # Value is an identifier, look up its value
                 self._lookup_ident_value(lookup_val, settings)
                 return
@@ -212,15 +222,12 @@ class OpUnaryBase(OpBase):
         tok = self.tokens[0]
         arg = tok.get_value()
         self._eval_check_type(base_type)
-        self.debug("OP EVAL: {} {}({})".format(
-            self.OP_TEXT,
-            tok.get_name(),
-            str(arg),
-            ))
-        self.debug("  EXPR=" + self._eval_get_expr())
-        self.debug("  arg={}({})".format(arg, type(arg)))
+        if self.get_debug_mode():
+            self.debug("OP EVAL: {} {}({})", self.OP_TEXT, tok.get_name(), arg)
+            self.debug("  EXPR={}", self._eval_get_expr())
+            self.debug("  arg={}({})", arg, type(arg))
         result = eval(self._eval_get_expr())
-        self.debug("RESULT: {}".format(result))
+        self.debug("RESULT: {}", result)
         return result
 
 class OpBinaryBase(OpBase):
@@ -280,19 +287,13 @@ class OpBinaryBase(OpBase):
         arg2 = tok2.get_value()
 
         self._eval_check_types()
-        self.debug("OP EVAL: {}({}) {} {}({})".format(
-            tok1.get_name(),
-            str(arg1),
-            self.OP_TEXT,
-            tok2.get_name(),
-            str(arg2)
-            ))
-        self.debug("  EXPR=" + self._eval_get_expr())
-        self.debug("  arg1={}({})".format(arg1, type(arg1)))
-        self.debug("  arg2={}({})".format(arg2, type(arg2)))
-        self.debug("  ACTUAL EXPR={}".format(self._eval_get_expr()))
+        if self.get_debug_mode():
+            self.debug("OP EVAL: {}({}) {} {}({})", tok1.get_name(), arg1, self.OP_TEXT, tok2.get_name(), arg2)
+            self.debug("  EXPR={}", self._eval_get_expr())
+            self.debug("  arg1={}({})", arg1, type(arg1))
+            self.debug("  arg2={}({})", arg2, type(arg2))
         result = eval(self._eval_get_expr())
-        self.debug("RESULT: {}".format(result))
+        self.debug("RESULT: {}", result)
         return result
 
 class OpInverse(OpUnaryBase):
@@ -424,18 +425,29 @@ class Settings(Log.Debuggable):
     def __init__(self, configs=Util.Container(), debug_mode=False):
         Log.Debuggable.__init__(self, debug_mode)
 
+        # Incremented on every change, and objects to notify of changed identifiers
+        self.version = 0
+        self.listeners = weakref.WeakSet()
+
         # Add the configs through extend() for validation
         self.configs = Util.Container()
-        self.extend(configs)
+        if configs:
+            self.extend(configs)
 
-        self.ident_re = re.compile(r"^([a-zA-Z_0-9]+)(.*)")
-        self.int_re = re.compile(r"^([0-9\-]+)(.*)")
-        self.op_re = re.compile(r"^(!=|==|=|!|<=|<|>=|>|&&|\|\|)(.*)")
-        self.whitespace_re = re.compile(r"^\s+(.*)")
         self.implicit_configs = Util.Container()
 
         self.expr = None
 
+    def __getstate__(self):
+        # Listeners are not part of the value, and weak references cannot be pickled
+        state = self.__dict__.copy()
+        del state["listeners"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.listeners = weakref.WeakSet()
+
     def __str__(self):
         outstr = "Configs:\n" + str(self.configs)
         return outstr
@@ -444,9 +456,19 @@ class Settings(Log.Debuggable):
         """Add implicit configuration settings"""
         for k, v in new_configs:
             if k in RESERVED_IDENT_MAP:
-                self.Logs.E("Identifier {} is reserved".format(k))
-            else:
+                Log.E("Identifier {} is reserved".format(k))
+            elif self.implicit_configs.get(k, None) != v:
                 self.implicit_configs[k] = v
+                self.version += 1
+
+    def add_listener(self, listener):
+        """
+            Add a listener to be notified when a value changes
+
+            The listener's on_settings_changed(settings, name) method is called after each change.
+            Listeners are weakly referenced, so shared settings do not keep them alive.
+        """
+        self.listeners.add(listener)
 
     def extend(self, new_configs):
         """
@@ -456,14 +478,19 @@ class Settings(Log.Debuggable):
             extended.
         """
         if isinstance(new_configs, Settings):
-            new_configs = new_configs.configs
+            new_configs = new_configs.get_configs()
             self.add_implicit_configs(new_configs)
 
         for k, v in new_configs:
             if k in RESERVED_IDENT_MAP:
-                self.Logs.E("Identifier {} is reserved".format(k))
+                Log.E("Identifier {} is reserved".format(k))
             else:
                 self.configs[k] = v
+                self._notify_changed(k)
+
+    def get_configs(self):
+        """Returns a Container of the explicit (non-implicit) configuration values"""
+        return self.configs
 
     def get_value(self, name):
         """Returns the configuration value of the identifier"""
@@ -472,6 +499,10 @@ class Settings(Log.Debuggable):
         except KeyError:
             return self.implicit_configs[name]
 
+    def get_version(self):
+        """Returns a number which changes whenever any value changes"""
+        return self.version
+
     def has_value(self, name):
         """Returns whether the identifier is in the configuration"""
         return (name in self.configs) or (name in self.implicit_configs)
@@ -509,19 +540,19 @@ class Settings(Log.Debuggable):
             # Identify the next token
             m = Matcher.new(self.expr)
 
-            if m.is_fullmatch(self.whitespace_re):
+            if m.is_fullmatch(WHITESPACE_TOKEN_RE):
                 self.expr = m[1]
                 continue
 
-            if m.is_fullmatch(self.int_re):
-                self.debug("INT: " + m[1])
+            if m.is_fullmatch(INT_TOKEN_RE):
+                self.debug("INT: {}", m[1])
                 if tok:
                     Log.E("Unexpected integer '{}'".format(m[1]))
                 tok = IntToken(m[1])
                 self.expr = m[2]
                 continue
 
-            if m.is_fullmatch(self.ident_re):
+            if m.is_fullmatch(IDENT_TOKEN_RE):
                 if tok:
                     Log.E("Unexpected identifier '{}'".format(m[1]))
                 ident = m[1]
@@ -529,20 +560,21 @@ class Settings(Log.Debuggable):
                     mapped_ident = RESERVED_IDENT_MAP[ident]
                     mapped_class = mapped_ident[RESERVED_IDENT.CLASS]
                     mapped_value = mapped_ident[RESERVED_IDENT.VALUE]
-                    self.debug("RESERVED: {} class={} value={}".format(
+                    self.debug(
+                        "RESERVED: {} class={} value={}",
                         ident,
                         mapped_class.TOKEN_TYPE,
                         mapped_value
-                        ))
+                        )
                     tok = mapped_class(mapped_value)
                 else:
-                    self.debug("IDENT: " + ident)
+                    self.debug("IDENT: {}", ident)
                     tok = IdentToken(m[1], self)
                 self.expr = m[2]
                 continue
 
-            if m.is_fullmatch(self.op_re):
-                self.debug("OP: " + m[1])
+            if m.is_fullmatch(OP_TOKEN_RE):
+                self.debug("OP: {}", m[1])
                 if op is not None:
                     Log.E("Spurious operator '{}' after operator '{}'".format(m[1], op.OP_TEXT))
                 if m[1] == "!":
@@ -579,7 +611,7 @@ class Settings(Log.Debuggable):
                     "(", ")",
                     BOUNDED_PARSER_FLAGS | StatefulParser.FLAGS.MULTI_LEVEL
                     )
-                self.debug("PAREN: " + string_parser.get_parsed_text())
+                self.debug("PAREN: {}", string_parser.get_parsed_text())
                 if StatefulParser.PARSE_STATUS.FINISHED != string_parser.get_status():
                     self.debug(string_parser.get_debug_log())
                     Log.E("Malformed parenthetical in expression: " + self.expr)
@@ -595,7 +627,7 @@ class Settings(Log.Debuggable):
                     )
                 if StatefulParser.PARSE_STATUS.FINISHED != string_parser.get_status():
                     Log.E("Malformed string in expression: " + self.expr)
-                self.debug("STRING DQ: " + string_parser.get_parsed_text())
+                self.debug("STRING DQ: {}", string_parser.get_parsed_text())
                 tok = StringToken(string_parser.get_parsed_text())
                 self.expr = string_parser.get_remaining_text()
                 continue
@@ -608,7 +640,7 @@ class Settings(Log.Debuggable):
                     )
                 if StatefulParser.PARSE_STATUS.FINISHED != string_parser.get_status():
                     Log.E("Malformed string in expression: " + self.expr)
-                self.debug("STRING SQ: " + string_parser.get_parsed_text())
+                self.debug("STRING SQ: {}", string_parser.get_parsed_text())
                 tok = StringToken(string_parser.get_parsed_text())
                 self.expr = string_parser.get_remaining_text()
                 continue
@@ -620,7 +652,7 @@ class Settings(Log.Debuggable):
 
         # Convert lone identifier tokens to their value type for evaluation
         if isinstance(tok, IdentToken):
-            self.debug("convert->{}".format(tok.ident_class.TOKEN_TYPE))
+            self.debug("convert->{}", tok.ident_class.TOKEN_TYPE)
             tok = tok.ident_class(tok.value)
 
         if isinstance(tok, BoolToken):
@@ -635,12 +667,18 @@ class Settings(Log.Debuggable):
         if name in self.implicit_configs:
             Log.E("Cannot set an implicit value")
         self.configs[name] = value
+        self._notify_changed(name)
+
+    def remove_listener(self, listener):
+        """Remove a listener added with add_listener()"""
+        self.listeners.discard(listener)
 
     def undefine(self, name):
         """Undefine a value"""
         if name in self.implicit_configs:
             Log.E("Cannot undefine an implicit value")
         self.configs.pop(name, None)
+        self._notify_changed(name)
 
     def write_sorted(self, fileobj):
         """
@@ -651,4 +689,136 @@ class Settings(Log.Debuggable):
         for v in sorted(self.configs.keys()):
             fileobj.write("{}={}\n".format(v, self.configs[v]))
 
+    def _notify_changed(self, name):
+        """Record a change to the identifier, and notify listeners"""
+        self.version += 1
+        for listener in self.listeners:
+            listener.on_settings_changed(self, name)
+
+class LayeredSettings(Settings):
+    """
+        Settings composed of a stack of layers, without copying any values
+
+        Each layer is a Settings object (such as from Config.get_settings()), which is referenced
+        rather than copied.  Values are resolved from the top (last) layer down, and the result of
+        each lookup is kept in an index until a layer defining that identifier changes.
+    """
+
+    def __init__(self, layers=(), debug_mode=False):
+        Settings.__init__(self, debug_mode=debug_mode)
+        self.layers = []
+        self.index = dict()
+
+        for layer in layers:
+            self.add_layer(layer)
+
+    def __setstate__(self, state):
+        Settings.__setstate__(self, state)
+        for layer in self.layers:
+            layer.add_listener(self)
+
+    def __str__(self):
+        outstr = "Configs:\n" + str(self.get_configs())
+        return outstr
+
+    def add_layer(self, layer):
+        """Add a Settings object as the new top layer"""
+        self.layers.append(layer)
+        layer.add_listener(self)
+        self._invalidate_layer(layer)
+
+    def extend(self, new_configs):
+        """
+            Extend the settings to add/replace values from new_configs
+
+            new_configs is added as a new top layer; Settings objects are referenced rather
+            than copied.
+        """
+        if not isinstance(new_configs, Settings):
+            new_configs = Settings(new_configs)
+        self.add_layer(new_configs)
+
+    def get_configs(self):
+        """
+            Returns a Container of the effective explicit configuration values
+
+            This flattens all layers into a new Container.
+        """
+        configs = Util.Container()
+        for layer in self.layers:
+            configs.update(layer.get_configs())
+        return configs
+
+    def get_layer(self, layer_idx):
+        """Returns the Settings object at the given layer index"""
+        return self.layers[layer_idx]
+
+    def get_layer_index(self, name):
+        """Returns the index of the layer providing the identifier, or -1 if no layer defines it"""
+        layer_idx = self.index.get(name)
+        if layer_idx is None:
+            layer_idx = -1
+            for i in range(len(self.layers) - 1, -1, -1):
+                if name in self.layers[i].configs:
+                    layer_idx = i
+                    break
+            self.index[name] = layer_idx
+        return layer_idx
+
+    def get_value(self, name):
+        """Returns the configuration value of the identifier"""
+        layer_idx = self.get_layer_index(name)
+        if layer_idx < 0:
+            return self.implicit_configs[name]
+        return self.layers[layer_idx].configs[name]
+
+    def has_value(self, name):
+        """Returns whether the identifier is in the configuration"""
+        return (self.get_layer_index(name) >= 0) or (name in self.implicit_configs)
+
+    def on_settings_changed(self, layer, name):
+        """Handle a change to a value within one of the layers"""
+        #pylint: disable=unused-argument
+        self.index.pop(name, None)
+        self.version += 1
+
+    def set_layer(self, layer_idx, layer):
+        """
+            Replace the Settings object at the given layer index
+
+            Only the identifiers defined by the old or new layer are invalidated.
+        """
+        old_layer = self.layers[layer_idx]
+        if old_layer is layer:
+            return
+        old_layer.remove_listener(self)
+        self.layers[layer_idx] = layer
+        layer.add_listener(self)
+        self._invalidate_layer(old_layer)
+        self._invalidate_layer(layer)
+
+    def set_value(self, name, value):
+        """Layered settings are read-only; values must be set in a layer"""
+        Log.E("Cannot set {} in layered settings".format(name))
+
+    def undefine(self, name):
+        """Layered settings are read-only; values must be undefined in a layer"""
+        Log.E("Cannot undefine {} in layered settings".format(name))
+
+    def write_sorted(self, fileobj):
+        """
+            Write the effective configs to fileobj, sorted by key
+
+            This does NOT write implicit configurations
+        """
+        configs = self.get_configs()
+        for v in sorted(configs.keys()):
+            fileobj.write("{}={}\n".format(v, configs[v]))
+
+    def _invalidate_layer(self, layer):
+        """Remove all identifiers defined by the layer from the index"""
+        for k in layer.configs.keys():
+            self.index.pop(k, None)
+        self.version += 1
+
 new = Settings
@@ -0,0 +1,192 @@
+#/usr/bin/env python
+"""
+    globifest/Snapshot.py - globifest snapshot of parsed project inputs
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import hashlib
+import os
+import pickle
+
+from GlobifestLib import Log
+
+# Name of the snapshot file within the output directory of a project
+SNAPSHOT_FILE = "globifest.snapshot"
+
+# Incremented whenever the stored format changes
+FORMAT_VERSION = 2
+
+def get_digest(fname):
+    """Returns the SHA-256 hex digest of a file's contents, or None if it cannot be read"""
+    try:
+        with open(fname, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def get_snapshot_file(out_dir):
+    """Returns the path of the snapshot file for a project output directory"""
+    return os.path.join(out_dir, SNAPSHOT_FILE)
+
+def _get_key(fname):
+    """Returns the key of a filename within a snapshot"""
+    return os.path.normcase(os.path.abspath(fname))
+
+class Snapshot(object):
+    """
+        Parsed definitions, configs and the merged DefForest of a project, stored on disk
+
+        Each entry records the files it was parsed from, and the snapshot records the SHA-256
+        digest of every such input.  When a snapshot is loaded, entries which depend on a
+        changed input are discarded, so unchanged files are not parsed again.
+
+        @note Objects from a snapshot are shared, so they must be treated as read-only.
+    """
+
+    def __init__(self):
+        self.configs = dict()
+        self.def_trees = dict()
+        self.forest = None
+        self.forest_files = []
+        self.inputs = dict()
+        self.modified = False
+
+    def add_config(self, fname, config):
+        """Add a Config parsed from fname"""
+        self.configs[_get_key(fname)] = (config, [fname])
+        self.add_inputs([fname])
+
+    def add_definition(self, fname, def_tree, files):
+        """Add a DefTree parsed from the list of files, starting with fname"""
+        self.def_trees[_get_key(fname)] = (def_tree, files)
+        self.add_inputs(files)
+
+    def add_inputs(self, files):
+        """Record the digest of each file"""
+        for fname in files:
+            self.inputs[_get_key(fname)] = get_digest(fname)
+        self.modified = True
+
+    def get_config(self, fname):
+        """Returns the Config parsed from fname, or None if it is not in the snapshot"""
+        entry = self.configs.get(_get_key(fname), None)
+        return entry and entry[0]
+
+    def get_definition(self, fname):
+        """Returns the DefTree parsed from fname, or None if it is not in the snapshot"""
+        entry = self.def_trees.get(_get_key(fname), None)
+        return entry and entry[0]
+
+    def get_forest(self):
+        """Returns the DefForest set by set_forest(), or None if it is not in the snapshot"""
+        return self.forest
+
+    def get_key(self):
+        """Returns a SHA-256 hex digest of the names and digests of all inputs"""
+        key = hashlib.sha256()
+        for fname, digest in sorted(self.inputs.items()):
+            key.update("{}\0{}\0".format(fname, digest).encode())
+        return key.hexdigest()
+
+    def is_modified(self):
+        """Returns whether the snapshot changed since it was loaded"""
+        return self.modified
+
+    def set_forest(self, forest, files):
+        """
+            Set the merged DefForest of a project
+
+            @param files The project and manifest files which determine the definitions used
+        """
+        self.forest = forest
+        self.forest_files = list(files)
+        self.add_inputs(files)
+
+    def update(self):
+        """
+            Discard the entries which depend on changed inputs
+
+            @return Whether any input changed
+        """
+        changed = set()
+        for fname, digest in self.inputs.items():
+            if get_digest(fname) != digest:
+                changed.add(fname)
+        if not changed:
+            return False
+
+        for entries in (self.configs, self.def_trees):
+            for key, entry in list(entries.items()):
+                if any(_get_key(f) in changed for f in entry[1]):
+                    del entries[key]
+
+        # Any change to a definition, manifest or project may change the forest
+        self.forest = None
+        self.forest_files = []
+
+        for fname in changed:
+            del self.inputs[fname]
+        self.modified = True
+        return True
+
+def load(fname):
+    """
+        Load a snapshot from a file
+
+        @return the Snapshot, with entries for changed inputs discarded; or an empty Snapshot if
+            the file does not exist or is not a compatible snapshot.
+    """
+    try:
+        with open(fname, "rb") as f:
+            version, key, snapshot = pickle.load(f)
+    except Exception as e: # pylint: disable=W0703
+        if not isinstance(e, FileNotFoundError):
+            Log.I("Ignoring snapshot {}: {}".format(fname, str(e)))
+        return Snapshot()
+
+    if (version != FORMAT_VERSION) or (not isinstance(snapshot, Snapshot)):
+        return Snapshot()
+
+    snapshot.modified = False
+    if key != snapshot.get_key():
+        # The snapshot was stored inconsistently, so nothing in it can be trusted
+        return Snapshot()
+    snapshot.update()
+    return snapshot
+
+def save(snapshot, fname):
+    """Save a snapshot to a file, replacing it atomically"""
+    tmp_fname = "{}.tmp".format(fname)
+    with open(tmp_fname, "wb") as f:
+        pickle.dump((FORMAT_VERSION, snapshot.get_key(), snapshot), f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_fname, fname)
+    snapshot.modified = False
+
+new = Snapshot
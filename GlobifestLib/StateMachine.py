@@ -31,7 +31,7 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-from GlobifestLib import Log, Util
+from GlobifestLib import Log
 
 class StateMachine(Log.Debuggable):
     """
@@ -44,26 +44,24 @@ class StateMachine(Log.Debuggable):
         """
         Log.Debuggable.__init__(self, debug_mode)
 
-        self._sm_base = Util.Container(
-            state=init_state,
-            new_state=init_state
-            )
+        self._sm_state = init_state
+        self._sm_new_state = init_state
         self.title = "state"
 
     def _do_state_transition(self):
-        if self._sm_base.new_state != self._sm_base.state:
-            self._sm_base.state = self._sm_base.new_state
+        if self._sm_new_state != self._sm_state:
+            self._sm_state = self._sm_new_state
             return True
 
         return False
 
     def get_state(self):
         """Return the current state"""
-        return self._sm_base.state
+        return self._sm_state
 
     def _get_new_state(self):
         """Return the state pending a transition"""
-        return self._sm_base.new_state
+        return self._sm_new_state
 
     def _set_title(self, text):
         """Set the title of the state machine for debugging"""
@@ -71,9 +69,9 @@ class StateMachine(Log.Debuggable):
 
     def set_state(self, new_state):
         """Set the title of the state machine"""
-        if new_state != self._sm_base.state:
-            self.debug("{}={}->{}".format(self.title, self._sm_base.state, new_state))
-        self._sm_base.new_state = new_state
+        if new_state != self._sm_state:
+            self.debug("{}={}->{}", self.title, self._sm_state, new_state)
+        self._sm_new_state = new_state
 
     def transition(self, new_state):
         """Set the new state and transition immediately"""
@@ -59,9 +59,12 @@ class StatefulParser(StateMachine.Base):
         StateMachine.Base.__init__(self, bool(flags & FLAGS.DEBUG))
 
         self.flags = flags
+        # The buffer is only compacted when new text arrives; on_text() handlers advance the
+        # cursor instead of slicing, and parsed fragments are joined on demand.
         self.text = text
+        self.pos = 0
         self.last_parsed_text = ""
-        self.parsed_text = ""
+        self.parsed = []
         self.status = PARSE_STATUS.INCOMPLETE
         self.err_line = 0
         self.loop_count = 0
@@ -83,7 +86,11 @@ class StatefulParser(StateMachine.Base):
 
     def get_parsed_text(self):
         """Returns all of the text which was matched by the machine"""
-        return self.parsed_text
+        if len(self.parsed) > 1:
+            self.parsed = ["".join(self.parsed)]
+        if self.parsed:
+            return self.parsed[0]
+        return ""
 
     def get_last_parsed_text(self):
         """Returns the last text which was parsed by the machine"""
@@ -91,7 +98,9 @@ class StatefulParser(StateMachine.Base):
 
     def get_remaining_text(self):
         """Returns the text which has not been parsed"""
-        return self.text
+        if self.pos == 0:
+            return self.text
+        return self.text[self.pos:]
 
     def get_status(self):
         """Returns parse status"""
@@ -121,27 +130,34 @@ class StatefulParser(StateMachine.Base):
         if self.get_status() == PARSE_STATUS.FINISHED:
             self.error("Received data after finished parsing")
 
-        self.text += new_text
+        if new_text:
+            # Compact the buffer once per call, rather than on every step
+            self.text = self.get_remaining_text() + new_text
+            self.pos = 0
 
-        self.debug("--parse--")
-        self.debug("state={}".format(self._get_new_state()))
-        self._debug_log_text()
+        debug_mode = self.is_flag_set(FLAGS.DEBUG)
+        if debug_mode:
+            self.debug("--parse--")
+            self.debug("state={}", self._get_new_state())
+            self._debug_log_text()
 
         while self.status != PARSE_STATUS.ERROR:
             self.loop_count += 1
-            self.debug("--loop {}--".format(self.loop_count))
+            if debug_mode:
+                self.debug("--loop {}--", self.loop_count)
 
-            prev_text = self.text
+            prev_pos = self.pos
 
             # Call the concrete implementation to parse it
             self.on_text()
-            self._debug_log_text()
+            if debug_mode:
+                self._debug_log_text()
 
             if self._do_state_transition():
                 # Parse again on state change
                 continue
 
-            if self.text != prev_text:
+            if self.pos != prev_pos:
                 # Parse again on change to remaining text
                 continue
 
@@ -153,26 +169,35 @@ class StatefulParser(StateMachine.Base):
                 # Parsed all required data
                 break
 
-            # No state change, so add all remaining text as parsed
-            self._append_parsed_text(self.text)
-            self.text = ""
+            # No state change, so add all remaining text as parsed; this runs out of data
+            self._advance(len(self.text))
             self.debug("text->parsed")
-
-            if not self.text:
-                # Ran out of data to parse
-                break
+            break
 
         return self.status
 
+    def _advance(self, end, parsed_end=None):
+        """
+            Move the cursor to end, appending the text up to parsed_end as parsed
+
+            @param end Index in self.text of the first character which remains unparsed
+            @param parsed_end Index in self.text where the parsed portion stops (default end)
+        """
+        if parsed_end is None:
+            parsed_end = end
+        self._append_parsed_text(self.text[self.pos:parsed_end])
+        self.pos = end
+
     def _append_parsed_text(self, text):
         self.last_parsed_text = text
-        self.parsed_text += text
+        if text:
+            self.parsed.append(text)
 
     def _complete_parse(self):
         self.status = PARSE_STATUS.FINISHED
         self.debug("--end--")
 
     def _debug_log_text(self):
-        self.debug("text=\"{}\", parsed=\"{}\"".format(self.text, self.parsed_text))
+        self.debug("text=\"{}\", parsed=\"{}\"", self.get_remaining_text(), self.get_parsed_text())
 
 Base = StatefulParser
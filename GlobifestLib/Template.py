@@ -0,0 +1,328 @@
+#/usr/bin/env python
+"""
+    globifest/Template.py - globifest precompiled output templates
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import builtins
+import hashlib
+import re
+import sys
+import threading
+
+from GlobifestLib import DefTree, Log, Util
+
+# Names passed to every template
+TEMPLATE_ARGS = ("PARAMS", "DEFINITIONS", "OUT_FILE", "OUT_DIR")
+
+DIRECTIVE_PREFIX = "%"
+SUBST_RE = re.compile(r"\$\{(.*?)\}")
+FOR_RE = re.compile(r"^for\s+(.+?)\s+in\s+(.+)$")
+
+class TemplateParam(Util.Record):
+    """
+        A parameter as seen by a template
+
+        type is the Globifest data type string (ex: "INT"), implicit is the list of
+        (identifier, value) tuples defined by the parameter, and implicit_id is the identifier
+        of the implicit value which matches value (or None).
+    """
+
+    __slots__ = ("id", "type", "value", "title", "description", "default", "implicit", "implicit_id")
+
+def get_params(definitions):
+    """Returns a list of TemplateParam from a list of DefTree.ParamValue"""
+    params = []
+    for d in definitions:
+        implicit = d.param.get_implicit_values()
+        implicit_id = None
+        for implicit_value in implicit:
+            if d.value == implicit_value[1]:
+                implicit_id = implicit_value[0]
+        params.append(TemplateParam(
+            id=d.param.get_identifier(),
+            type=DefTree.PARAM_TYPE.enum_id[d.param.get_type()],
+            value=d.value,
+            title=d.param.get_title(),
+            description=d.param.get_description(),
+            default=d.param.get_default_value(),
+            implicit=implicit,
+            implicit_id=implicit_id
+            ))
+    return params
+
+class Template(object):
+    """
+        A template compiled into a Python function
+
+        The function takes TEMPLATE_ARGS as keyword arguments, and returns the rendered text.
+    """
+
+    def __init__(self, fname, digest, func, line_map):
+        self.fname = fname
+        self.digest = digest
+        self.func = func
+        self.line_map = line_map
+
+    def get_digest(self):
+        """Returns the SHA-256 hex digest of the template text"""
+        return self.digest
+
+    def render(self, **kwargs):
+        """Returns the rendered text; errors are reported at the template line"""
+        try:
+            return self.func(**kwargs)
+        except Log.GlobifestException:
+            raise
+        except Exception as e: # pylint: disable=W0703
+            Log.E("{}:{}: {}".format(self.fname, self._get_error_line(), str(e)))
+
+    def _get_error_line(self):
+        """Returns the template line of the innermost frame of the current exception"""
+        line = 0
+        tb = sys.exc_info()[2]
+        while tb is not None:
+            if tb.tb_frame.f_code is self.func.__code__:
+                line = self.line_map[tb.tb_lineno - 1]
+            tb = tb.tb_next
+        return line
+
+class TemplateCompiler(object):
+    """
+        Compiles the text of a template into Python source
+
+        Text lines are output as-is, except ${expr} is replaced by str(expr).  Lines starting
+        with % (after leading whitespace) are directives:
+
+            %for <target> in <expr>     Loop, usually over PARAMS
+            %if <expr>                  Conditionals
+            %elif <expr>
+            %else
+            %switch <expr>              Compare a value against lists of words
+            %case <word> [<word>...]    (ex: %case INT FLOAT)
+            %default
+            %end                        Close %for, %if, or %switch
+            %# comment                  Ignored
+            %% text                     Output "% text"
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.line_num = 0
+        self.blocks = []
+        self.switch_count = 0
+        self.source = [
+            "def _render({}):".format(", ".join(TEMPLATE_ARGS)),
+            "    _out = []",
+            "    _append = _out.append"
+            ]
+        # Template line of each source line, for error messages
+        self.line_map = [0, 0, 0]
+
+    def compile(self, text):
+        """Returns the Python source of a function which renders the text"""
+        for line in text.splitlines():
+            self.line_num += 1
+            stripped = line.lstrip()
+            if stripped.startswith(DIRECTIVE_PREFIX * 2):
+                self._compile_text(line.replace(DIRECTIVE_PREFIX * 2, DIRECTIVE_PREFIX, 1))
+            elif stripped.startswith(DIRECTIVE_PREFIX):
+                self._compile_directive(stripped[1:].strip())
+            else:
+                self._compile_text(line)
+
+        if self.blocks:
+            self.line_num = self.blocks[-1].line_num
+            self._error("%{} without %end".format(self.blocks[-1].kind))
+
+        self.line_num = 0
+        self._emit("return \"\".join(_out)")
+        return "\n".join(self.source) + "\n"
+
+    def _check_expr(self, expr):
+        """Raise an error if expr is not a valid expression"""
+        try:
+            compile(expr, self.fname, "eval")
+        except SyntaxError:
+            self._error("Invalid expression '{}'".format(expr))
+
+    def _compile_directive(self, directive):
+        """Compile a directive line, without the prefix"""
+        token = directive.split(None, 1)
+        keyword = token[0] if token else ""
+        arg = token[1] if len(token) == 2 else ""
+
+        if keyword.startswith("#"):
+            pass
+        elif keyword == "for":
+            match = FOR_RE.match(directive)
+            if not match:
+                self._error("Invalid loop '{}'".format(directive))
+            self._check_expr(match.group(1))
+            self._check_expr(match.group(2))
+            self._open_block("for", "for {} in {}:".format(match.group(1), match.group(2)))
+        elif keyword == "if":
+            self._check_expr(arg)
+            self._open_block("if", "if {}:".format(arg))
+        elif keyword == "elif":
+            self._check_expr(arg)
+            self._add_clause("if", keyword, "elif {}:".format(arg))
+        elif keyword == "else":
+            self._add_clause("if", keyword, "else:")
+            self.blocks[-1].has_else = True
+        elif keyword == "switch":
+            self._check_expr(arg)
+            self.switch_count += 1
+            block = Util.Container(
+                kind=keyword,
+                line_num=self.line_num,
+                indented=False,
+                has_else=False,
+                var="_switch{}".format(self.switch_count)
+                )
+            self._emit("{} = {}".format(block.var, arg))
+            self.blocks.append(block)
+        elif keyword == "case":
+            words = arg.split()
+            if not words:
+                self._error("%case without values")
+            self._add_clause("switch", keyword, "if {} in {}:".format(
+                self.blocks[-1].get("var", "") if self.blocks else "",
+                repr(tuple(words))
+                ))
+        elif keyword == "default":
+            self._add_clause("switch", keyword, "else:")
+            self.blocks[-1].has_else = True
+        elif keyword == "end":
+            if not self.blocks:
+                self._error("%end without block")
+            self.blocks.pop()
+        else:
+            self._error("Unknown directive '%{}'".format(keyword))
+
+    def _compile_text(self, line):
+        """Compile a text line, with substitutions"""
+        parts = SUBST_RE.split(line)
+        terms = []
+        for i, part in enumerate(parts):
+            if i % 2:
+                self._check_expr(part)
+                terms.append("_str({})".format(part))
+            elif part:
+                terms.append(repr(part))
+        terms.append(repr("\n"))
+        self._emit("_append({})".format(" + ".join(terms)))
+
+    def _add_clause(self, kind, keyword, statement):
+        """Add a clause to the compound statement of the innermost block"""
+        block = self.blocks[-1] if self.blocks else None
+        if (block is None) or (block.kind != kind):
+            self._error("%{} without %{}".format(keyword, kind))
+        if block.has_else:
+            self._error("%{} after %{}".format(keyword, "else" if kind == "if" else "default"))
+
+        if block.indented:
+            # Continue the chain at the depth of its first clause
+            block.indented = False
+            if statement.startswith("if "):
+                statement = "el" + statement
+        elif statement == "else:":
+            # A switch with only %default
+            statement = "if True:"
+        self._emit(statement)
+        block.indented = True
+        # Clauses may be empty
+        self._emit("pass")
+
+    def _emit(self, statement):
+        """Add a statement at the current depth"""
+        depth = 1 + len([block for block in self.blocks if block.indented])
+        self.source.append("    " * depth + statement)
+        self.line_map.append(self.line_num)
+
+    def _error(self, msg):
+        """Raise an error at the current template line"""
+        Log.E("{}:{}: {}".format(self.fname, self.line_num, msg))
+
+    def _open_block(self, kind, statement):
+        """Add a compound statement, which is closed by %end"""
+        self._emit(statement)
+        self.blocks.append(Util.Container(
+            kind=kind,
+            line_num=self.line_num,
+            indented=True,
+            has_else=False
+            ))
+        # Blocks may be empty
+        self._emit("pass")
+
+def compile_template(text, fname):
+    """Returns a Template compiled from the text of a template file"""
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    compiler = TemplateCompiler(fname)
+    source = compiler.compile(text)
+    namespace = dict(_str=str, __builtins__=builtins)
+    exec(compile(source, "<template {}>".format(fname), "exec"), namespace) # pylint: disable=W0122
+    return Template(fname, digest, namespace["_render"], compiler.line_map)
+
+class TemplateCache(object):
+    """
+        Compiled templates, keyed by the hash of their text
+
+        A template is compiled once, and reused by every output which uses the same text; even
+        from different files, or after a file is touched without being modified.
+    """
+
+    def __init__(self):
+        self.templates = dict()
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """Remove all templates"""
+        with self.lock:
+            self.templates.clear()
+
+    def get(self, fname):
+        """Returns the Template for a file, compiling it if the text has not been seen"""
+        try:
+            with open(fname, "rt") as f:
+                text = f.read()
+        except OSError as e:
+            Log.E("Could not read template {}: {}".format(fname, str(e)))
+
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        with self.lock:
+            template = self.templates.get(digest, None)
+            if template is None:
+                template = compile_template(text, fname)
+                self.templates[digest] = template
+        return template
+
+template_cache = TemplateCache()
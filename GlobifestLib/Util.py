@@ -175,3 +175,94 @@ class Container(dict):
                 del out_dict[k]
 
         return Container(out_dict)
+
+class Record(object):
+    """
+        Compact object with a fixed set of members, declared in __slots__ by each subclass
+
+        Members can be accessed via x.y or x["y"], and the record can be used in place of a
+        Container by existing callbacks; members which have not been set are absent.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+    def __contains__(self, key):
+        return (key in self.__slots__) and hasattr(self, key)
+
+    def __copy__(self):
+        return type(self)(**dict(self.items()))
+
+    def __deepcopy__(self, memo):
+        return type(self)(**copy.deepcopy(dict(self.items()), memo))
+
+    def __eq__(self, other):
+        if isinstance(other, (dict, Record)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __getstate__(self):
+        return dict(self.items())
+
+    def __iter__(self):
+        return iter(self.items())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return "{}({})".format(
+            type(self).__name__,
+            ", ".join("{}={!r}".format(k, v) for k, v in self.items())
+            )
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    __hash__ = None
+    __str__ = Container.__str__
+
+    def get(self, key, default=None):
+        """Return the value of a member, or default if it is not set"""
+        return getattr(self, key, default)
+
+    def get_diff(self, other):
+        """Return a containerized diff between this and the other record or container"""
+        return self.to_container().get_diff(other)
+
+    def items(self):
+        """Return a list of (name, value) pairs for each member which is set"""
+        return [(k, getattr(self, k)) for k in self.keys()]
+
+    def keys(self):
+        """Return a list of names of each member which is set"""
+        return [k for k in self.__slots__ if hasattr(self, k)]
+
+    def to_container(self):
+        """Return a Container with the same contents"""
+        return Container(self.items())
+
+    def update(self, other):
+        """Set members from another record or dict"""
+        for k, v in other.items():
+            self[k] = v
+
+    def values(self):
+        """Return a list of the values of each member which is set"""
+        return [getattr(self, k) for k in self.keys()]
@@ -36,12 +36,17 @@ __license__ = "BSD"
 __copyright__ = "Copyright 2018 Daniel Kristensen, Garmin Ltd. or its subsidiaries."
 
 __all__ = [
+    "Analyzer",
+    "Bdd",
     "BoundedStatefulParser",
     "Builder",
     "Config",
     "ConfigParser",
     "DefinitionParser",
     "DefTree",
+    "FileCache",
+    "FixDep",
+    "FormatterPool",
     "Generators",
     "Importer",
     "LineInfo",
@@ -50,10 +55,14 @@ __all__ = [
     "Manifest",
     "ManifestParser",
     "Matcher",
+    "OutputCache",
     "ProjectParser",
     "Project",
+    "Scheduler",
     "Settings",
+    "Snapshot",
     "StatefulParser",
     "StateMachine",
+    "Template",
     "Util"
     ]
@@ -32,6 +32,8 @@
 """
 
 import io
+import os
+import tempfile
 from GlobifestLib import Settings, Manifest
 
 TEST_FNAME = "test_manifest.glst"
@@ -68,3 +70,24 @@ new_parser = DummyManifestParser
 def new_file(*args):
     """Create a file-like object using a list of strings representing lines in the file"""
     return io.StringIO("\n".join(args))
+
+def new_temp_dir(test):
+    """Create a temporary directory which is removed after the test case, and return its path"""
+    tmp_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp_dir.cleanup)
+    return tmp_dir.name
+
+def write_file(dir_name, name, *args, mtime=None):
+    """
+        Write a file in dir_name using a list of strings representing lines in the file
+
+        Parent directories are created as needed; if mtime is given, it sets the modification
+        time of the file in seconds.  Returns the path of the file.
+    """
+    fname = os.path.join(dir_name, name)
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    with open(fname, "wt") as f:
+        f.write("\n".join(args))
+    if mtime is not None:
+        os.utime(fname, ns=(mtime * 1000000000, mtime * 1000000000))
+    return fname
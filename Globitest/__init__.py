@@ -37,19 +37,30 @@ __copyright__ = "Copyright 2018 Daniel Kristensen, Garmin Ltd. or its subsidiari
 
 __all__ = [
     "Helpers",
+    "testAnalyzer",
+    "testBdd",
     "testBoundedStatefulParser",
+    "testBuilder",
     "testConfig",
     "testConfigParser",
     "testDefinitionParser",
     "testDefTree",
+    "testFileCache",
+    "testFixDep",
+    "testFormatterPool",
     "testGenerators",
     "testLineInfo",
     "testLineReader",
+    "testLog",
     "testManifest",
     "testManifestParser",
     "testMatcher",
+    "testOutputCache",
     "testProject",
     "testProjectParser",
+    "testScheduler",
     "testSettings",
+    "testSnapshot",
+    "testTemplate",
     "testUtil"
     ]
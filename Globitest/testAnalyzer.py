@@ -0,0 +1,187 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testAnalyzer.py - Tests for Analyzer module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import io
+import sys
+import unittest
+
+from GlobifestLib import Analyzer, DefTree, LineReader, Log, ManifestParser, Settings, Util
+from Globitest import Helpers
+
+class TestAnalyzer(unittest.TestCase):
+
+    def setUp(self):
+        self.pipe = io.StringIO()
+        Log.Logger.set_err_pipe(self.pipe)
+
+    def doCleanups(self):
+        Log.Logger.set_err_pipe(sys.stderr)
+        if not self._outcome.success:
+            print("ERRORS:")
+            print(self.pipe.getvalue().rstrip())
+        del self.pipe
+
+    def new_symbolic_settings(self):
+        return Analyzer.SymbolicSettings([
+            ("common", [
+                ("defaults", Settings.new(Util.Container(A="1", B="TRUE", E="E_X")))
+                ]),
+            ("os", [
+                ("linux", Settings.new(Util.Container(A="2", S="\"lin\""))),
+                ("windows", Settings.new(Util.Container(B="FALSE", S="\"win\""))),
+                ("none", Settings.new(Util.Container()))
+                ]),
+            ("board", [
+                ("x", Settings.new(Util.Container(E="E_Y"))),
+                ("y", Settings.new(Util.Container()))
+                ])
+            ])
+
+    def test_collect_conditions(self):
+        collector = Analyzer.IdentifierCollector()
+        manifest = Helpers.new_manifest()
+        parser = ManifestParser.new(manifest, collector, validate_files=False)
+        reader = LineReader.new(parser)
+        reader._read_file_obj(Helpers.new_file(
+            ":sources",
+            ":if( A == 1 )",
+            "    a.c",
+            ":elif( (B != 'x') &&",
+            "       !C )",
+            "    b.c",
+            "    :if( TRUE )",
+            "        c.c",
+            "    :end",
+            ":else",
+            "    d.c",
+            ":end"
+            ))
+
+        # Every condition is evaluated, even after one is met
+        self.assertEqual(collector.get_identifiers(), {"A", "B", "C"})
+
+    def test_get_identifiers(self):
+        self.assertEqual(Analyzer.get_identifiers("A"), {"A"})
+        self.assertEqual(Analyzer.get_identifiers("!A&&(B<10)"), {"A", "B"})
+        self.assertEqual(Analyzer.get_identifiers("A == 'B' || C == \"D E\""), {"A", "C"})
+        self.assertEqual(Analyzer.get_identifiers("TRUE || FALSE || -1 == 1"), set())
+
+    def test_param_identifiers(self):
+        tree = DefTree.new()
+        tree.get_scope("/a").add_param(DefTree.Parameter("X", "x", DefTree.PARAM_TYPE.INT))
+        tree.get_scope("/b").add_param(DefTree.Parameter("Y", "y", DefTree.PARAM_TYPE.BOOL))
+
+        self.assertEqual(set(tree.get_param_ids()), {"X", "Y"})
+
+    def test_signature(self):
+        identifiers = {"A", "B"}
+        common = Settings.new(Util.Container(A="1", B="C", C="TRUE", U="0"))
+        variant1 = Settings.new(Util.Container(U="1"))
+        variant2 = Settings.new(Util.Container(C="FALSE"))
+
+        base = Analyzer.get_signature(Settings.LayeredSettings([common]), identifiers)
+        self.assertEqual(base, (("A", "1"), ("B", "C"), ("C", "TRUE")))
+
+        # U is not referenced, so it does not change the signature
+        signature1 = Analyzer.get_signature(Settings.LayeredSettings([common, variant1]), identifiers)
+        self.assertEqual(signature1, base)
+
+        # C is referenced through the value of B
+        signature2 = Analyzer.get_signature(Settings.LayeredSettings([common, variant2]), identifiers)
+        self.assertNotEqual(signature2, base)
+
+        # Undefined identifiers are included
+        signature3 = Analyzer.get_signature(Settings.new(), identifiers)
+        self.assertEqual(signature3, (("A", None), ("B", None)))
+
+    def test_symbolic_conditions(self):
+        settings = self.new_symbolic_settings()
+        settings.add_implicit_configs([("E_X", "0"), ("E_Y", "1")])
+
+        def check(expr, predicate):
+            text = settings.get_predicate_text(settings.get_condition(expr))
+            self.assertEqual(text, predicate, msg=expr)
+
+        check("A == 1", "os in {windows,none}")
+        check("A > 1", "os=linux")
+        check("B", "os in {linux,none}")
+        check("!B", "os=windows")
+        check("S == \"win\"", "os=windows")
+        check("(A == 2) && B", "os=linux")
+        check("(A == 3) || (A > 3)", "FALSE")
+        check("(A == 1) || (A == 2)", "TRUE")
+        check("E == E_Y", "board=x")
+        check("(E == E_X) && (B == FALSE)", "os=windows && board=y")
+
+        # Combinations where an identifier is undefined or mismatched never evaluate to True
+        check("S != \"lin\"", "os=windows")
+        check("S == 1", "FALSE")
+
+    def test_symbolic_manifest(self):
+        settings = self.new_symbolic_settings()
+        manifest = Helpers.new_manifest()
+        parser = Analyzer.SymbolicManifestParser(manifest, settings)
+        reader = LineReader.new(parser)
+        reader._read_file_obj(Helpers.new_file(
+            ":sources",
+            "all.c",
+            ":if( B )",
+            "    b.c",
+            "    :if( A == 2 )",
+            "        linux.c",
+            "    :else",
+            "        not_linux.c",
+            "    :end",
+            ":elif( A == 2 )",
+            "    dead.c",
+            ":else",
+            "    windows.c",
+            "    :if( (A == 1) ||",
+            "         (A == 2) )",
+            "        windows_always.c",
+            "    :end",
+            ":end"
+            ))
+
+        results = []
+        for e in parser.get_entries():
+            results.append((e.entry, settings.get_predicate_text(e.condition)))
+        self.assertEqual(results, [
+            ("all.c", "TRUE"),
+            ("b.c", "os in {linux,none}"),
+            ("linux.c", "os=linux"),
+            ("not_linux.c", "os=none"),
+            ("dead.c", "FALSE"),
+            ("windows.c", "os=windows"),
+            ("windows_always.c", "os=windows")
+            ])
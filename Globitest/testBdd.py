@@ -0,0 +1,98 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testBdd.py - Tests for Bdd module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import unittest
+
+from GlobifestLib import Bdd
+
+class TestBdd(unittest.TestCase):
+
+    def setUp(self):
+        self.bdd = Bdd.new()
+        self.a = self.bdd.add_var("a")
+        self.b = self.bdd.add_var("b")
+        self.c = self.bdd.add_var("c")
+
+    def test_canonical(self):
+        bdd = self.bdd
+
+        # Equivalent functions have the same node
+        f1 = bdd.apply_and(self.a, bdd.apply_or(self.b, self.c))
+        f2 = bdd.apply_or(bdd.apply_and(self.c, self.a), bdd.apply_and(self.a, self.b))
+        self.assertEqual(f1, f2)
+
+        # De Morgan
+        f3 = bdd.apply_not(bdd.apply_and(self.a, self.b))
+        f4 = bdd.apply_or(bdd.apply_not(self.a), bdd.apply_not(self.b))
+        self.assertEqual(f3, f4)
+
+        # Tautology and contradiction reduce to terminals
+        self.assertEqual(bdd.apply_or(self.a, bdd.apply_not(self.a)), Bdd.TRUE)
+        self.assertEqual(bdd.apply_and(self.a, bdd.apply_not(self.a)), Bdd.FALSE)
+        self.assertEqual(bdd.apply_not(bdd.apply_not(self.b)), self.b)
+
+    def test_cubes(self):
+        bdd = self.bdd
+        f = bdd.apply_or(bdd.apply_and(self.a, self.b), self.c)
+        cubes = list(bdd.iter_cubes(f))
+
+        # Each cube must satisfy f, and cubes must not overlap
+        self.assertEqual(len(cubes), 3)
+        for cube in cubes:
+            a = cube.get(0)
+            b = cube.get(1)
+            c = cube.get(2)
+            self.assertTrue(((a is True) and (b is True)) or (c is True))
+
+        self.assertEqual(list(bdd.iter_cubes(Bdd.FALSE)), [])
+        self.assertEqual(list(bdd.iter_cubes(Bdd.TRUE)), [dict()])
+
+    def test_ite(self):
+        bdd = self.bdd
+        self.assertEqual(bdd.ite(Bdd.TRUE, self.a, self.b), self.a)
+        self.assertEqual(bdd.ite(Bdd.FALSE, self.a, self.b), self.b)
+        self.assertEqual(bdd.ite(self.a, Bdd.TRUE, Bdd.FALSE), self.a)
+        self.assertEqual(bdd.ite(self.a, self.b, self.b), self.b)
+
+        # Mux: (a ? b : c) == (a && b) || (!a && c)
+        f1 = bdd.ite(self.a, self.b, self.c)
+        f2 = bdd.apply_or(
+            bdd.apply_and(self.a, self.b),
+            bdd.apply_and(bdd.apply_not(self.a), self.c)
+            )
+        self.assertEqual(f1, f2)
+
+        # Operations are cached, so repeating them adds no nodes
+        count = bdd.get_node_count()
+        bdd.ite(self.a, self.b, self.c)
+        self.assertEqual(bdd.get_node_count(), count)
@@ -159,6 +159,29 @@ class TestBoundedStatefulParser(unittest.TestCase):
         self.assertEqual("hi there guys", p.get_parsed_text())
         self.assertEqual("", p.get_remaining_text())
 
+    def test_parenthases_long(self):
+        count = 2000
+        p = BoundedStatefulParser.new(
+            "(" * count + "x" + ")" * count + " y",
+            "(",
+            ")",
+            flags=FLAGS.MULTI_LEVEL
+            )
+
+        # Verify deeply nested input is parsed in full
+        self.assertEqual(PARSE_STATUS.FINISHED, p.get_status())
+        self.assertEqual("(" * (count - 1) + "x" + ")" * (count - 1), p.get_parsed_text())
+        self.assertEqual(" y", p.get_remaining_text())
+
+    def test_parenthases_nested_split(self):
+        p = self.create_parenthases_parser("")
+
+        # Verify an inner level opened without closing in the same parse
+        self.assertEqual(PARSE_STATUS.INCOMPLETE, p.parse("(a && (b ||"))
+        self.assertEqual(PARSE_STATUS.FINISHED, p.parse(" c)) d"))
+        self.assertEqual("a && (b || c)", p.get_parsed_text())
+        self.assertEqual(" d", p.get_remaining_text())
+
     def test_parenthases_create(self):
         p = self.create_parenthases_parser("")
         self.assertEqual(PARSE_STATUS.INCOMPLETE, p.get_status())
@@ -385,3 +408,11 @@ class TestBoundedStatefulParser(unittest.TestCase):
         self.assertEqual(PARSE_STATUS.FINISHED, p.get_status())
         self.assertEqual("hi \\\"guys", p.get_parsed_text())
         self.assertEqual("", p.get_remaining_text())
+
+    def test_string_with_escape5(self):
+        p = self.create_string_parser("'hi \\\\' there")
+
+        # Verify an escaped escape character does not escape the delimiter
+        self.assertEqual(PARSE_STATUS.FINISHED, p.get_status())
+        self.assertEqual("hi \\\\", p.get_parsed_text())
+        self.assertEqual(" there", p.get_remaining_text())
@@ -0,0 +1,91 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testBuilder.py - Tests for Builder module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import io
+import os
+import unittest
+
+from GlobifestLib import Builder, DefTree, Generators, Log
+from Globitest import Helpers
+
+class TestBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+        self.addCleanup(Log.Logger.set_err_pipe, Log.Logger.err_pipe)
+        self.err_pipe = io.StringIO()
+        Log.Logger.set_err_pipe(self.err_pipe)
+
+    def write_definition(self, name, pid):
+        """Write a definition file with a single parameter, and return its path"""
+        return Helpers.write_file(self.tmp_dir, name, ":config {}\n    type BOOL\n:end\n".format(pid))
+
+    def test_definition_cache(self):
+        fname = self.write_definition("a.gdef", "A")
+        def_cache = Builder.DefinitionCache(cached=False)
+
+        # Each definition is only built once per cache, regardless of how it is named
+        def_tree = def_cache(fname)
+        self.assertIs(def_cache(fname), def_tree)
+        self.assertIs(def_cache(os.path.join(self.tmp_dir, ".", "a.gdef")), def_tree)
+        self.assertIsNot(Builder.DefinitionCache(cached=False)(fname), def_tree)
+        self.assertEqual(list(def_tree.get_param_ids()), ["A"])
+
+    def test_definition_cache_forest(self):
+        def_cache = Builder.DefinitionCache()
+        tree_a = def_cache(self.write_definition("a.gdef", "A"))
+        tree_b = def_cache(self.write_definition("b.gdef", "B"))
+        forest = DefTree.DefForest()
+
+        # A definition shared by several config blocks is only aggregated once
+        for def_tree in [tree_a, tree_b, tree_a]:
+            def_cache.add_to_forest(forest, def_tree)
+        self.assertEqual(sorted(entry.param.get_identifier() for entry in forest.iter_params()), ["A", "B"])
+
+    def test_definition_cache_outputs(self):
+        def_cache = Builder.DefinitionCache()
+        tree_a = def_cache(self.write_definition("a.gdef", "A"))
+        tree_b = def_cache(self.write_definition("b.gdef", "B"))
+        out_file = os.path.join(self.tmp_dir, "out.h")
+
+        # The same output from the same definition and generator is not a conflict
+        def_cache.add_output(out_file, tree_a, Generators.factory("c", out_file))
+        def_cache.add_output(out_file, tree_a, Generators.factory("c", out_file))
+        self.assertEqual(self.err_pipe.getvalue(), "")
+
+        def_cache.add_output(out_file, tree_a, Generators.factory("java", out_file))
+        self.assertIn("Warning: Conflicting outputs for {}".format(out_file), self.err_pipe.getvalue())
+
+        self.err_pipe.truncate(0)
+        def_cache.add_output(out_file, tree_b, Generators.factory("c", out_file))
+        self.assertIn(tree_b.get_filename(), self.err_pipe.getvalue())
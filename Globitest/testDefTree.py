@@ -31,9 +31,10 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import sys
 import unittest
 
-from GlobifestLib import DefTree, Settings, Util
+from GlobifestLib import DefTree, Log, Settings, Util
 
 class DefTreeTestObserver(DefTree.BaseObserver):
     def __init__(self):
@@ -90,6 +91,7 @@ class TestDefTree(unittest.TestCase):
     def test_create_empty_set(self):
         c = DefTree.new()
         self.assertEqual(c.get_children(), Util.Container())
+        self.assertEqual(list(c.get_param_ids()), [])
         self.assertEqual(c.get_filename(), "")
         self.assertEqual(c.get_name(), "/")
         self.assertEqual(c.get_params(), [])
@@ -201,6 +203,38 @@ class TestDefTree(unittest.TestCase):
             ("IDENT_ENUM_1", "0"),
             ("IDENT_ENUM_2", "1")
             ])
+        self.assertEqual(enum_param.get_implicit_value_by_id("IDENT_ENUM_2").text, "\"Text 2\"")
+        self.assertIsNone(enum_param.get_implicit_value_by_id("IDENT_ENUM_3"))
+        self.assertIsNone(self.pa.get_implicit_value_by_id("IDENT_ENUM_1"))
+
+    def test_duplicate_param(self):
+        c = DefTree.new(filename="test.def")
+        c.get_scope("/a").add_param(self.pa)
+        pa_dup = DefTree.Parameter(pid="IDENTIFIER_A", ptitle="", ptype=DefTree.PARAM_TYPE.INT)
+
+        with self.assertRaisesRegex(Log.GlobifestException, "Duplicate parameter IDENTIFIER_A"):
+            c.get_scope("/b").add_param(pa_dup)
+
+    def test_forest_duplicate_param(self):
+        tree1 = DefTree.new(filename="test1.def")
+        tree1.get_scope("/a").add_param(self.pa)
+        tree2 = DefTree.new(filename="test2.def")
+        tree2.get_scope("/b").add_param(self.pb)
+        tree2.get_scope("/b").add_param(self.pa)
+
+        forest = DefTree.DefForest()
+        forest.add_tree(tree1)
+        self.assertEqual(forest.get_param("IDENTIFIER_A").def_file, "test1.def")
+        self.assertIsNone(forest.get_param("IDENTIFIER_B"))
+
+        # Aggregating the same definition again is allowed
+        forest.add_tree(tree1)
+
+        with self.assertRaisesRegex(
+                Log.GlobifestException,
+                "Duplicate parameter IDENTIFIER_A in test1.def and test2.def"
+                ):
+            forest.add_tree(tree2)
 
     def test_flat_config(self):
         c = DefTree.new(filename="test.def")
@@ -221,6 +255,60 @@ class TestDefTree(unittest.TestCase):
         self.assertEqual(search_scope.get_name(), "/")
         self.assertEqual(search_scope.get_params(), [self.pa, self.pb, self.pc])
 
+    def test_iter_deep(self):
+        c = DefTree.new()
+        scope = c
+        depth = sys.getrecursionlimit() * 2
+        for i in range(depth):
+            scope = scope.add_child_scope("s{}".format(i))
+        scope.add_param(self.pa)
+
+        # Deep trees do not recurse
+        self.assertEqual(list(c.iter_params()), [self.pa])
+        observer = DefTreeTestObserver()
+        c.walk(observer)
+        self.assertEqual(len(observer.lines), 2 * (depth + 1) + 2)
+
+    def test_iter_nodes(self):
+        c = DefTree.new(filename="test.def")
+        scope_a = c.add_child_scope("scope_a")
+        scope_a.add_param(self.pa)
+        c.add_param(self.pb)
+
+        self.assertListEqual(list(c.iter_nodes()), [
+            (DefTree.NODE_TYPE.DEF_BEGIN, c),
+            (DefTree.NODE_TYPE.SCOPE_BEGIN, c),
+            (DefTree.NODE_TYPE.SCOPE_BEGIN, scope_a),
+            (DefTree.NODE_TYPE.PARAM, self.pa),
+            (DefTree.NODE_TYPE.SCOPE_END, scope_a),
+            (DefTree.NODE_TYPE.PARAM, self.pb),
+            (DefTree.NODE_TYPE.SCOPE_END, c)
+            ])
+
+        # A sub-scope can be traversed on its own, and the traversal can be stopped early
+        self.assertListEqual(list(scope_a.iter_params()), [self.pa])
+        params = c.iter_params()
+        self.assertIs(next(params), self.pa)
+        params.close()
+
+    def test_multi_observer(self):
+        c = DefTree.new()
+        c.add_child_scope("scope_a").add_param(self.pa)
+
+        observer1 = DefTreeTestObserver()
+        observer2 = DefTreeTestObserver()
+        c.walk(DefTree.MultiObserver(observer1, observer2))
+
+        self.assertListEqual(observer1.lines, [
+            "def_begin: ",
+            "scope_begin: /",
+            "scope_begin: scope_a",
+            "param: Value A",
+            "scope_end",
+            "scope_end"
+            ])
+        self.assertListEqual(observer1.lines, observer2.lines)
+
     def test_nested_config(self):
         c = DefTree.new()
 
@@ -261,6 +349,11 @@ class TestDefTree(unittest.TestCase):
         self.assertEqual(search_scope.get_name(), "scope_a")
         self.assertEqual(search_scope.get_params(), [self.pa])
 
+        # Parameters are indexed for the whole tree, from any scope
+        self.assertEqual(sorted(c.get_param_ids()), ["IDENTIFIER_A", "IDENTIFIER_B", "IDENTIFIER_C"])
+        self.assertIs(search_scope.get_param("IDENTIFIER_C"), self.pc)
+        self.assertIsNone(c.get_param("IDENTIFIER_D"))
+
         search_scope = c.get_scope("scope_b/")
         self.assertEqual(search_scope.get_name(), "scope_b")
         self.assertEqual(search_scope.get_params(), [self.pb])
@@ -281,6 +374,30 @@ class TestDefTree(unittest.TestCase):
         search_scope.set_description("789")
         self.assertEqual(search_scope.get_description(), "123\n\n456\n\n789")
 
+    def test_get_scope_index(self):
+        c = DefTree.new()
+
+        # Missing nodes along the path are created and indexed
+        scope_abc = c.get_scope("/a/b/c/")
+        self.assertEqual(scope_abc.get_path(), "a/b/c")
+        self.assertEqual(c.get_path(), "")
+        scope_a = c.get_children().a
+        self.assertIs(c.get_scope("a"), scope_a)
+        self.assertIs(scope_a.get_children().b.get_children().c, scope_abc)
+        self.assertEqual(sorted(c.scope_index.keys()), ["", "a", "a/b", "a/b/c"])
+
+        # Paths are relative to the scope
+        self.assertIs(scope_a.get_scope("b/c"), scope_abc)
+        self.assertIs(scope_a.get_scope("/"), scope_a)
+        self.assertIs(scope_a.get_scope("b/d").parent, c.get_scope("a/b"))
+        self.assertIs(c.get_scope("/a/b/d"), scope_a.get_scope("b/d"))
+
+        # Forests are indexed as they are aggregated
+        scope_abc.add_param(self.pa)
+        forest = DefTree.DefForest()
+        forest.add_tree(c)
+        self.assertEqual(forest.get_scope("a/b/c").get_params()[0].param, self.pa)
+
     def test_get_relevant_params(self):
         c = DefTree.new(filename="test.def")
 
@@ -304,6 +421,52 @@ class TestDefTree(unittest.TestCase):
                 Util.Container(param=self.pc, value="C")
             ])
 
+    def test_get_relevant_params_cached(self):
+        c = DefTree.new(filename="test.def")
+        c.add_param(self.pa)
+        settings = Settings.new(configs=Util.Container(IDENTIFIER_A="A", IDENTIFIER_B="B"))
+        other_settings = Settings.new(configs=Util.Container(IDENTIFIER_A="X"))
+
+        params = c.get_relevant_params(settings)
+        self.assertIs(c.get_relevant_params(settings), params)
+        self.assertEqual(c.get_relevant_params(other_settings)[0].value, "X")
+        self.assertIs(c.get_relevant_params(settings), params)
+
+        # Changing the settings invalidates the cached list
+        settings.set_value("IDENTIFIER_A", "AA")
+        self.assertEqual(c.get_relevant_params(settings), [Util.Container(param=self.pa, value="AA")])
+
+        # Changing the tree invalidates the cached list
+        c.add_param(self.pb)
+        self.assertEqual(len(c.get_relevant_params(settings)), 2)
+
+    def test_implicit_values_cached(self):
+        enum_param = DefTree.Parameter(
+            pid="IDENT_ENUM_TYPE",
+            ptitle="",
+            ptype=DefTree.PARAM_TYPE.ENUM,
+            metadata=Util.Container(
+                count="IDENT_ENUM_CNT",
+                vlist=[Util.Container(id="IDENT_ENUM_A", text="\"A\"")]
+                )
+            )
+        self.assertIs(enum_param.get_implicit_values(), enum_param.get_implicit_values())
+
+        c = DefTree.new(filename="test.def")
+        c.add_param(self.pa)
+        values = c.get_implicit_values()
+        self.assertEqual(values, Util.Container())
+        self.assertIs(c.get_implicit_values(), values)
+
+        # Adding a parameter invalidates the cached values
+        version = c.get_version()
+        c.get_scope("/a").add_param(enum_param)
+        self.assertNotEqual(c.get_version(), version)
+        self.assertEqual(
+            c.get_implicit_values(),
+            Util.Container(IDENT_ENUM_A="0", IDENT_ENUM_CNT="1")
+            )
+
     def test_validate_type(self):
         test_tbl = [
             ("BOOL", DefTree.PARAM_TYPE.BOOL),
@@ -0,0 +1,109 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testFileCache.py - Tests for FileCache module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import unittest
+
+from GlobifestLib import Builder, FileCache
+from Globitest import Helpers
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+        self.parsed = []
+
+    def parse(self, fname):
+        """Parse function which records each parse, and treats each line as an included file"""
+        self.parsed.append(fname)
+        with open(fname, "rt") as f:
+            lines = f.read().split()
+        return (lines, lines[1:])
+
+    def test_hit_miss(self):
+        cache = FileCache.new()
+        fname = Helpers.write_file(self.tmp_dir, "a.txt", "a")
+
+        first = cache.get("test", fname, self.parse)
+        second = cache.get("test", fname, self.parse)
+
+        # The same object is returned without parsing again
+        self.assertIs(first, second)
+        self.assertEqual(self.parsed, [fname])
+        self.assertEqual(cache.get_stats(), {"hits": 1, "misses": 1, "size": 1})
+
+        # Different kinds of parse are cached separately
+        cache.get("other", fname, self.parse)
+        self.assertEqual(len(self.parsed), 2)
+
+    def test_invalidate(self):
+        cache = FileCache.new()
+        inc_fname = Helpers.write_file(self.tmp_dir, "inc.txt", "inc")
+        fname = Helpers.write_file(self.tmp_dir, "a.txt", "a " + inc_fname)
+        cache.get("test", fname, self.parse)
+
+        # Modifying the file causes it to be parsed again
+        Helpers.write_file(self.tmp_dir, "a.txt", "b " + inc_fname, mtime=2000)
+        self.assertEqual(cache.get("test", fname, self.parse)[0], "b")
+        self.assertEqual(len(self.parsed), 2)
+
+        # Modifying an included file also causes the file to be parsed again
+        Helpers.write_file(self.tmp_dir, "inc.txt", "included", mtime=2000)
+        cache.get("test", fname, self.parse)
+        self.assertEqual(len(self.parsed), 3)
+        cache.get("test", fname, self.parse)
+        self.assertEqual(len(self.parsed), 3)
+
+    def test_lru(self):
+        cache = FileCache.new(max_size=2)
+        fnames = [Helpers.write_file(self.tmp_dir, "{}.txt".format(i), str(i)) for i in range(3)]
+
+        cache.get("test", fnames[0], self.parse)
+        cache.get("test", fnames[1], self.parse)
+        cache.get("test", fnames[0], self.parse)
+        cache.get("test", fnames[2], self.parse)
+
+        # The least recently used file was discarded
+        self.assertEqual(cache.get_stats().size, 2)
+        cache.get("test", fnames[0], self.parse)
+        self.assertEqual(self.parsed, fnames)
+        cache.get("test", fnames[1], self.parse)
+        self.assertEqual(self.parsed, fnames + [fnames[1]])
+
+    def test_builder_config(self):
+        fname = Helpers.write_file(self.tmp_dir, "a.cfg", "A=1\n")
+
+        # Cached configs are shared, and uncached configs are always parsed
+        config = Builder.build_config(fname)
+        self.assertIs(config, Builder.build_config(fname))
+        self.assertIsNot(config, Builder.build_config(fname, cached=False))
+        self.assertEqual(config.get_settings().get_value("A"), "1")
@@ -0,0 +1,91 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testFixDep.py - Tests for FixDep module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import os
+import unittest
+
+from GlobifestLib import FixDep
+from Globitest import Helpers
+
+class TestFixDep(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+
+    def test_fix_depfile(self):
+        stamp_dir = os.path.join(self.tmp_dir, "stamps")
+        Helpers.write_file(stamp_dir, FixDep.STAMP_RECORD_FILE, "FOO=TRUE", "BAR=1", "BAZ=2")
+        config = Helpers.write_file(self.tmp_dir, "config.h", "#define FOO (1)", "#define BAR (1)", "#define BAZ (2)")
+        header = Helpers.write_file(self.tmp_dir, "b.h", "#define B_VAL BAR /* BARRIER */")
+        source = Helpers.write_file(self.tmp_dir, "a.c", "#include \"config.h\"", "#include \"b.h\"", "int a = FOO;")
+        depfile = Helpers.write_file(
+            self.tmp_dir,
+            "a.d",
+            "a.o: {} {} \\".format(source, config),
+            " {}".format(header),
+            "{}:".format(config),
+            "{}:".format(header)
+            )
+
+        stamps = FixDep.fix_depfile(depfile, stamp_dir, [config])
+
+        # The object depends on the stamps of the settings referenced, instead of the header
+        self.assertEqual(stamps, [os.path.join(stamp_dir, "BAR"), os.path.join(stamp_dir, "FOO")])
+        with open(depfile, "rt") as f:
+            rules = FixDep.parse_depfile(f.read())
+        self.assertEqual(rules, [
+            (["a.o"], [source, header] + stamps),
+            ([header], []),
+            ([stamps[0]], []),
+            ([stamps[1]], [])
+            ])
+
+    def test_parse_depfile(self):
+        rules = FixDep.parse_depfile("\n".join([
+            "out/a.o: src/a.c \\",
+            "  src/my\\ file.h C:\\inc\\b.h",
+            "",
+            "src/my\\ file.h:",
+            ""
+            ]))
+
+        self.assertEqual(rules, [
+            (["out/a.o"], ["src/a.c", "src/my file.h", "C:\\inc\\b.h"]),
+            (["src/my file.h"], [])
+            ])
+
+    def test_read_record(self):
+        record = Helpers.write_file(self.tmp_dir, "auto.conf", "A=1", "B=\"x=y\"")
+
+        self.assertEqual(FixDep.read_record(record), {"A": "1", "B": "\"x=y\""})
+        self.assertEqual(FixDep.read_record(os.path.join(self.tmp_dir, "missing")), {})
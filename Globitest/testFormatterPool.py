@@ -0,0 +1,115 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testFormatterPool.py - Tests for FormatterPool module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import io
+import os
+import unittest
+
+from GlobifestLib import DefTree, FormatterPool, Generators, Log, Scheduler
+from Globitest import Helpers
+
+# Formatter which writes the process it ran in, or fails on request
+FORMATTER = "\n".join([
+    "import os",
+    "for d in DEFINITIONS:",
+    "    if d.value == 'fail':",
+    "        g_err('{} failed'.format(d.param.get_identifier()))",
+    "with open(OUT_FILE, 'wt') as f:",
+    "    f.write('{} {}'.format(os.getpid(), [d.value for d in DEFINITIONS]))",
+    ""
+    ])
+
+class TestFormatterPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+        self.formatter = Helpers.write_file(self.tmp_dir, "fmt.py", FORMATTER)
+
+        # Set before the workers start, so they inherit it where processes are forked
+        self.addCleanup(Log.Logger.set_err_pipe, Log.Logger.err_pipe)
+        self.err_pipe = io.StringIO()
+        Log.Logger.set_err_pipe(self.err_pipe)
+
+        self.pool = FormatterPool.new(2)
+        self.addCleanup(self.pool.shutdown)
+
+    def new_definitions(self, value):
+        """Return a list with one definition"""
+        param = DefTree.Parameter("A", "a", DefTree.PARAM_TYPE.STRING)
+        return [DefTree.ParamValue(param=param, value=value)]
+
+    def read_output(self, fname):
+        """Return the (pid, values) written by the formatter"""
+        with open(fname, "rt") as f:
+            pid, values = f.read().split(" ", 1)
+        return int(pid), values
+
+    def test_accepts(self):
+        self.assertTrue(self.pool.accepts(Generators.factory("_custom", "a.txt", self.formatter)))
+        self.assertFalse(self.pool.accepts(Generators.factory("c", "a.h")))
+
+    def test_error(self):
+        generator = Generators.factory("_custom", os.path.join(self.tmp_dir, "a.txt"), self.formatter)
+        future = self.pool.submit(generator, self.new_definitions("fail"), self.tmp_dir)
+
+        # Errors are raised in the worker, and returned as exceptions
+        err = FormatterPool.get_error(future)
+        self.assertIsInstance(err, Log.GlobifestException)
+        self.assertEqual(str(err), "A failed")
+
+    def test_scheduler(self):
+        scheduler = Scheduler.new(jobs=1, formatter_pool=self.pool)
+        out_files = [os.path.join(self.tmp_dir, "out", "{}.txt".format(i)) for i in range(4)]
+        for i, out_file in enumerate(out_files):
+            generator = Generators.factory("_custom", out_file, self.formatter)
+            scheduler.add_job("pkg.gman", generator, self.new_definitions(str(i)), self.tmp_dir)
+        c_file = os.path.join(self.tmp_dir, "out", "config.h")
+        scheduler.add_job("pkg.gman", Generators.factory("c", c_file), [], self.tmp_dir)
+        scheduler.run()
+
+        # Formatters run in the workers, while other generators run in this process
+        pids = set()
+        for i, out_file in enumerate(out_files):
+            pid, values = self.read_output(out_file)
+            self.assertEqual(values, "['{}']".format(i))
+            pids.add(pid)
+        self.assertNotIn(os.getpid(), pids)
+        self.assertTrue(os.path.isfile(c_file))
+
+        # Failures are reported with their package
+        generator = Generators.factory("_custom", out_files[0], self.formatter)
+        scheduler.add_job("bad.gman", generator, self.new_definitions("fail"), self.tmp_dir)
+        with self.assertRaisesRegex(Log.GlobifestException, "1 of 1 generators failed"):
+            scheduler.run()
+        self.assertIn("bad.gman: Error generating", self.err_pipe.getvalue())
+        self.assertIn("A failed", self.err_pipe.getvalue())
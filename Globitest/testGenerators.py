@@ -31,9 +31,31 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import json
+import os
+import struct
 import unittest
+from GlobifestLib import DefTree, FixDep, Generators, Settings, Util
+from GlobifestLib import DefTree, Generators
+from Globitest import Helpers
 
-from GlobifestLib import Generators
+def new_typed_definitions():
+    """Return a list of DefTree.ParamValue with one of each type"""
+    enum_param = DefTree.Parameter(
+        "E", "e", DefTree.PARAM_TYPE.ENUM,
+        metadata=DefTree.EnumMetadata(
+            count="E_COUNT",
+            vlist=[DefTree.EnumChoice(id="E_A", text="a"), DefTree.EnumChoice(id="E_B", text="b")]
+            )
+        )
+    return [
+        DefTree.ParamValue(param=DefTree.Parameter("B", "b", DefTree.PARAM_TYPE.BOOL), value="TRUE"),
+        DefTree.ParamValue(param=DefTree.Parameter("S1", "s", DefTree.PARAM_TYPE.STRING), value="\"x\""),
+        DefTree.ParamValue(param=DefTree.Parameter("S2", "s", DefTree.PARAM_TYPE.STRING), value="\"x\""),
+        DefTree.ParamValue(param=DefTree.Parameter("I", "i", DefTree.PARAM_TYPE.INT), value="-3"),
+        DefTree.ParamValue(param=DefTree.Parameter("F", "f", DefTree.PARAM_TYPE.FLOAT), value="0.5"),
+        DefTree.ParamValue(param=enum_param, value="E_B")
+        ]
 
 class TestGenerators(unittest.TestCase):
 
@@ -67,3 +89,302 @@ class TestGenerators(unittest.TestCase):
         self.assertEqual(generator.get_filename(), "config.bin")
         self.assertEqual(generator.FORMAT_TYPE, "_custom")
         self.assertEqual(generator.get_formatter(), "bin_formatter.py")
+
+    def test_key(self):
+        param = DefTree.Parameter("A", "a", DefTree.PARAM_TYPE.INT)
+        defs = [DefTree.ParamValue(param=param, value="1")]
+        c_gen = Generators.factory(gen_format="c", filename="out/config.h")
+        key = c_gen.get_key(defs, "out")
+
+        # The key depends on the generator, location and values
+        self.assertEqual(key, Generators.factory("c", "out/config.h").get_key(defs, "out"))
+        self.assertNotEqual(key, Generators.factory("java", "out/config.h").get_key(defs, "out"))
+        self.assertNotEqual(key, c_gen.get_key(defs, "other"))
+        self.assertNotEqual(key, c_gen.get_key([DefTree.ParamValue(param=param, value="2")], "out"))
+        self.assertNotEqual(key, c_gen.get_key([], "out"))
+
+    def test_key_formatter(self):
+        formatter = Helpers.write_file(Helpers.new_temp_dir(self), "fmt.py", "pass\n")
+        generator = Generators.factory("_custom", "config.bin", formatter)
+        key = generator.get_key([], "out")
+
+        # Changing the formatter changes the key
+        with open(formatter, "at") as f:
+            f.write("pass\n")
+        self.assertNotEqual(key, generator.get_key([], "out"))
+
+    def test_output_file(self):
+        generator = Generators.factory("java", "com/Config.java")
+        self.assertEqual(generator.get_filename(), "com/Config.java")
+        self.assertEqual(generator.get_output_file(), "com/config.java")
+
+    def test_formatter_cache(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        formatter = Helpers.write_file(
+            tmp_dir,
+            "fmt.py",
+            "with open(OUT_FILE, 'at') as f:",
+            "    f.write(__name__ + str(len(DEFINITIONS)))\n",
+            mtime=1
+            )
+        out_file = os.path.join(tmp_dir, "out.txt")
+
+        # Script-style formatters are compiled once, and run for each output
+        generator = Generators.factory("_custom", out_file, formatter)
+        generator.generate([], tmp_dir)
+        compiled = Generators.formatter_cache.get(formatter)
+        generator.generate([1], tmp_dir)
+        self.assertIs(Generators.formatter_cache.get(formatter), compiled)
+        self.assertIsNone(compiled.module)
+        with open(out_file, "rt") as f:
+            self.assertEqual(f.read(), "<globifest>0<globifest>1")
+
+        # Module-style formatters are loaded again when modified, and generate() is called
+        with open(formatter, "wt") as f:
+            f.write("\n".join([
+                "GLOBIFEST_MODULE = True",
+                "loads = []",
+                "loads.append(__name__)",
+                "def generate(DEFINITIONS, OUT_FILE, **kwargs):",
+                "    with open(OUT_FILE, 'wt') as f:",
+                "        f.write('{} {}'.format(loads, DEFINITIONS))",
+                ""
+                ]))
+        generator.generate([1], tmp_dir)
+        generator.generate([2], tmp_dir)
+        self.assertIsNotNone(Generators.formatter_cache.get(formatter).module)
+        with open(out_file, "rt") as f:
+            self.assertEqual(f.read(), "['<globifest_module>'] [2]")
+
+    def test_render(self):
+        enum_param = DefTree.Parameter(
+            "E", "e", DefTree.PARAM_TYPE.ENUM,
+            metadata=DefTree.EnumMetadata(
+                count="E_COUNT",
+                vlist=[DefTree.EnumChoice(id="E_A", text="a"), DefTree.EnumChoice(id="E_B", text="b")]
+                )
+            )
+        defs = [
+            DefTree.ParamValue(param=DefTree.Parameter("B", "b", DefTree.PARAM_TYPE.BOOL), value="FALSE"),
+            DefTree.ParamValue(param=DefTree.Parameter("S", "s", DefTree.PARAM_TYPE.STRING), value="\"x\""),
+            DefTree.ParamValue(param=enum_param, value="1")
+            ]
+        out_dir = os.path.join("out", "dir")
+        generator = Generators.factory("c", os.path.join(out_dir, "pkg", "config.h"))
+
+        self.assertEqual(generator.render(defs, out_dir), "".join([
+            "/* GENERATED BY GLOBIFEST -- DO NOT EDIT */\n",
+            "\n",
+            "#ifndef _PKG_CONFIG_H\n",
+            "#define _PKG_CONFIG_H\n",
+            "\n",
+            "#define B (0)\n",
+            "#define S \"x\"\n",
+            "#define E_A (0)\n",
+            "#define E_B (1)\n",
+            "#define E_COUNT (2)\n",
+            "#define E E_B\n",
+            "\n",
+            "#endif /* _PKG_CONFIG_H */\n"
+            ]))
+
+    def test_write_unchanged(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        out_file = os.path.join(tmp_dir, "config.h")
+        defs = [DefTree.ParamValue(param=DefTree.Parameter("I", "i", DefTree.PARAM_TYPE.INT), value="1")]
+        generator = Generators.factory("c", out_file)
+        generator.generate(defs, tmp_dir)
+        os.utime(out_file, ns=(1000000000, 1000000000))
+
+        # Rendering the same contents does not write the file
+        generator.generate(defs, tmp_dir)
+        self.assertEqual(os.stat(out_file).st_mtime_ns, 1000000000)
+
+        defs[0].value = "2"
+        generator.generate(defs, tmp_dir)
+        self.assertNotEqual(os.stat(out_file).st_mtime_ns, 1000000000)
+        with open(out_file, "rt") as f:
+            self.assertIn("#define I (2)\n", f.read())
+
+    def test_template(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        template = Helpers.write_file(tmp_dir, "config.tpl", "%for p in PARAMS", "${p.id}=${p.value}", "%end\n")
+        out_file = os.path.join(tmp_dir, "config.txt")
+        defs = [DefTree.ParamValue(param=DefTree.Parameter("I", "i", DefTree.PARAM_TYPE.INT), value="1")]
+
+        generator = Generators.factory("template", out_file, template)
+        self.assertEqual(generator.get_formatter(), template)
+        generator.generate(defs, tmp_dir)
+        with open(out_file, "rt") as f:
+            self.assertEqual(f.read(), "I=1\n")
+
+        # Changing the template changes the key
+        key = generator.get_key(defs, tmp_dir)
+        with open(template, "at") as f:
+            f.write("end\n")
+        self.assertNotEqual(key, generator.get_key(defs, tmp_dir))
+
+    def test_binary(self):
+        generator = Generators.factory("binary", "config.bin")
+        out = generator.render(new_typed_definitions(), "")
+
+        header = Generators.BinaryGenerator.HEADER.unpack_from(out)
+        self.assertEqual(header[0:4], (b"GFST", 1, 16, 9))
+        self.assertEqual(header[4], Generators.BinaryGenerator.HEADER.size + (9 * 16))
+        self.assertEqual(header[4] + header[5], len(out))
+
+        # Each entry is (identifier, type, value); strings are referenced by offset
+        strings = out[header[4]:]
+        def get_string(offset):
+            return strings[offset:strings.index(b"\0", offset)].decode()
+        entries = []
+        for i in range(header[3]):
+            offset = Generators.BinaryGenerator.HEADER.size + (i * 16)
+            pid, ptype = struct.unpack_from("<IB", out, offset)
+            if ptype == DefTree.PARAM_TYPE.FLOAT:
+                value = struct.unpack_from("<d", out, offset + 8)[0]
+            elif ptype == DefTree.PARAM_TYPE.STRING:
+                value = get_string(struct.unpack_from("<I", out, offset + 8)[0])
+            else:
+                value = struct.unpack_from("<q", out, offset + 8)[0]
+            entries.append((get_string(pid), DefTree.PARAM_TYPE.enum_id[ptype], value))
+
+        self.assertEqual(entries, [
+            ("B", "BOOL", 1),
+            ("S1", "STRING", "x"),
+            ("S2", "STRING", "x"),
+            ("I", "INT", -3),
+            ("F", "FLOAT", 0.5),
+            ("E_A", "INT", 0),
+            ("E_B", "INT", 1),
+            ("E_COUNT", "INT", 2),
+            ("E", "ENUM", 1)
+            ])
+
+        # The same string is stored once
+        self.assertEqual(strings.count(b"x\0"), 1)
+
+    def test_json(self):
+        generator = Generators.factory("json", "config.json")
+        out = generator.render(new_typed_definitions(), "")
+
+        self.assertEqual(json.loads(out), {
+            "version": 1,
+            "settings": {"B": True, "S1": "x", "S2": "x", "I": -3, "F": 0.5, "E": 1},
+            "constants": {"E_A": 0, "E_B": 1, "E_COUNT": 2}
+            })
+        self.assertEqual(list(json.loads(out)["settings"]), ["B", "S1", "S2", "I", "F", "E"])
+
+    def test_write_binary(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        out_file = os.path.join(tmp_dir, "config.bin")
+        generator = Generators.factory("binary", out_file)
+        generator.generate(new_typed_definitions(), tmp_dir)
+        os.utime(out_file, ns=(1000000000, 1000000000))
+
+        generator.generate(new_typed_definitions(), tmp_dir)
+        self.assertEqual(os.stat(out_file).st_mtime_ns, 1000000000)
+        with open(out_file, "rb") as f:
+            self.assertEqual(f.read(), generator.render(new_typed_definitions(), tmp_dir))
+
+    def test_c_lookup(self):
+        out_dir = os.path.join("out", "dir")
+        generator = Generators.factory("c_lookup", os.path.join(out_dir, "pkg", "config.h"))
+        out = generator.render(new_typed_definitions(), out_dir)
+
+        # The defines are the same as the C format
+        c_out = Generators.factory("c", generator.get_filename()).render(new_typed_definitions(), out_dir)
+        self.assertTrue(out.startswith(c_out[:c_out.index("#endif")]))
+        self.assertTrue(out.endswith("#endif /* _PKG_CONFIG_H */\n"))
+
+        # Table entries are sorted by identifier, and refer to the defines
+        self.assertIn("#define PKG_CONFIG_H_SETTINGS_COUNT (9)\n", out)
+        self.assertIn("#ifdef PKG_CONFIG_H_IMPLEMENTATION\n", out)
+        self.assertIn("const globifest_setting_t *pkg_config_h_find_setting(const char *id)\n", out)
+        table = [line.strip() for line in out.splitlines() if line.startswith("    { \"")]
+        self.assertEqual(table, [
+            "{ \"B\", GLOBIFEST_TYPE_BOOL, B, 0.0, 0 },",
+            "{ \"E\", GLOBIFEST_TYPE_ENUM, E, 0.0, 0 },",
+            "{ \"E_A\", GLOBIFEST_TYPE_INT, E_A, 0.0, 0 },",
+            "{ \"E_B\", GLOBIFEST_TYPE_INT, E_B, 0.0, 0 },",
+            "{ \"E_COUNT\", GLOBIFEST_TYPE_INT, E_COUNT, 0.0, 0 },",
+            "{ \"F\", GLOBIFEST_TYPE_FLOAT, 0, F, 0 },",
+            "{ \"I\", GLOBIFEST_TYPE_INT, I, 0.0, 0 },",
+            "{ \"S1\", GLOBIFEST_TYPE_STRING, 0, 0.0, S1 },",
+            "{ \"S2\", GLOBIFEST_TYPE_STRING, 0, 0.0, S2 }"
+            ])
+
+        # An empty table is not defined
+        out = generator.render([], out_dir)
+        self.assertIn("#define PKG_CONFIG_H_SETTINGS_COUNT (0)\n", out)
+        self.assertNotIn("pkg_config_h_settings[]", out)
+
+    def test_stamps(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        stamp_dir = os.path.join(tmp_dir, "stamps")
+        defs = new_typed_definitions()
+        generator = Generators.factory("stamps", stamp_dir)
+        self.assertEqual(generator.get_output_file(), os.path.join(stamp_dir, "auto.conf"))
+
+        generator.generate(defs, tmp_dir)
+        self.assertEqual(
+            sorted(os.listdir(stamp_dir)),
+            ["B", "E", "E_A", "E_B", "E_COUNT", "F", "I", "S1", "S2", "auto.conf"]
+            )
+        for name in os.listdir(stamp_dir):
+            os.utime(os.path.join(stamp_dir, name), ns=(1000000000, 1000000000))
+
+        # Only the stamp of the changed parameter is touched
+        defs[3].value = "4"
+        generator.generate(defs, tmp_dir)
+        touched = [
+            name for name in sorted(os.listdir(stamp_dir))
+            if os.stat(os.path.join(stamp_dir, name)).st_mtime_ns != 1000000000
+            ]
+        self.assertEqual(touched, ["I", "auto.conf"])
+
+        # The stamp of a parameter which is no longer in the definition is touched, and it is
+        # removed from the record
+        for name in os.listdir(stamp_dir):
+            os.utime(os.path.join(stamp_dir, name), ns=(1000000000, 1000000000))
+        del defs[3]
+        generator.generate(defs, tmp_dir)
+        touched = [
+            name for name in sorted(os.listdir(stamp_dir))
+            if os.stat(os.path.join(stamp_dir, name)).st_mtime_ns != 1000000000
+            ]
+        self.assertEqual(touched, ["I", "auto.conf"])
+        self.assertNotIn("I", FixDep.read_record(generator.get_output_file()))
+
+    def test_stamps_undefined(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        stamp_dir = os.path.join(tmp_dir, "stamps")
+        def_tree = DefTree.new(filename="test.gdef")
+        def_tree.add_param(DefTree.Parameter("FOO", "foo", DefTree.PARAM_TYPE.BOOL))
+        def_tree.add_param(new_typed_definitions()[-1].param)
+        settings = Settings.new(configs=Util.Container(E="E_A"))
+        generator = Generators.factory("stamps", stamp_dir)
+
+        # Parameters without a value, and implicit values, are recorded too
+        generator.generate(generator.get_definitions(def_tree, settings), tmp_dir)
+        self.assertEqual(
+            FixDep.read_record(generator.get_output_file()),
+            dict(FOO=FixDep.UNDEFINED_VALUE, E="E_A", E_A="0", E_B="1", E_COUNT="2")
+            )
+        source = Helpers.write_file(tmp_dir, "a.c", "#ifdef FOO", "int a = E_COUNT;", "#endif")
+        depfile = Helpers.write_file(tmp_dir, "a.d", "a.o: {}".format(source))
+        stamps = FixDep.fix_depfile(depfile, stamp_dir)
+        self.assertEqual(stamps, [os.path.join(stamp_dir, "E_COUNT"), os.path.join(stamp_dir, "FOO")])
+        for name in os.listdir(stamp_dir):
+            os.utime(os.path.join(stamp_dir, name), ns=(1000000000, 1000000000))
+
+        # Defining the parameter touches its stamp, which the object depends on
+        settings.set_value("FOO", "TRUE")
+        generator.generate(generator.get_definitions(def_tree, settings), tmp_dir)
+        touched = [
+            name for name in sorted(os.listdir(stamp_dir))
+            if os.stat(os.path.join(stamp_dir, name)).st_mtime_ns != 1000000000
+            ]
+        self.assertEqual(touched, ["FOO", "auto.conf"])
+        with open(depfile, "rt") as f:
+            self.assertIn(os.path.join(stamp_dir, "FOO"), FixDep.parse_depfile(f.read())[0][1])
@@ -32,9 +32,10 @@
 """
 
 import io
+import os
 import unittest
 
-from GlobifestLib import LineReader
+from GlobifestLib import LineInfo, LineReader
 from Globitest import Helpers
 
 class TestLineReader(unittest.TestCase):
@@ -43,6 +44,58 @@ class TestLineReader(unittest.TestCase):
         self.parser = Helpers.new_parser()
         self.reader = LineReader.new(self.parser)
 
+    def read_temp_file(self, contents, read_mode):
+        """Write contents to a temporary file, and read it back using read_mode"""
+        fname = os.path.join(Helpers.new_temp_dir(self), Helpers.TEST_FNAME)
+        with open(fname, "wb") as f:
+            f.write(contents)
+
+        reader = LineReader.new(self.parser, read_mode=read_mode)
+        reader.read_file_by_name(fname)
+
+    def test_bulk_line_ref(self):
+        file = io.StringIO("  one\n\n  two  \n")
+        self.reader._read_file_obj(file)
+
+        # Lines are references into a table, which can be converted to LineInfo on request
+        self.assertEqual(len(self.parser.lines), 3)
+        self.assertIsInstance(self.parser.lines[0], LineInfo.LineRef)
+        self.assertEqual(self.parser.lines[1].get_text(), "")
+        self.assertEqual(str(self.parser.lines[2]), "{}:3".format(Helpers.TEST_FNAME))
+
+        line_info = self.parser.lines[2].to_line_info()
+        self.assertIsInstance(line_info, LineInfo.LineInfo)
+        self.assertEqual(line_info.get_filename(), Helpers.TEST_FNAME)
+        self.assertEqual(line_info.get_line(), 3)
+        self.assertEqual(line_info.get_text(), "two")
+
+    def test_line_mode(self):
+        self.reader = LineReader.new(self.parser, read_mode=LineReader.READ_MODE.LINES)
+        file = Helpers.new_file(" line1", "line2 ")
+        self.reader._read_file_obj(file)
+
+        self.assertEqual(len(self.parser.lines), 2)
+        self.assertIsInstance(self.parser.lines[0], LineInfo.LineInfo)
+        self.assertEqual(self.parser.lines[0].get_text(), "line1")
+        self.assertEqual(self.parser.lines[1].get_line(), 2)
+        self.assertEqual(self.parser.lines[1].get_text(), "line2")
+
+    def test_bulk_empty_file(self):
+        self.read_temp_file(b"", LineReader.READ_MODE.BULK)
+
+        self.assertEqual(len(self.parser.lines), 0)
+
+    def test_bulk_file(self):
+        self.read_temp_file(b"line1\r\n  line2\n\nline4", LineReader.READ_MODE.BULK)
+
+        self.assertEqual(len(self.parser.lines), 4)
+        self.assertEqual(
+            [line_info.get_text() for line_info in self.parser.lines],
+            ["line1", "line2", "", "line4"]
+            )
+        self.assertEqual(self.parser.lines[3].get_filename(), Helpers.TEST_FNAME)
+        self.assertEqual(self.parser.lines[3].get_line(), 4)
+
     def test_embedded_bin_chars(self):
         """
             Test a file with embedded binary characters which could
@@ -0,0 +1,85 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testLog.py - Tests for Log module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import unittest
+
+from GlobifestLib import Log
+
+class Record(object):
+    """Object which counts how many times it was formatted"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __format__(self, spec):
+        self.count += 1
+        return "rec"
+
+class TestLog(unittest.TestCase):
+
+    def test_debug_disabled(self):
+        d = Log.Debuggable(False)
+        r = Record()
+        d.debug("value={}", r)
+
+        self.assertEqual("", d.get_debug_log())
+        self.assertEqual(0, r.count)
+
+    def test_debug_lazy(self):
+        d = Log.Debuggable(True)
+        r = Record()
+        d.debug("value={}", r)
+        d.debug("{literal}")
+
+        # Formatting is deferred until the log is read; text without args is not formatted
+        self.assertEqual(0, r.count)
+        self.assertEqual("\n  value=rec\n  {literal}", d.get_debug_log())
+        self.assertEqual(1, r.count)
+
+    def test_debug_linked(self):
+        parent = Log.Debuggable(True)
+        child = Log.Debuggable()
+        child.link_debug_log(parent)
+        parent.debug("a")
+        child.debug("b={}", 1)
+
+        self.assertTrue(child.get_debug_mode())
+        self.assertEqual("\n  a\n  b=1", parent.get_debug_log())
+
+    def test_debug_ring_buffer(self):
+        d = Log.Debuggable(True, log_size=3)
+        for i in range(10):
+            d.debug("{}", i)
+
+        # Only the most recent records are kept
+        self.assertEqual("\n  7\n  8\n  9", d.get_debug_log())
@@ -35,7 +35,7 @@ import io
 import sys
 import unittest
 
-from GlobifestLib import Log, LineReader, Manifest, ManifestParser, Util
+from GlobifestLib import DefTree, Log, LineReader, Manifest, ManifestParser, Util
 from Globitest import Helpers
 
 def create_empty_manifest_container():
@@ -83,11 +83,17 @@ class TestManifestParser(unittest.TestCase):
         if hasattr(self, "pipe"):
             del self.pipe
 
-    def create_parser(self, configs = Util.Container()):
+    def create_parser(self, configs = Util.Container(), def_parser=None):
         # The manifest and reader are not under test, but simple enough to use directly
         self.manifest = Helpers.new_manifest()
         self.configs = Helpers.new_settings(configs)
-        self.parser = ManifestParser.new(self.manifest, self.configs, debug_mode=True, validate_files=False)
+        self.parser = ManifestParser.new(
+            self.manifest,
+            self.configs,
+            debug_mode=True,
+            validate_files=False,
+            def_parser=def_parser
+            )
 
         # The reader is not under test, but it provides a good way to feed strings to the parser
         self.reader = LineReader.new(self.parser)
@@ -352,6 +358,7 @@ class TestManifestParser(unittest.TestCase):
             "   definition bar.dfg",
             "   generate Java bar.java",
             "   generate_s my_formatter.py bar.bin",
+            "   generate template my_template.txt bar.txt",
             ":end",
             ":sources",
             "    a.cpp"
@@ -384,12 +391,39 @@ class TestManifestParser(unittest.TestCase):
                         format="_custom",
                         filename="bar.bin",
                         formatter="my_formatter.py"
+                    ),
+                    Util.Container(
+                        format="template",
+                        filename="bar.txt",
+                        formatter="my_template.txt"
                     )
                 ]
             )
         ]
         self.verify_manifest(output, configs)
 
+    def test_configs_implicit_values(self):
+        def_tree = DefTree.new(filename="a.gdef")
+        def_tree.add_param(DefTree.Parameter(
+            pid="IDENT_ENUM_TYPE",
+            ptitle="",
+            ptype=DefTree.PARAM_TYPE.ENUM,
+            metadata=Util.Container(
+                count="IDENT_ENUM_CNT",
+                vlist=[Util.Container(id="IDENT_ENUM_A", text="\"A\"")]
+                )
+            ))
+        def_file = Helpers.write_file(Helpers.new_temp_dir(self), "a.gdef", "")
+        self.create_parser(Util.Container(IDENT_ENUM_TYPE="IDENT_ENUM_A"), def_parser=lambda fname: def_tree)
+        self.parse_lines(":config", "   definition {}".format(def_file), ":end")
+        self.assertEqual(self.configs.get_value("IDENT_ENUM_A"), "0")
+        params = def_tree.get_relevant_params(self.configs)
+
+        # Adding the same implicit values again does not invalidate cached results
+        self.parse_lines(":config", "   definition {}".format(def_file), ":end")
+        self.assertEqual(len(self.manifest.get_configs()), 2)
+        self.assertIs(def_tree.get_relevant_params(self.configs), params)
+
     def test_empty_file(self):
         self.create_parser()
         self.parse_lines("")
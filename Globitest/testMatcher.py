@@ -31,10 +31,11 @@
     OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import io
 import re
 import unittest
 
-from GlobifestLib import Matcher
+from GlobifestLib import ConfigParser, Matcher
 
 class TestMatcher(unittest.TestCase):
 
@@ -112,3 +113,20 @@ class TestMatcher(unittest.TestCase):
         self.assertEqual(m[2], "abc")
         self.assertEqual(m[3], "123")
         self.assertEqual(m.get_num_matches(), 3)
+
+    def test_dump_grammar(self):
+        pipe = io.StringIO()
+        Matcher.dump_grammar(ConfigParser, pipe)
+
+        # Each module-level regex is listed, followed by its parse tree
+        lines = pipe.getvalue().splitlines()
+        headers = [line for line in lines if line.startswith("ConfigParser.")]
+        self.assertEqual(
+            ["ConfigParser.COMMENT_RE:", "ConfigParser.SETTING_RE:", "ConfigParser.BULLETED_LIST_RE:"],
+            headers
+            )
+        for i, line in enumerate(lines):
+            if line in headers:
+                self.assertLess(i + 1, len(lines))
+                self.assertTrue(lines[i + 1].strip())
+                self.assertNotIn(lines[i + 1], headers)
@@ -0,0 +1,78 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testOutputCache.py - Tests for OutputCache module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import os
+import unittest
+
+from GlobifestLib import OutputCache
+from Globitest import Helpers
+
+class TestOutputCache(unittest.TestCase):
+
+    def setUp(self):
+        self.out_dir = Helpers.new_temp_dir(self)
+
+    def test_current(self):
+        out_file = Helpers.write_file(self.out_dir, "a/config.h", "a/config.h")
+        cache = OutputCache.new(self.out_dir)
+        self.assertFalse(cache.is_current(out_file, "key1"))
+        cache.add_output(out_file, "key1")
+        cache.save()
+
+        cache = OutputCache.new(self.out_dir)
+        self.assertTrue(cache.is_current(out_file, "key1"))
+        self.assertFalse(cache.is_current(out_file, "key2"))
+
+        # A deleted output must be generated again
+        os.remove(out_file)
+        self.assertFalse(cache.is_current(out_file, "key1"))
+
+    def test_remove_stale(self):
+        file_a = Helpers.write_file(self.out_dir, "a/config.h", "a/config.h")
+        file_b = Helpers.write_file(self.out_dir, "b/config.h", "b/config.h")
+        cache = OutputCache.new(self.out_dir)
+        cache.add_output(file_a, "a")
+        cache.add_output(file_b, "b")
+        cache.save()
+
+        # Only outputs which are no longer generated are removed
+        cache = OutputCache.new(self.out_dir)
+        cache.add_output(file_a, "a2")
+        self.assertEqual(cache.remove_stale(), [file_b])
+        self.assertTrue(os.path.isfile(file_a))
+        self.assertFalse(os.path.exists(file_b))
+        cache.save()
+
+        cache = OutputCache.new(self.out_dir)
+        self.assertTrue(cache.is_current(file_a, "a2"))
+        self.assertEqual(cache.remove_stale(), [file_a])
@@ -0,0 +1,218 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testScheduler.py - Tests for Scheduler module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import functools
+import hashlib
+import http.server
+import io
+import os
+import threading
+import unittest
+import zipfile
+
+from GlobifestLib import Importer, Log, Scheduler
+from Globitest import Helpers
+
+class TestGenerator(object):
+    """Generator which records the threads it runs on, and optionally fails"""
+
+    def __init__(self, filename, fail=False):
+        self.filename = filename
+        self.fail = fail
+        self.threads = []
+
+    def generate(self, definitions, out_dir):
+        """Record the call, or fail"""
+        if self.fail:
+            raise RuntimeError("failed")
+        self.threads.append((threading.get_ident(), definitions, out_dir))
+
+    def get_filename(self):
+        """Return the filename"""
+        return self.filename
+
+    def get_formatter(self):
+        """No formatter is used"""
+        return None
+
+    def get_output_file(self):
+        """Return the filename"""
+        return self.filename
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files without logging requests"""
+
+    def log_message(self, *args):
+        pass
+
+class TestDependencyScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+        self.serve_dir = os.path.join(self.tmp_dir, "serve")
+        os.makedirs(self.serve_dir)
+
+        # Serve archives from a local stand-in for the download site
+        handler = functools.partial(QuietHandler, directory=self.serve_dir)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.addCleanup(server.server_close)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+        self.url = "http://127.0.0.1:{}".format(server.server_address[1])
+
+        self.addCleanup(Log.Logger.set_out_pipe, Log.Logger.out_pipe)
+        self.addCleanup(Log.Logger.set_err_pipe, Log.Logger.err_pipe)
+        self.addCleanup(Log.Logger.set_level, Log.Logger.verbosity_level)
+        self.out_pipe = io.StringIO()
+        self.err_pipe = io.StringIO()
+        Log.Logger.set_out_pipe(self.out_pipe)
+        Log.Logger.set_err_pipe(self.err_pipe)
+        Log.Logger.set_level(Log.LEVEL.INFO)
+
+    def new_dependency(self, name, exists=True):
+        """Create a dependency which downloads, verifies and extracts an archive"""
+        archive = os.path.join(self.serve_dir, "{}.zip".format(name))
+        if exists:
+            with zipfile.ZipFile(archive, "w") as zip_fh:
+                zip_fh.writestr("{}/README".format(name), name)
+            with open(archive, "rb") as f:
+                sha256 = hashlib.sha256(f.read()).hexdigest()
+        else:
+            sha256 = "0"
+        actions = [
+            Importer.create_action("url", "{}/{}.zip".format(self.url, name)),
+            Importer.create_action("sha256", sha256),
+            Importer.create_action("extract", name)
+            ]
+        return Importer.ExternalDependency(name, actions)
+
+    def get_readme(self, name):
+        """Return the path of the extracted file of a dependency"""
+        return os.path.join(self.tmp_dir, "out", name, "extract", "README")
+
+    def test_failure(self):
+        # One job, so the dependencies after the failure have not started
+        scheduler = Scheduler.DependencyScheduler(jobs=1)
+        for name, exists in [("a", True), ("bad", False), ("c", True)]:
+            dependency = self.new_dependency(name, exists)
+            scheduler.add_dependency(dependency, os.path.join(self.tmp_dir, "out", name))
+        scheduler.start()
+        self.addCleanup(scheduler.shutdown)
+
+        # The failure is raised by any later wait, and the remaining setup is cancelled
+        scheduler.wait("a")
+        with self.assertRaisesRegex(Log.GlobifestException, "bad: Error setting up dependency"):
+            scheduler.wait("c")
+        with self.assertRaisesRegex(Log.GlobifestException, "bad: Error setting up dependency"):
+            scheduler.wait_all()
+        self.assertTrue(os.path.isfile(self.get_readme("a")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, "out", "c")))
+
+    def test_setup(self):
+        names = ["a", "b", "c", "d"]
+        scheduler = Scheduler.DependencyScheduler(jobs=3)
+        for name in names:
+            scheduler.add_dependency(self.new_dependency(name), os.path.join(self.tmp_dir, "out", name))
+        scheduler.start()
+        self.addCleanup(scheduler.shutdown)
+
+        scheduler.wait("b")
+        self.assertTrue(os.path.isfile(self.get_readme("b")))
+        scheduler.wait_all()
+        for name in names:
+            with open(self.get_readme(name), "rt") as f:
+                self.assertEqual(f.read(), name)
+
+        # Messages are prefixed with the dependency name
+        log = self.out_pipe.getvalue()
+        for name in names:
+            self.assertIn("[{0}] Setting up {0}\n".format(name), log)
+        self.assertEqual(Log.Logger.get_prefix(), "")
+
+        # A second setup is up to date
+        scheduler = Scheduler.DependencyScheduler(jobs=3)
+        scheduler.add_dependency(self.new_dependency("a"), os.path.join(self.tmp_dir, "out", "a"))
+        scheduler.start()
+        scheduler.wait_all()
+        scheduler.shutdown()
+        self.assertIn("[a] a up to date\n", self.out_pipe.getvalue())
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+        self.addCleanup(Log.Logger.set_err_pipe, Log.Logger.err_pipe)
+        self.err_pipe = io.StringIO()
+        Log.Logger.set_err_pipe(self.err_pipe)
+
+    def new_generator(self, name, fail=False):
+        """Create a generator with an output file in the temporary directory"""
+        return TestGenerator(os.path.join(self.tmp_dir, "out", name), fail)
+
+    def test_errors(self):
+        scheduler = Scheduler.new(jobs=2)
+        gen_ok = self.new_generator("ok.h")
+        scheduler.add_job("a.gman", self.new_generator("bad1.h", fail=True), [], "out")
+        scheduler.add_job("b.gman", gen_ok, [], "out")
+        scheduler.add_job("c.gman", self.new_generator("bad2.h", fail=True), [], "out")
+
+        # All jobs run, and every failure is reported with its package
+        with self.assertRaisesRegex(Log.GlobifestException, "2 of 3 generators failed"):
+            scheduler.run()
+        self.assertEqual(len(gen_ok.threads), 1)
+        self.assertIn("a.gman: Error generating", self.err_pipe.getvalue())
+        self.assertIn("c.gman: Error generating", self.err_pipe.getvalue())
+        self.assertEqual(scheduler.get_jobs(), [])
+
+    def test_run(self):
+        for jobs in [1, 4]:
+            scheduler = Scheduler.new(jobs=jobs)
+            generators = [self.new_generator("{}.h".format(i)) for i in range(8)]
+            for i, gen in enumerate(generators):
+                scheduler.add_job("pkg.gman", gen, [i], "out")
+            self.assertEqual(len(scheduler.get_jobs()), 8)
+
+            scheduler.run()
+            for i, gen in enumerate(generators):
+                self.assertEqual(len(gen.threads), 1)
+                self.assertEqual(gen.threads[0][1:], ([i], "out"))
+            self.assertTrue(os.path.isdir(os.path.join(self.tmp_dir, "out")))
+
+            # Serial jobs run on the calling thread
+            if jobs == 1:
+                self.assertEqual(
+                    set(gen.threads[0][0] for gen in generators),
+                    {threading.get_ident()}
+                    )
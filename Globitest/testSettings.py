@@ -218,6 +218,54 @@ class TestSettings(unittest.TestCase):
         self.assertTrue(self.config.evaluate("!FALSE"))
         self.assertFalse(self.config.evaluate("!TRUE"))
 
+    def test_layered(self):
+        common = self.new_settings(Util.Container(a="1", b="2"))
+        variant1 = self.new_settings(Util.Container(b="3", c="4"))
+        variant2 = self.new_settings(Util.Container(d="5"))
+        self.config = Settings.LayeredSettings([common, variant1], debug_mode=True)
+
+        # Values resolve from the top layer down
+        self.assertEqual(self.config.get_value("a"), "1")
+        self.assertEqual(self.config.get_value("b"), "3")
+        self.assertEqual(self.config.get_layer_index("b"), 1)
+        self.assertFalse(self.config.has_value("d"))
+        self.assertTrue(self.config.evaluate("(b == 3) && (c == 4)"))
+
+        # Swapping a layer only affects the values it defines
+        self.config.set_layer(1, variant2)
+        self.assertEqual(self.config.get_value("b"), "2")
+        self.assertEqual(self.config.get_layer_index("b"), 0)
+        self.assertFalse(self.config.has_value("c"))
+        self.assertEqual(self.config.get_value("d"), "5")
+
+        # Layers are referenced, not copied
+        variant2.set_value("a", "6")
+        self.assertEqual(self.config.get_value("a"), "6")
+        variant2.undefine("a")
+        self.assertEqual(self.config.get_value("a"), "1")
+        common.undefine("a")
+        self.assertFalse(self.config.has_value("a"))
+
+        out = io.StringIO()
+        self.config.write_sorted(out)
+        self.assertEqual(out.getvalue(), "b=2\nd=5\n")
+
+        # Values must be changed through the layers
+        with self.assertRaises(Log.GlobifestException):
+            self.config.set_value("b", "7")
+
+    def test_layered_version(self):
+        common = self.new_settings(Util.Container(a="1"))
+        self.config = Settings.LayeredSettings([common], debug_mode=True)
+
+        version = self.config.get_version()
+        common.set_value("a", "2")
+        self.assertNotEqual(self.config.get_version(), version)
+
+        version = self.config.get_version()
+        self.config.set_layer(0, common)
+        self.assertEqual(self.config.get_version(), version)
+
     def test_parens(self):
         self.create_config_set()
 
@@ -0,0 +1,98 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testSnapshot.py - Tests for Snapshot module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import pickle
+import unittest
+
+from GlobifestLib import Builder, DefTree, Settings, Snapshot, Util
+from Globitest import Helpers
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = Helpers.new_temp_dir(self)
+        self.snapshot_file = Snapshot.get_snapshot_file(self.tmp_dir)
+
+    def test_load_bad_file(self):
+        # Missing and corrupt snapshots are empty
+        self.assertIsNone(Snapshot.load(self.snapshot_file).get_forest())
+        Helpers.write_file(self.tmp_dir, Snapshot.SNAPSHOT_FILE, "garbage")
+        snapshot = Snapshot.load(self.snapshot_file)
+        self.assertFalse(snapshot.is_modified())
+        self.assertEqual(snapshot.inputs, {})
+
+    def test_pickle_settings(self):
+        layer = Settings.new(Util.Container(A="1"))
+        settings = Settings.LayeredSettings([layer])
+
+        # Listeners are reconnected after loading
+        settings = pickle.loads(pickle.dumps(settings))
+        settings.get_layer(0).set_value("A", "2")
+        self.assertEqual(settings.get_value("A"), "2")
+
+    def test_save_load(self):
+        inc_fname = Helpers.write_file(self.tmp_dir, "b.gdi", ":config B\n    type INT\n:end\n")
+        def_fname = Helpers.write_file(self.tmp_dir, "a.gdef", ":config A\n    type BOOL\n:end\n:include b.gdi\n")
+        cfg_fname = Helpers.write_file(self.tmp_dir, "a.cfg", "A=TRUE\n")
+        manifest_fname = Helpers.write_file(self.tmp_dir, "a.mbt", "")
+
+        snapshot = Snapshot.new()
+        def_cache = Builder.DefinitionCache(cached=False, snapshot=snapshot)
+        forest = DefTree.DefForest()
+        forest.add_tree(def_cache(def_fname))
+        snapshot.set_forest(forest, [manifest_fname])
+        snapshot.add_config(cfg_fname, Builder.build_config(cfg_fname, cached=False))
+        self.assertTrue(snapshot.is_modified())
+        Snapshot.save(snapshot, self.snapshot_file)
+        self.assertFalse(snapshot.is_modified())
+
+        # Nothing changed, so everything is reused
+        snapshot = Snapshot.load(self.snapshot_file)
+        self.assertFalse(snapshot.is_modified())
+        self.assertEqual(sorted(snapshot.get_forest().get_param_ids()), ["A", "B"])
+        self.assertEqual(snapshot.get_config(cfg_fname).get_settings().get_value("A"), "TRUE")
+        def_tree = snapshot.get_definition(def_fname)
+        self.assertEqual(def_tree.get_filename(), def_fname)
+        self.assertIs(Builder.DefinitionCache(snapshot=snapshot)(def_fname), def_tree)
+
+        # Changing an included file discards the definition and forest, but not the config
+        Helpers.write_file(self.tmp_dir, "b.gdi", ":config C\n    type INT\n:end\n")
+        snapshot = Snapshot.load(self.snapshot_file)
+        self.assertTrue(snapshot.is_modified())
+        self.assertIsNone(snapshot.get_forest())
+        self.assertIsNone(snapshot.get_definition(def_fname))
+        self.assertIsNotNone(snapshot.get_config(cfg_fname))
+
+        def_tree = Builder.DefinitionCache(cached=False, snapshot=snapshot)(def_fname)
+        self.assertEqual(sorted(def_tree.get_param_ids()), ["A", "C"])
+        self.assertIs(snapshot.get_definition(def_fname), def_tree)
@@ -0,0 +1,143 @@
+#/usr/bin/env python
+"""
+    globifest/globitest/testTemplate.py - Tests for Template module
+
+    Copyright 2018, Daniel Kristensen, Garmin Ltd, or its subsidiaries.
+    All rights reserved.
+
+    Redistribution and use in source and binary forms, with or without
+    modification, are permitted provided that the following conditions are met:
+
+    * Redistributions of source code must retain the above copyright notice, this
+      list of conditions and the following disclaimer.
+
+    * Redistributions in binary form must reproduce the above copyright notice,
+      this list of conditions and the following disclaimer in the documentation
+      and/or other materials provided with the distribution.
+
+    * Neither the name of the copyright holder nor the names of its
+      contributors may be used to endorse or promote products derived from
+      this software without specific prior written permission.
+
+    THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+    AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+    IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+    DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+    FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+    DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+    SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+    CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+    OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+    OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import io
+import unittest
+
+from GlobifestLib import DefTree, Log, Template
+from Globitest import Helpers
+
+def render(lines, definitions):
+    """Compile a template from a list of lines, and render it with the definitions"""
+    template = Template.compile_template("\n".join(lines), "test.tpl")
+    return template.render(
+        PARAMS=Template.get_params(definitions),
+        DEFINITIONS=definitions,
+        OUT_FILE="out.txt",
+        OUT_DIR="out"
+        )
+
+class TestTemplate(unittest.TestCase):
+
+    def setUp(self):
+        enum_param = DefTree.Parameter(
+            "E", "e", DefTree.PARAM_TYPE.ENUM,
+            metadata=DefTree.EnumMetadata(
+                count="E_COUNT",
+                vlist=[DefTree.EnumChoice(id="E_A", text="a"), DefTree.EnumChoice(id="E_B", text="b")]
+                )
+            )
+        self.defs = [
+            DefTree.ParamValue(param=DefTree.Parameter("B", "b", DefTree.PARAM_TYPE.BOOL), value="TRUE"),
+            DefTree.ParamValue(param=DefTree.Parameter("I", "i", DefTree.PARAM_TYPE.INT), value="5"),
+            DefTree.ParamValue(param=enum_param, value="1")
+            ]
+
+    def test_cache(self):
+        tmp_dir = Helpers.new_temp_dir(self)
+        cache = Template.TemplateCache()
+        fnames = [Helpers.write_file(tmp_dir, name, "${OUT_FILE}\n") for name in ["a.tpl", "b.tpl"]]
+
+        # Templates with the same text are compiled once
+        template = cache.get(fnames[0])
+        self.assertIs(cache.get(fnames[1]), template)
+        self.assertEqual(template.render(PARAMS=[], DEFINITIONS=[], OUT_FILE="x", OUT_DIR=""), "x\n")
+
+        with open(fnames[1], "at") as f:
+            f.write("%% end\n")
+        self.assertIsNot(cache.get(fnames[1]), template)
+        self.assertNotEqual(cache.get(fnames[1]).get_digest(), template.get_digest())
+
+    def test_errors(self):
+        bad_templates = [
+            (["%if"], "test.tpl:1: Invalid expression"),
+            (["%for p PARAMS", "%end"], "test.tpl:1: Invalid loop"),
+            (["a", "%for p in PARAMS"], "test.tpl:2: %for without %end"),
+            (["%end"], "test.tpl:1: %end without block"),
+            (["%if True", "%else", "%elif False", "%end"], "test.tpl:3: %elif after %else"),
+            (["%case INT"], "test.tpl:1: %case without %switch"),
+            (["%loop"], "test.tpl:1: Unknown directive '%loop'"),
+            (["${1 +}"], "test.tpl:1: Invalid expression '1 \\+'"),
+            (["a", "${PARAMS[3].id}"], "test.tpl:2: list index out of range")
+            ]
+        self.addCleanup(Log.Logger.set_err_pipe, Log.Logger.err_pipe)
+        Log.Logger.set_err_pipe(io.StringIO())
+        for lines, msg in bad_templates:
+            with self.assertRaisesRegex(Log.GlobifestException, msg):
+                render(lines, self.defs)
+
+    def test_loop(self):
+        out = render([
+            "%# Comment",
+            "%for p in PARAMS",
+            "    %for implicit_value in p.implicit",
+            "${implicit_value[0]}=${implicit_value[1]}",
+            "    %end",
+            "${p.id}=${p.implicit_id or p.value} (${p.type})",
+            "%end",
+            "%%"
+            ], self.defs)
+
+        self.assertEqual(out, "".join([
+            "B=TRUE (BOOL)\n",
+            "I=5 (INT)\n",
+            "E_A=0\n",
+            "E_B=1\n",
+            "E_COUNT=2\n",
+            "E=E_B (ENUM)\n",
+            "%\n"
+            ]))
+
+    def test_switch(self):
+        out = render([
+            "%for p in PARAMS",
+            "  %switch p.type",
+            "  %case BOOL",
+            "    %if p.value == \"TRUE\"",
+            "${p.id}: yes",
+            "    %else",
+            "${p.id}: no",
+            "    %end",
+            "  %case INT FLOAT",
+            "${p.id}: ${int(p.value) * 2}",
+            "  %default",
+            "${p.id}: other",
+            "  %end",
+            "%end",
+            "%switch OUT_DIR",
+            "%default",
+            "${OUT_DIR}",
+            "%end"
+            ], self.defs)
+
+        self.assertEqual(out, "B: yes\nI: 10\nE: other\nout\n")
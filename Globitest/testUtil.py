@@ -32,10 +32,16 @@
 """
 
 import copy
+import pickle
 import unittest
 
 from GlobifestLib import Util
 
+class SampleRecord(Util.Record):
+    """Record type used for testing"""
+
+    __slots__ = ("a", "b", "c")
+
 class TestUtil(unittest.TestCase):
 
     def test_container1(self):
@@ -169,6 +175,41 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(original.a, [6, 7])
         self.assertEqual(shadow.a, [1, 2])
 
+    def test_record(self):
+        record = SampleRecord(a=1, b=[2])
+
+        # Records have the same interface as a Container; unset members are absent
+        self.assertEqual(record.a, 1)
+        self.assertEqual(record["b"], [2])
+        self.assertEqual(record.get("c", 3), 3)
+        self.assertNotIn("c", record)
+        self.assertRaises(KeyError, lambda: record["c"])
+        self.assertEqual(record.keys(), ["a", "b"])
+        self.assertEqual(list(record), [("a", 1), ("b", [2])])
+        self.assertEqual(record, Util.Container(a=1, b=[2]))
+        self.assertEqual(Util.Container(a=1, b=[2]), record)
+
+        record["c"] = 4
+        self.assertEqual(record.c, 4)
+        self.assertEqual(record.get_diff(Util.Container(a=1, b=[2], c=4)), Util.Container())
+
+        # Members which are not declared cannot be added
+        def set_d():
+            record["d"] = 5
+        self.assertRaises(KeyError, set_d)
+
+    def test_record_copy(self):
+        record = SampleRecord(a=1, b=[2])
+        shallow = copy.copy(record)
+        deep = copy.deepcopy(record)
+        pickled = pickle.loads(pickle.dumps(record))
+
+        record.b.append(3)
+        self.assertEqual(shallow, SampleRecord(a=1, b=[2, 3]))
+        self.assertEqual(deep, SampleRecord(a=1, b=[2]))
+        self.assertEqual(pickled, SampleRecord(a=1, b=[2]))
+        self.assertNotIn("c", pickled)
+
     def test_create_enum(self):
         testEnum = Util.create_enum("a", "b", "c", "d")
         self.assertEqual(testEnum.a, 0)
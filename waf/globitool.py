@@ -114,6 +114,8 @@ class Globitool():
             * out_dir - Absolute path to output directory
             * settings - Merged (effective) settings for the project
             2. Output directory exists
+
+        External dependencies may still be setting up in the background.
         """
         self._debug([
             "PREBUILD",